@@ -4,7 +4,10 @@ CREATE DATABASE coffee_db;
 DROP TABLE IF EXISTS coffee_db.orders;
 CREATE TABLE coffee_db.orders (
 order_id int PRIMARY KEY AUTO_INCREMENT,
-seller_name varchar(255) NOT NULL);
+seller_name varchar(255) NOT NULL,
+created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+INDEX idx_orders_seller_name (seller_name),
+INDEX idx_orders_created_at (created_at));
 
 DROP TABLE IF EXISTS coffee_db.order_items;
 CREATE TABLE coffee_db.order_items (
@@ -13,4 +16,38 @@ item_name varchar(255) NOT NULL,
 item_type varchar(255) NOT NULL,
 cost DECIMAL(10,4),
 order_id int NOT NULL,
-CONSTRAINT FK_order_items  FOREIGN KEY (order_id) REFERENCES orders(order_id) ON DELETE CASCADE);
\ No newline at end of file
+INDEX idx_order_items_order_id_cost (order_id, cost),
+CONSTRAINT FK_order_items  FOREIGN KEY (order_id) REFERENCES orders(order_id) ON DELETE CASCADE);
+
+DROP TABLE IF EXISTS coffee_db.seller_sales_summary;
+CREATE TABLE coffee_db.seller_sales_summary (
+seller_name varchar(255) PRIMARY KEY,
+sales_number int NOT NULL,
+sales_value DECIMAL(14,4) NOT NULL);
+
+DROP TABLE IF EXISTS coffee_db.journal_checkpoint;
+CREATE TABLE coffee_db.journal_checkpoint (
+journal_name varchar(255) PRIMARY KEY,
+segment int NOT NULL,
+position bigint NOT NULL);
+
+DROP TABLE IF EXISTS coffee_db.store_counter;
+CREATE TABLE coffee_db.store_counter (
+counter_name varchar(255) PRIMARY KEY,
+counter_value bigint NOT NULL);
+INSERT INTO coffee_db.store_counter (counter_name, counter_value) VALUES ('deleted_orders', 0);
+
+DROP TABLE IF EXISTS coffee_db.schema_version;
+CREATE TABLE coffee_db.schema_version (
+version int PRIMARY KEY,
+description varchar(255) NOT NULL,
+applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+
+INSERT INTO coffee_db.schema_version (version, description) VALUES
+(1, 'add orders seller name index'),
+(2, 'add order items order id cost index'),
+(3, 'add orders created at'),
+(4, 'create seller sales summary'),
+(5, 'create journal checkpoint'),
+(6, 'convert money to units'),
+(7, 'create store counter');
@@ -0,0 +1 @@
+CREATE INDEX idx_orders_seller_name ON orders (seller_name);
@@ -0,0 +1 @@
+CREATE INDEX idx_order_items_order_id_cost ON order_items (order_id, cost);
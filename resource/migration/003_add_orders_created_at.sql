@@ -0,0 +1,2 @@
+ALTER TABLE orders ADD COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX idx_orders_created_at ON orders (created_at);
@@ -0,0 +1,8 @@
+CREATE TABLE seller_sales_summary (
+seller_name varchar(255) PRIMARY KEY,
+sales_number int NOT NULL,
+sales_value DECIMAL(14,4) NOT NULL);
+INSERT INTO seller_sales_summary (seller_name, sales_number, sales_value)
+SELECT orders.seller_name, COUNT(orders.seller_name), SUM(order_items.cost)
+FROM orders INNER JOIN order_items on orders.order_id = order_items.order_id
+GROUP BY orders.seller_name;
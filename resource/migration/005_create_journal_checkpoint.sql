@@ -0,0 +1,4 @@
+CREATE TABLE journal_checkpoint (
+journal_name varchar(255) PRIMARY KEY,
+segment int NOT NULL,
+position bigint NOT NULL);
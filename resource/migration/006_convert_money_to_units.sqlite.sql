@@ -0,0 +1,6 @@
+-- SQLite files created before money was stored as integer number of ten-thousandths declare money columns
+-- as DECIMAL and hold amounts, files declaring them as INTEGER hold ten-thousandths already.
+UPDATE order_items SET cost = CAST(ROUND(cost * 10000) AS INTEGER)
+WHERE cost IS NOT NULL AND (SELECT type FROM pragma_table_info('order_items') WHERE name = 'cost') <> 'INTEGER';
+UPDATE seller_sales_summary SET sales_value = CAST(ROUND(sales_value * 10000) AS INTEGER)
+WHERE (SELECT type FROM pragma_table_info('seller_sales_summary') WHERE name = 'sales_value') <> 'INTEGER';
@@ -0,0 +1,4 @@
+CREATE TABLE store_counter (
+counter_name varchar(255) PRIMARY KEY,
+counter_value bigint NOT NULL);
+INSERT INTO store_counter (counter_name, counter_value) VALUES ('deleted_orders', 0);
@@ -0,0 +1,45 @@
+CREATE TABLE orders (
+order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+seller_name varchar(255) NOT NULL,
+created_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')));
+CREATE INDEX idx_orders_seller_name ON orders (seller_name);
+CREATE INDEX idx_orders_created_at ON orders (created_at);
+
+CREATE TABLE order_items (
+item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+item_name varchar(255) NOT NULL,
+item_type varchar(255) NOT NULL,
+-- money is stored as integer number of ten-thousandths
+cost INTEGER,
+order_id int NOT NULL REFERENCES orders(order_id) ON DELETE CASCADE);
+CREATE INDEX idx_order_items_order_id_cost ON order_items (order_id, cost);
+
+CREATE TABLE seller_sales_summary (
+seller_name varchar(255) PRIMARY KEY,
+sales_number int NOT NULL,
+-- money is stored as integer number of ten-thousandths
+sales_value INTEGER NOT NULL);
+
+CREATE TABLE journal_checkpoint (
+journal_name varchar(255) PRIMARY KEY,
+segment int NOT NULL,
+position bigint NOT NULL);
+
+CREATE TABLE store_counter (
+counter_name varchar(255) PRIMARY KEY,
+counter_value bigint NOT NULL);
+INSERT INTO store_counter (counter_name, counter_value) VALUES ('deleted_orders', 0);
+
+CREATE TABLE schema_version (
+version int PRIMARY KEY,
+description varchar(255) NOT NULL,
+applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+
+INSERT INTO schema_version (version, description) VALUES
+(1, 'add orders seller name index'),
+(2, 'add order items order id cost index'),
+(3, 'add orders created at'),
+(4, 'create seller sales summary'),
+(5, 'create journal checkpoint'),
+(6, 'convert money to units'),
+(7, 'create store counter');
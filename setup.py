@@ -6,5 +6,6 @@ setup(
     author="Aleh Struneuski",
     author_email="oleg.strunevskiy@gmail.com",
     packages=find_packages(),
-    install_requires=["PyMySQL", "six", "future", "mock", "pep8"]
+    install_requires=["PyMySQL", "six", "future", "mock", "pep8"],
+    extras_require={"stats": ["numpy"], "json": ["orjson"], "test": ["pytest", "numpy"]}
 )
@@ -20,10 +20,13 @@ def main():
 
     prompt = BasePrompt.get_prompt(User(args.first_name, args.last_name, args.position))
     command_line = " ".join(args.command)
-    if args.mode == "command_line":
-        prompt.onecmd(command_line)
-    elif args.mode == "interactive":
-        prompt.cmdloop(command_line)
+    try:
+        if args.mode == "command_line":
+            prompt.onecmd(command_line)
+        elif args.mode == "interactive":
+            prompt.cmdloop(command_line)
+    finally:
+        prompt.close()
 
 
 if __name__ == "__main__":
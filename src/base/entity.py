@@ -1,17 +1,19 @@
 """This module is made up of classes that represent business entities."""
-from decimal import Decimal
+from array import array
+
+from .money import Money
 
 
 def round_cost(cost):
     """It rounds cost of item up to 4 digits.
 
     Args:
-        cost (Decimal): cost of item
+        cost (object): Money, int, str, Decimal or float cost of item
 
     Returns:
-        Decimal: rounded cost of item up to 4 digits
+        Money: rounded cost of item up to 4 digits
     """
-    return round(cost, 4)
+    return Money.of(cost)
 
 
 class TYPE:
@@ -30,14 +32,14 @@ class Item(object):
 
     Attributes:
         __name (str): item name
-        __cost (Decimal): item cost
+        __cost (Money): item cost
         __item_type (TYPE): item type, beverage or ingredient
         __item_id (int): id of persisted item in store
     """
 
     def __init__(self, name="", cost=0, item_type="", item_id=0):
         self.__name = name
-        self.__cost = round_cost(Decimal(cost))
+        self.__cost = round_cost(cost)
         self.__item_type = item_type
         self.__item_id = item_id
 
@@ -55,7 +57,7 @@ class Item(object):
 
     @cost.setter
     def cost(self, cost):
-        self.__cost = cost
+        self.__cost = round_cost(cost)
 
     @property
     def item_type(self):
@@ -212,13 +214,13 @@ class ReportRecord(object):
     Attributes:
         __fullname (str): fullname of salesman
         __sales_number (int): sales number
-        __sales_value (Decimal): sales value
+        __sales_value (Money): sales value
     """
 
     def __init__(self, fullname, sales_number, sales_value):
         self.__fullname = fullname
         self.__sales_number = sales_number
-        self.__sales_value = round_cost(sales_value)
+        self.__sales_value = sales_value if isinstance(sales_value, Money) else round_cost(sales_value)
 
     @property
     def fullname(self):
@@ -245,3 +247,230 @@ class ReportRecord(object):
 
     def __repr__(self):
         return "fullname:{},sales:{},value:{}".format(self.__fullname, self.__sales_number, self.__sales_value)
+
+
+class Page(object):
+    """Representation of a page of entities read from a store.
+
+    Attributes:
+        __entities (list): entities of the page
+        __next_token (int): key after which the next page starts, None if the page is the last one
+    """
+
+    def __init__(self, entities, next_token=None):
+        self.__entities = entities
+        self.__next_token = next_token
+
+    @property
+    def entities(self):
+        return self.__entities
+
+    @property
+    def next_token(self):
+        return self.__next_token
+
+    @property
+    def is_last(self):
+        return self.__next_token is None
+
+    def __iter__(self):
+        return iter(self.__entities)
+
+    def __len__(self):
+        return len(self.__entities)
+
+    def __repr__(self):
+        return "entities:{},next_token:{}".format(self.__entities, self.__next_token)
+
+
+class JournalPosition(object):
+    """Representation of a position in a segmented journal.
+
+    Attributes:
+        __segment (int): number of journal segment
+        __offset (int): byte offset in the segment
+    """
+
+    def __init__(self, segment=1, offset=0):
+        self.__segment = segment
+        self.__offset = offset
+
+    @property
+    def segment(self):
+        return self.__segment
+
+    @property
+    def offset(self):
+        return self.__offset
+
+    def __key(self):
+        return self.__segment, self.__offset
+
+    def __hash__(self):
+        return hash(self.__key())
+
+    def __eq__(self, other):
+        return isinstance(other, type(self)) and self.__key() == (other.segment, other.offset)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.__key() < (other.segment, other.offset)
+
+    def __le__(self, other):
+        return self.__key() <= (other.segment, other.offset)
+
+    def __repr__(self):
+        return "segment:{},offset:{}".format(self.__segment, self.__offset)
+
+
+class BillLocation(object):
+    """Representation of a bill location in a segmented bill archive.
+
+    A bill of a compressed segment is located by the block holding it and its offset in the decompressed block.
+
+    Attributes:
+        __order_id (int): id of the order the bill was made of, 0 if the bill was imported from a bill file
+        __date (str): date the bill was made at
+        __segment (int): number of archive segment
+        __offset (int): byte offset of the bill in the segment or in the decompressed block
+        __length (int): byte length of the bill
+        __block_offset (int): byte offset of the compressed block in the segment
+        __block_length (int): byte length of the compressed block, 0 if the segment is not compressed
+        __digest (int): content hash of an imported bill, 0 if the bill was made of a saved order or it is not known
+    """
+
+    def __init__(self, order_id, date, segment, offset, length, block_offset=0, block_length=0, digest=0):
+        self.__order_id = order_id
+        self.__date = date
+        self.__segment = segment
+        self.__offset = offset
+        self.__length = length
+        self.__block_offset = block_offset
+        self.__block_length = block_length
+        self.__digest = digest
+
+    @property
+    def order_id(self):
+        return self.__order_id
+
+    @property
+    def date(self):
+        return self.__date
+
+    @property
+    def segment(self):
+        return self.__segment
+
+    @property
+    def offset(self):
+        return self.__offset
+
+    @property
+    def length(self):
+        return self.__length
+
+    @property
+    def block_offset(self):
+        return self.__block_offset
+
+    @property
+    def block_length(self):
+        return self.__block_length
+
+    @property
+    def digest(self):
+        return self.__digest
+
+    @property
+    def is_compressed(self):
+        return self.__block_length > 0
+
+    def __key(self):
+        return (self.__order_id, self.__date, self.__segment, self.__offset, self.__length, self.__block_offset,
+                self.__block_length, self.__digest)
+
+    def __hash__(self):
+        return hash(self.__key())
+
+    def __eq__(self, other):
+        return (isinstance(other, type(self)) and
+                self.__key() == (other.order_id, other.date, other.segment, other.offset, other.length,
+                                 other.block_offset, other.block_length, other.digest))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "order:{},date:{},segment:{},offset:{},length:{},block_offset:{},block_length:{},digest:{}".format(
+            self.__order_id, self.__date, self.__segment, self.__offset, self.__length, self.__block_offset,
+            self.__block_length, self.__digest)
+
+
+class SalesColumns(object):
+    """Representation of sales figures of many sellers as columns.
+
+    Numbers and values are kept in arrays of 64-bit integers, values in ten-thousandths as Money keeps them,
+    so the columns take a few bytes per seller and can be shared with vectorized code without copying.
+
+    Attributes:
+        __sellers (list): fullnames of salesmen
+        __sales_numbers (array): sales numbers
+        __sales_values (array): sales values in ten-thousandths
+    """
+
+    def __init__(self, sellers=None, sales_numbers=None, sales_values=None):
+        self.__sellers = sellers if sellers is not None else []
+        self.__sales_numbers = sales_numbers if sales_numbers is not None else array("q")
+        self.__sales_values = sales_values if sales_values is not None else array("q")
+
+    @property
+    def sellers(self):
+        return self.__sellers
+
+    @property
+    def sales_numbers(self):
+        return self.__sales_numbers
+
+    @property
+    def sales_values(self):
+        return self.__sales_values
+
+    def append(self, seller, sales_number, sales_value):
+        """It appends sales figures of a seller.
+
+        Args:
+            seller (str): fullname of salesman.
+            sales_number (int): sales number.
+            sales_value (object): sales value, it is rounded to ten-thousandths.
+        """
+        self.__sellers.append(seller)
+        self.__sales_numbers.append(sales_number)
+        self.__sales_values.append(Money.to_units(sales_value))
+
+    def extend(self, sellers, sales_numbers, sales_value_units):
+        """It appends sales figures of many sellers whose values are already in ten-thousandths.
+
+        Args:
+            sellers (list): fullnames of salesmen.
+            sales_numbers (list): sales numbers.
+            sales_value_units (list): sales values in ten-thousandths.
+        """
+        self.__sellers.extend(sellers)
+        self.__sales_numbers.extend(sales_numbers)
+        self.__sales_values.extend(sales_value_units)
+
+    def get_record(self, index):
+        """It materializes sales figures of one seller.
+
+        Args:
+            index (int): index of the seller.
+
+        Returns:
+            ReportRecord: sales figures of the seller.
+        """
+        return ReportRecord(self.__sellers[index], self.__sales_numbers[index], Money(self.__sales_values[index]))
+
+    def __len__(self):
+        return len(self.__sellers)
@@ -0,0 +1,157 @@
+"""This module contains a fixed-point money type used for costs and sales values."""
+import functools
+import re
+from decimal import Decimal, ROUND_HALF_EVEN
+
+
+@functools.total_ordering
+class Money(object):
+    """Representation of an amount of money as an integer number of ten-thousandths.
+
+    It matches DECIMAL(10,4) columns of the store, so adding amounts is integer addition
+    and the amount is converted to Decimal only at the edges, for example when it is written to DB.
+    Values with more than 4 fraction digits are rounded half to even.
+
+    Attributes:
+        __units (int): amount in ten-thousandths.
+    """
+
+    __slots__ = ("__units",)
+
+    SCALE = 10000
+    DIGITS = 4
+    QUANTUM = Decimal(1).scaleb(-DIGITS)
+    PATTERN = re.compile(r"^\s*([+-]?)([0-9]*)(?:\.([0-9]{0,4}))?\s*$")
+
+    def __init__(self, units=0):
+        self.__units = units
+
+    @property
+    def units(self):
+        return self.__units
+
+    @classmethod
+    def of(cls, value):
+        """It converts a number to money rounding it to 4 fraction digits.
+
+        Args:
+            value (object): Money, int, str, Decimal or float amount.
+
+        Returns:
+            Money: the amount.
+        """
+        if isinstance(value, Money):
+            return value
+        return cls(cls.to_units(value))
+
+    @classmethod
+    def to_units(cls, value):
+        """It converts a number to ten-thousandths rounding it to 4 fraction digits.
+
+        Args:
+            value (object): Money, int, str, Decimal or float amount.
+
+        Returns:
+            int: the amount in ten-thousandths.
+        """
+        if isinstance(value, Money):
+            return value.units
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value * cls.SCALE
+        if isinstance(value, str):
+            units = cls.__parse(value)
+            if units is not None:
+                return units
+            value = Decimal(value)
+        elif isinstance(value, float):
+            value = Decimal(repr(value))
+        return int(value.quantize(cls.QUANTUM, rounding=ROUND_HALF_EVEN).scaleb(cls.DIGITS))
+
+    def to_decimal(self):
+        """It converts money to Decimal with 4 fraction digits.
+
+        Returns:
+            Decimal: the amount.
+        """
+        return Decimal(self.__units).scaleb(-self.DIGITS)
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.__units + other.units)
+        if isinstance(other, int):
+            return Money(self.__units + other * self.SCALE)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.__units - other.units)
+        if isinstance(other, int):
+            return Money(self.__units - other * self.SCALE)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, int):
+            return Money(other * self.SCALE - self.__units)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return Money(self.__units * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.__units)
+
+    def __abs__(self):
+        return Money(abs(self.__units))
+
+    def __bool__(self):
+        return self.__units != 0
+
+    __nonzero__ = __bool__
+
+    def __float__(self):
+        return self.__units / float(self.SCALE)
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.__units == other.units
+        if isinstance(other, (int, Decimal)):
+            return self.to_decimal() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.__units < other.units
+        if isinstance(other, (int, Decimal)):
+            return self.to_decimal() < other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.to_decimal())
+
+    def __str__(self):
+        if self.__units < 0:
+            return "-" + str(-self)
+        digits = str(self.__units).zfill(self.DIGITS + 1)
+        return digits[:-self.DIGITS] + "." + digits[-self.DIGITS:]
+
+    def __repr__(self):
+        return "Money('{}')".format(self)
+
+    @classmethod
+    def __parse(cls, text):
+        match = cls.PATTERN.match(text)
+        if match is None or not (match.group(2) or match.group(3)):
+            return None
+        sign, whole, fraction = match.group(1), match.group(2), match.group(3) or ""
+        units = int(whole or 0) * cls.SCALE + int(fraction.ljust(cls.DIGITS, "0"))
+        return -units if sign == "-" else units
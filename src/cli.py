@@ -3,16 +3,36 @@ from __future__ import print_function
 
 import logging
 from cmd import Cmd
+from datetime import datetime, timedelta
 
 from src.base.entity import POSITION, TYPE, Order
+from src.service.bill_writer import BillWriter
 from src.service.exception import ServiceError
-from src.service.exporter import ConsoleExporter, CSVExporter
+from src.service.exporter import ConsoleExporter, CSVExporter, FanOutExporter, JsonLinesExporter, ColumnarExporter
+from src.service.report_cache import ReportCache
 from src.service.service import OrderService, ReportService
+from src.service.write_behind import WriteBehindQueue
+from src.store.archive import BillArchive
+from src.store.cache import DaoCache
 from src.store.dao import DaoManager, ItemDaoFile
-from src.store.db import DataSource
+from src.store.db import DataSource, ReplicaSet
+from src.store.journal import OrderJournal
+from src.store.migration import MigrationRunner
+from src.store.shard import ShardMap
+from src.utils.file import PropertyUtil
 
 logger = logging.getLogger()
 
+path_to_service_config = "./../config/service.cfg"
+write_behind_section = "WRITE_BEHIND"
+bill_archive_section = "BILL_ARCHIVE"
+bill_writer_section = "BILL_WRITER"
+csv_export_section = "CSV_EXPORT"
+json_export_section = "JSON_EXPORT"
+columnar_export_section = "COLUMNAR_EXPORT"
+report_cache_section = "REPORT_CACHE"
+report_export_section = "REPORT_EXPORT"
+
 
 class BasePrompt(Cmd):
     """It is base class of SalesmanPrompt and ManagerPrompt.
@@ -23,6 +43,8 @@ class BasePrompt(Cmd):
         __user (User): .
         __data_source (DataSource): .
         __dao_manager (DaoManager): .
+        __shard_map (ShardMap): shards of orders, None if orders are not sharded.
+        __bill_archive (BillArchive): archive of order bills.
     """
 
     prompt = ">>"
@@ -31,7 +53,10 @@ class BasePrompt(Cmd):
         Cmd.__init__(self)
         self.__user = user
         self.__data_source = DataSource()
-        self.__dao_manager = DaoManager(self.__data_source)
+        self.__dao_manager = None
+        self.__dao_manager = self.__create_dao_manager(self.__data_source)
+        self.__shard_map = ShardMap.from_config(self.__data_source, self.__create_dao_manager)
+        self.__bill_archive = self.__create_bill_archive()
 
     def cmdloop(self, line):
         """It starts interactive mode with command to be executed.
@@ -60,6 +85,15 @@ class BasePrompt(Cmd):
         """
         return self.__user
 
+    @property
+    def data_source(self):
+        """It returns initialized data source.
+
+        Returns:
+            DataSource: data source holding DB configuration and connections.
+        """
+        return self.__data_source
+
     @property
     def dao_manager(self):
         """It returns initialized dao manager.
@@ -69,9 +103,33 @@ class BasePrompt(Cmd):
         """
         return self.__dao_manager
 
+    @property
+    def shard_map(self):
+        """It returns shards of orders.
+
+        Returns:
+            ShardMap: shards of orders, None if orders are not sharded.
+        """
+        return self.__shard_map
+
+    @property
+    def bill_archive(self):
+        """It returns archive of order bills.
+
+        Returns:
+            BillArchive: archive of order bills.
+        """
+        return self.__bill_archive
+
+    def close(self):
+        """It releases resources of the application, it is called on every exit path and can be called twice.
+        """
+        self.__bill_archive.close()
+
     def do_quit(self, args):
         """It stops executing the application.
         """
+        self.close()
         raise SystemExit
 
     def help_quit(self, args):
@@ -79,6 +137,28 @@ class BasePrompt(Cmd):
         """
         print("go out of the app")
 
+    @staticmethod
+    def __create_bill_archive():
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, bill_archive_section)
+                       if entry])
+        return BillArchive(config.get("path", OrderService.BILL_ARCHIVE_PATH),
+                           segment_size=int(config.get("segment_size", BillArchive.SEGMENT_SIZE)),
+                           block_size=int(config.get("block_size", BillArchive.BLOCK_SIZE)),
+                           sync=config.get("sync", "false").lower() == "true")
+
+    def __create_dao_manager(self, data_source):
+        if data_source is self.__data_source and self.__dao_manager is not None:
+            return self.__dao_manager
+        return DaoManager(data_source, self.__create_cache(data_source), ReplicaSet.from_config(data_source))
+
+    @staticmethod
+    def __create_cache(data_source):
+        cache_size = int(data_source.get_property("cache_size", 0))
+        if cache_size <= 0:
+            return None
+        cache_ttl = float(data_source.get_property("cache_ttl", 0))
+        return DaoCache(cache_size, cache_ttl or None)
+
     @staticmethod
     def get_prompt(user):
         """It creates ManagerPrompt or SalesmanPrompt object depending on user's position.
@@ -104,6 +184,8 @@ class SalesmanPrompt(BasePrompt):
         __order (Order): The order being persisted after a user created it.
         __item_dao_file (ItemDaoFile): It is used to extract all available items for sales.
         __order_service (OrderService): It is used to persist an order and make order bill.
+        __bill_writer (BillWriter): It is used to make order bills in the background, None if they are made on submit.
+        __write_behind_queue (WriteBehindQueue): It is used to submit orders in write-behind mode, None otherwise.
     """
 
     __available_item_types = ["beverage", "ingredient"]
@@ -112,7 +194,9 @@ class SalesmanPrompt(BasePrompt):
         BasePrompt.__init__(self, user)
         self.__order = None
         self.__item_dao_file = ItemDaoFile()
-        self.__order_service = OrderService(self.dao_manager)
+        self.__order_service = OrderService(self.dao_manager, self.shard_map, self.bill_archive)
+        self.__bill_writer = self.__create_bill_writer()
+        self.__write_behind_queue = self.__create_write_behind_queue()
 
     def do_show(self, arg):
         """It shows all the available items being sold by a requested type.
@@ -176,6 +260,9 @@ class SalesmanPrompt(BasePrompt):
     def do_submit_order(self, args):
         """It submits an order a salesman created.
 
+        The order is submitted once it is saved or journaled. A bill that can not be made afterwards
+        is reported as a warning, the saved order is not submitted again.
+
         Args:
             args (str): it is an arg with which the command was invoked.
 
@@ -186,13 +273,14 @@ class SalesmanPrompt(BasePrompt):
         logger.info("Command submit_order was invoked")
         logger.info("Order to be submitted: {}".format(str(self.__order)))
         try:
-            logger.info("Creating the bill from the order.")
-            self.__order_service.make_bill(self.__order)
-            logger.info("The bill from the order was created.")
-
-            logger.info("Persisting data of the order.")
-            self.__order_service.save(self.__order)
-            logger.info("The data of the order was persisted.")
+            if self.__write_behind_queue is not None:
+                logger.info("Journaling data of the order, the bill is made once it is flushed.")
+                self.__write_behind_queue.submit(self.__order)
+                logger.info("The data of the order was journaled.")
+            else:
+                logger.info("Persisting data of the order.")
+                self.__order_service.save(self.__order)
+                logger.info("The data of the order was persisted.")
         except ServiceError as e:
             logger.exception(e)
             print("Order was not submitted due to order service not being able to handle the order.")
@@ -203,9 +291,124 @@ class SalesmanPrompt(BasePrompt):
         else:
             logger.info("Order was submitted successfully. Order: {}".format(str(self.__order)))
             print("Order was submitted successfully.")
+            if self.__write_behind_queue is None:
+                self.__make_bill(self.__order)
         finally:
             self.__order = None
 
+    def do_flush(self, args):
+        """It saves all the journaled orders to DB in write-behind mode.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command flush was invoked.")
+        if self.__write_behind_queue is None:
+            print("Orders are saved on submit since write-behind mode is off.")
+            return
+        try:
+            flushed = self.__write_behind_queue.flush()
+        except Exception as e:
+            logger.exception(e)
+            print("Journaled orders were not flushed due to unexpected things.")
+        else:
+            print("The number of flushed orders: " + str(flushed))
+
+    def help_flush(self, args):
+        """It shows a help message for the flush command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Save all the journaled orders to DB in write-behind mode.")
+        print("No args are required.")
+
+    def do_status(self, args):
+        """It shows the backlog of bills being made and of journaled orders in write-behind mode.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command status was invoked.")
+        if self.__bill_writer is not None:
+            status = self.__bill_writer.status()
+            print("Bills waiting to be made: " + str(status.get("pending")))
+            print("Bills made since start: " + str(status.get("written")))
+            print("Bill retries since start: " + str(status.get("retried")))
+            if status.get("failed"):
+                print("Orders whose bills were not made: " + ", ".join([str(order_id)
+                                                                        for order_id in status.get("failed")]))
+            if status.get("last_error") is not None:
+                print("Last bill error: " + str(status.get("last_error")))
+        if self.__write_behind_queue is None:
+            print("Orders are saved on submit since write-behind mode is off.")
+            return
+        try:
+            status = self.__write_behind_queue.status()
+        except Exception as e:
+            logger.exception(e)
+            print("Status was not obtained due to unexpected things.")
+        else:
+            print("Orders waiting in the journal: " + str(status.get("pending")))
+            print("Orders flushed since start: " + str(status.get("flushed")))
+            print("Worker is running: " + str(status.get("running")))
+            if status.get("last_error") is not None:
+                print("Last flush error: " + str(status.get("last_error")))
+            if status.get("bill_failed"):
+                print("Flushed orders whose bills were not made: " + ", ".join([str(order_id) for order_id
+                                                                              in status.get("bill_failed")]))
+            if status.get("last_bill_error") is not None:
+                print("Last flushed bill error: " + str(status.get("last_bill_error")))
+
+    def help_status(self, args):
+        """It shows a help message for the status command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Show the number of bills being made and failed bills.")
+        print("Show the number of journaled orders that were not saved to DB yet.")
+        print("No args are required.")
+
+    def do_reprint(self, arg):
+        """It prints the bill of an order from the bill archive.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command reprint was invoked with arg: {}.".format(arg))
+        if not arg.strip().isdigit():
+            print("Command was invoked with incorrect arg.")
+            self.help_reprint(arg)
+            return
+        try:
+            bill = self.__order_service.reprint(int(arg))
+        except ServiceError as e:
+            logger.exception(e)
+            print("Bill was not reprinted: " + str(e))
+        except Exception as e:
+            logger.exception(e)
+            print("Bill was not reprinted due to unexpected things.")
+        else:
+            print(bill)
+
+    def help_reprint(self, args):
+        """It shows a help message for the reprint command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Command reprint prints the bill of the order whose id is passed as arg.")
+
+    def close(self):
+        """It stops write-behind worker flushing journaled orders and bill writer making queued bills.
+        """
+        if self.__write_behind_queue is not None:
+            self.__write_behind_queue.stop()
+        if self.__bill_writer is not None:
+            self.__bill_writer.stop()
+        BasePrompt.close(self)
+
     def help_submit_order(self, args):
         """It shows a help message for the submit_order command.
 
@@ -287,6 +490,49 @@ class SalesmanPrompt(BasePrompt):
         print("Clean created order.")
         print("No args are required.")
 
+    def __create_bill_writer(self):
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, bill_writer_section)
+                       if entry])
+        if config.get("enabled", "false").lower() != "true":
+            return None
+        writer = BillWriter(self.__order_service, queue_size=int(config.get("queue_size", 1000)),
+                            workers=int(config.get("workers", 2)),
+                            max_attempts=int(config.get("max_attempts", 3)),
+                            retry_delay=float(config.get("retry_delay", 0.5)))
+        writer.start()
+        return writer
+
+    def __create_write_behind_queue(self):
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, write_behind_section)
+                       if entry])
+        if config.get("enabled", "false").lower() != "true":
+            return None
+        journal = OrderJournal(config.get("journal_path"), sync=config.get("sync", "true").lower() == "true")
+        queue = WriteBehindQueue(self.__order_service, self.dao_manager, journal,
+                                 batch_size=int(config.get("batch_size", 100)),
+                                 flush_interval=float(config.get("flush_interval", 0.5)),
+                                 bill_writer=self.__bill_writer)
+        queue.start()
+        return queue
+
+    def __make_bill(self, order):
+        try:
+            if self.__bill_writer is not None:
+                logger.info("Queueing the bill of the order.")
+                try:
+                    self.__bill_writer.submit(order)
+                except ServiceError as e:
+                    # the queue is full, the order is listed by the status command as one whose bill was not made
+                    self.__bill_writer.fail(order, e)
+                    raise e
+            else:
+                logger.info("Creating the bill from the order.")
+                self.__order_service.make_bill(order)
+                logger.info("The bill from the order was created.")
+        except Exception as e:
+            logger.exception(e)
+            print("Warning: the bill of the order {} was not made: {}".format(order.id, str(e)))
+
     def __create_order(self):
         if self.__order is None:
             self.__order = Order(self.user)
@@ -299,14 +545,23 @@ class ManagerPrompt(BasePrompt):
     """It implements commands that are allowed to be executed by manager.
 
       Attributes:
+        __report_cache (ReportCache): an object holding the last report, None if reports are not cached.
         __reporter_service (ReportService): an object responsible for reporting.
+        __order_service (OrderService): an object responsible for purging old orders and compacting bills.
+        __migration_runner (MigrationRunner): an object bringing DB schema up to date.
     """
 
-    _available_args_gen_report = ["console", "sheet"]
+    _available_args_gen_report = ["console", "sheet", "json", "columnar"]
+    _available_args_migrate = ["status", "apply", "check"]
+    _available_args_verify_summary = ["repair"]
+    _default_top_sellers = 10
 
     def __init__(self, user):
         BasePrompt.__init__(self, user)
-        self.__reporter_service = ReportService(self.dao_manager)
+        self.__report_cache = self.__create_report_cache()
+        self.__reporter_service = ReportService(self.dao_manager, self.shard_map, self.__report_cache)
+        self.__order_service = OrderService(self.dao_manager, self.shard_map, self.bill_archive)
+        self.__migration_runner = MigrationRunner(self.data_source)
 
     def do_generate_report(self, arg):
         """It generates reports based on sales figures to depending on passed arg.
@@ -318,14 +573,30 @@ class ManagerPrompt(BasePrompt):
             Exception: if sales figures was not exported due to something unexpected happened.
         """
         logger.info("Command generate_report was invoked with arg: {}.".format(arg))
-        if arg in self._available_args_gen_report:
+        args = arg.split()
+        if args and len(set(args)) == len(args) and all([a in self._available_args_gen_report for a in args]):
             try:
-                if arg == self._available_args_gen_report[0]:
-                    logger.info("Generating report into console.")
-                    self.__reporter_service.report(ConsoleExporter())
-                elif arg == self._available_args_gen_report[1]:
-                    logger.info("Generating report into CSV.")
-                    self.__reporter_service.report(CSVExporter())
+                exporters = []
+                for export_arg in args:
+                    if export_arg == self._available_args_gen_report[0]:
+                        logger.info("Generating report into console.")
+                        exporters.append(ConsoleExporter())
+                    elif export_arg == self._available_args_gen_report[1]:
+                        logger.info("Generating report into CSV.")
+                        exporters.append(self.__create_csv_exporter())
+                    elif export_arg == self._available_args_gen_report[2]:
+                        logger.info("Generating report into JSON Lines.")
+                        exporters.append(self.__create_json_exporter())
+                    elif export_arg == self._available_args_gen_report[3]:
+                        logger.info("Generating report into columnar file.")
+                        exporters.append(self.__create_columnar_exporter())
+                config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config,
+                                                                             report_export_section) if entry])
+                self.__reporter_service.report(exporters, threaded=config.get("threaded", "true").lower() == "true",
+                                               queue_size=int(config.get("queue_size", FanOutExporter.QUEUE_SIZE)))
+                paths = [path for exporter in exporters for path in getattr(exporter, "paths", [])]
+                if paths:
+                    print("Report was written to: " + ", ".join(paths))
             except Exception as e:
                 logger.exception(e)
                 print("Report was not generated due to unexpected things.")
@@ -341,5 +612,230 @@ class ManagerPrompt(BasePrompt):
         Args:
             args (str): it is an arg with which the command was invoked.
         """
-        print("Command generate_report can be invoked with one of the available args.")
+        print("Command generate_report can be invoked with one or several of the available args.")
         print("Available args: " + ", ".join(self._available_args_gen_report))
+        print("Sales figures are read once however many args are given.")
+
+    @staticmethod
+    def __create_report_cache():
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, report_cache_section)
+                       if entry])
+        if config.get("enabled", "false").lower() != "true":
+            return None
+        return ReportCache(background=config.get("background", "true").lower() == "true",
+                           max_stale_age=float(config.get("max_stale_age", ReportCache.MAX_STALE_AGE)))
+
+    def close(self):
+        """It waits for a running report refresh.
+        """
+        if self.__report_cache is not None:
+            self.__report_cache.close()
+        BasePrompt.close(self)
+
+    @staticmethod
+    def __create_csv_exporter():
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, csv_export_section)
+                       if entry])
+        return CSVExporter(config.get("path") or None, dialect=config.get("dialect", "excel"),
+                           encoding=config.get("encoding", "utf-8"),
+                           compress=config.get("gzip", "false").lower() == "true",
+                           max_rows=int(config.get("max_rows", 0)))
+
+    @staticmethod
+    def __create_json_exporter():
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, json_export_section)
+                       if entry])
+        return JsonLinesExporter(config.get("path") or None, compress=config.get("gzip", "false").lower() == "true")
+
+    @staticmethod
+    def __create_columnar_exporter():
+        config = dict([entry for entry in PropertyUtil().get_entries(path_to_service_config, columnar_export_section)
+                       if entry])
+        return ColumnarExporter(config.get("path", ColumnarExporter.DEFAULT_PATH))
+
+    def do_sales_stats(self, arg):
+        """It shows totals, percentiles and top sellers of sales figures.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command sales_stats was invoked with arg: {}.".format(arg))
+        if arg.strip() and not arg.strip().isdigit():
+            print("Command was invoked with incorrect arg.")
+            self.help_sales_stats(arg)
+            return
+        try:
+            statistics = self.__reporter_service.statistics()
+        except ServiceError as e:
+            logger.exception(e)
+            print("Statistics were not computed: " + str(e))
+            return
+        except Exception as e:
+            logger.exception(e)
+            print("Statistics were not computed due to unexpected things.")
+            return
+        print("Sellers: " + str(statistics.seller_number))
+        print("Total sales: " + str(statistics.total_sales))
+        print("Total value: " + str(statistics.total_value))
+        for percentile, value in sorted(statistics.percentiles.items()):
+            print("Seller value p{}: {}".format(percentile, value))
+        for record, share in statistics.top(int(arg.strip() or self._default_top_sellers)):
+            print("{} : {} : {} : {}.{:02d}%".format(record.fullname, record.sales_number, record.sales_value,
+                                                     share // 100, share % 100))
+
+    def help_sales_stats(self, args):
+        """It shows a help message for the sales_stats command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Command sales_stats shows totals, percentiles of seller values and shares of top sellers.")
+        print("Optional arg is number of top sellers, it is {} by default.".format(self._default_top_sellers))
+
+    def do_purge_orders(self, arg):
+        """It deletes orders that are older than requested number of days.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command purge_orders was invoked with arg: {}.".format(arg))
+        if not arg.strip().isdigit():
+            print("Command was invoked with incorrect arg.")
+            self.help_purge_orders(arg)
+            return
+        before = datetime.now() - timedelta(days=int(arg))
+        try:
+            purged = self.__order_service.purge_older_than(before)
+        except Exception as e:
+            logger.exception(e)
+            print("Orders were not purged due to unexpected things.")
+        else:
+            logger.info("Orders were purged successfully")
+            print("The number of purged orders: " + str(purged))
+
+    def help_purge_orders(self, args):
+        """It shows a help message for the purge_orders command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Command purge_orders deletes orders older than the number of days passed as arg.")
+
+    def do_compact_bills(self, arg):
+        """It compresses the bill archive and moves separate bill files into it.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command compact_bills was invoked.")
+        try:
+            compacted = self.__order_service.compact_bills()
+        except Exception as e:
+            logger.exception(e)
+            print("Bills were not compacted due to unexpected things.")
+        else:
+            print("The number of compacted bills: " + str(compacted))
+
+    def help_compact_bills(self, args):
+        """It shows a help message for the compact_bills command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Compress bill archive segments that are not appended to and move .txt bill files into the archive.")
+        print("No args are required.")
+
+    def do_rebuild_summary(self, arg):
+        """It recomputes the sales summary reports are generated from.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command rebuild_summary was invoked.")
+        try:
+            self.__reporter_service.rebuild_summary()
+        except Exception as e:
+            logger.exception(e)
+            print("Sales summary was not rebuilt due to unexpected things.")
+        else:
+            print("Sales summary was rebuilt.")
+
+    def help_rebuild_summary(self, args):
+        """It shows a help message for the rebuild_summary command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Recompute the sales summary from all the orders.")
+        print("No args are required.")
+
+    def do_verify_summary(self, arg):
+        """It compares the sales summary with figures recomputed from all the orders.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command verify_summary was invoked with arg: {}.".format(arg))
+        if arg and arg != self._available_args_verify_summary[0]:
+            print("Command was invoked with incorrect arg.")
+            self.help_verify_summary(arg)
+            return
+        try:
+            mismatches = self.__reporter_service.verify_summary(repair=bool(arg))
+        except Exception as e:
+            logger.exception(e)
+            print("Sales summary was not verified due to unexpected things.")
+            return
+        for summary, recomputed in mismatches:
+            print("{} : summary {} : {} : orders {} : {}".format(summary.fullname, summary.sales_number,
+                                                                 summary.sales_value, recomputed.sales_number,
+                                                                 recomputed.sales_value))
+        if not mismatches:
+            print("Sales summary matches the orders.")
+        elif arg:
+            print("Sales summary was repaired.")
+
+    def help_verify_summary(self, args):
+        """It shows a help message for the verify_summary command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Recompute sales figures from all the orders and list the sellers whose summary differs.")
+        print("Optional arg is repair, it rebuilds the summary if it differs.")
+
+    def do_migrate(self, arg):
+        """It shows pending migrations, applies them or checks DAO queries for full table scans.
+
+        Args:
+            arg (str): it is an arg with which the command was invoked.
+        """
+        logger.info("Command migrate was invoked with arg: {}.".format(arg))
+        if arg not in self._available_args_migrate:
+            print("Command was invoked with incorrect arg.")
+            self.help_migrate(arg)
+            return
+        try:
+            if arg == self._available_args_migrate[0]:
+                pending = self.__migration_runner.get_pending()
+                print("Pending migrations: " + (", ".join([repr(migration) for migration in pending]) or "none"))
+            elif arg == self._available_args_migrate[1]:
+                applied = self.__migration_runner.apply()
+                print("Applied migrations: " + (", ".join([repr(migration) for migration in applied]) or "none"))
+            elif arg == self._available_args_migrate[2]:
+                warnings = self.__migration_runner.check_queries()
+                for warning in warnings:
+                    print(warning)
+                print("The number of queries scanning whole tables: " + str(len(warnings)))
+        except Exception as e:
+            logger.exception(e)
+            print("Command migrate failed due to unexpected things.")
+
+    def help_migrate(self, args):
+        """It shows a help message for the migrate command.
+
+        Args:
+            args (str): it is an arg with which the command was invoked.
+        """
+        print("Command migrate can be invoked with one of the available args.")
+        print("Available args: " + ", ".join(self._available_args_migrate))
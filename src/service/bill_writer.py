@@ -0,0 +1,147 @@
+"""This module contains background writing of order bills off the submit path."""
+import logging
+import threading
+import time
+
+from six.moves import queue
+
+from .exception import ServiceError
+
+logger = logging.getLogger()
+
+
+class BillWriter(object):
+    """It makes bills of saved orders by worker threads, so submitting an order does not wait for the disk.
+
+    Orders wait for their bills in a bounded queue, a submit blocks for a while if the queue is full
+    and fails if it stays full. A bill that can not be made is retried a few times with a growing delay,
+    the bill is given up after that and the failure is reported by status.
+    Queued orders are kept in memory only: stop makes the bills of all of them, but the bills of orders
+    still queued when the process is killed or crashes are not made. Such orders are saved, so their bills
+    are missing from the bill archive only.
+
+    Attributes:
+        __order_service (OrderService): an object making bills.
+        __queue_size (int): max number of orders waiting for their bills.
+        __workers (int): number of worker threads.
+        __max_attempts (int): max number of attempts to make a bill.
+        __retry_delay (float): seconds to wait before the first retry, it doubles with every retry.
+        __submit_timeout (float): seconds a submit waits for a free place in the queue.
+        __queue (Queue): orders waiting for their bills.
+        __threads (list): running worker threads.
+        __lock (Lock): lock guarding counters.
+        __written (int): number of bills made since the writer was started.
+        __retried (int): number of retries since the writer was started.
+        __failed (list): ids of the orders whose bills were given up.
+        __last_error (Exception): error of the last failed attempt, None if there was no failure.
+    """
+
+    STOP = object()
+
+    def __init__(self, order_service, queue_size=1000, workers=2, max_attempts=3, retry_delay=0.5,
+                 submit_timeout=5):
+        self.__order_service = order_service
+        self.__queue_size = queue_size
+        self.__workers = workers
+        self.__max_attempts = max_attempts
+        self.__retry_delay = retry_delay
+        self.__submit_timeout = submit_timeout
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__threads = []
+        self.__lock = threading.Lock()
+        self.__written = 0
+        self.__retried = 0
+        self.__failed = []
+        self.__last_error = None
+
+    def submit(self, order):
+        """It enqueues a saved order, its bill is made by a worker later.
+
+        Args:
+            order (Order): saved order to make the bill of.
+
+        Raises:
+            ServiceError: if the queue stays full for submit timeout.
+        """
+        try:
+            self.__queue.put(order, timeout=self.__submit_timeout)
+        except queue.Full:
+            raise ServiceError("The bill of the order was not queued since the bill queue is full." + str(order))
+        logger.info("The bill of the order was queued: " + str(order.id))
+
+    def fail(self, order, error):
+        """It reports the bill of a saved order as given up, e.g. if the order was not queued.
+
+        Args:
+            order (Order): saved order whose bill was not made.
+            error (Exception): error the bill was not made due to.
+        """
+        logger.info("The bill of the order was given up: " + str(order.id))
+        with self.__lock:
+            self.__failed.append(order.id)
+            self.__last_error = error
+
+    def start(self):
+        """It starts the worker threads.
+        """
+        if not self.__threads:
+            for number in range(self.__workers):
+                thread = threading.Thread(target=self.__run, name="bill-writer-" + str(number))
+                thread.daemon = True
+                thread.start()
+                self.__threads.append(thread)
+            logger.info("Bill writer was started with workers: " + str(self.__workers))
+
+    def stop(self):
+        """It stops the worker threads after they make the bills of all the queued orders.
+        """
+        for thread in self.__threads:
+            self.__queue.put(self.STOP)
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+        logger.info("Bill writer was stopped.")
+
+    def status(self):
+        """It reports progress of the writer.
+
+        Returns:
+            dict: number of queued orders, numbers of made bills and retries since start,
+                ids of the orders whose bills were given up, whether workers are running and the last error.
+        """
+        with self.__lock:
+            return {"pending": self.__queue.qsize(), "written": self.__written, "retried": self.__retried,
+                    "failed": list(self.__failed), "running": len(self.__threads) > 0,
+                    "last_error": self.__last_error}
+
+    def __run(self):
+        while True:
+            order = self.__queue.get()
+            try:
+                if order is self.STOP:
+                    break
+                self.__write(order)
+            finally:
+                self.__queue.task_done()
+
+    def __write(self, order):
+        delay = self.__retry_delay
+        for attempt in range(1, self.__max_attempts + 1):
+            try:
+                self.__order_service.make_bill(order)
+            except Exception as e:
+                logger.exception(e)
+                with self.__lock:
+                    self.__last_error = e
+                    if attempt < self.__max_attempts:
+                        self.__retried += 1
+                if attempt < self.__max_attempts:
+                    time.sleep(delay)
+                    delay *= 2
+            else:
+                with self.__lock:
+                    self.__written += 1
+                return
+        logger.info("The bill of the order was given up: " + str(order.id))
+        with self.__lock:
+            self.__failed.append(order.id)
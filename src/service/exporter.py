@@ -1,19 +1,52 @@
-"""This module contains classes that implements interface exporter."""
+"""This module contains classes that implements interface exporter.
+
+orjson or ujson are optional dependencies of JSON Lines export, they are installed by the json extra of the package.
+"""
 
 import abc
+import csv
+import gzip
+import io
+import json
 import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
 
 import six
+from six.moves import queue
+
+from src.base.money import Money
 from src.rendering.table import Padding, ResizableTable, Alignment
+from .exception import ServiceError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 logger = logging.getLogger()
 
 
 @six.add_metaclass(abc.ABCMeta)
 class Exporter:
+    """It is interface of exporting sales figures.
+
+    Rows are given as an iterator that produces them while they are consumed.
+    Totals are given by the footer callback that can be called only after all the rows are consumed.
+    """
 
     @abc.abstractmethod
-    def export(self, data, total_sales, total_values):
+    def export(self, rows, footer):
         pass
 
 
@@ -25,14 +58,17 @@ class ConsoleExporter(Exporter):
     HEADER_THIRD_COL = "Total Values ($)"
     FOOTER_FIRST_COLUMN = "Total:"
 
-    def export(self, data, total_sales, total_values):
+    def export(self, rows, footer):
         """It exports sales figures in console in table format.
 
+        The table is sized by its widest cells, so the rows are collected before the table is printed.
+
         Args:
-            data (list): list of sales figures done by all salesman.
-            total_sales (int): numbers of sales.
-            total_values (Decimal): values of total sales.
+            rows (iterator): sales figures done by all salesman.
+            footer (callable): function returning numbers of sales and values of total sales.
         """
+        data = list(rows)
+        total_sales, total_values = footer()
         header = [self.HEADER_FIRST_COL, self.HEADER_SECOND_COL, self.HEADER_THIRD_COL]
         footer = [self.FOOTER_FIRST_COLUMN, str(total_sales), str(total_values)]
 
@@ -44,18 +80,441 @@ class ConsoleExporter(Exporter):
 
 
 class CSVExporter(Exporter):
-    """It exports sales figures in CSV.
+    """It streams sales figures to CSV files or to stdout.
+
+    Rows are written as they come through a write buffer, so no part of the report is kept in memory.
+    If max rows is set, a new file is started once a file gets max rows, every file has its own header
+    and the totals row is written to the last one.
+
+    Attributes:
+        __path (str): path of the CSV file, rows are written to stdout if it is None.
+        __dialect (str): name of CSV dialect, for example excel, excel-tab or unix.
+        __encoding (str): encoding of CSV files.
+        __compress (bool): whether CSV files are gzip compressed, .gz is appended to their names.
+        __max_rows (int): max number of sales rows in one file, 0 if rows are not split into files,
+            it is ignored if rows are written to stdout since stdout can not be split.
+        __buffer_size (int): size in bytes of the write buffer.
+        __paths (list): paths of the files written by the last export.
     """
+    HEADER = ["Seller name", "Number of sales", "Total Values ($)"]
+    FOOTER_FIRST_COLUMN = "Total:"
+    CHUNK_PATH_TEMPLATE = "{}-{:04d}{}"
+    GZIP_EXTENSION = ".gz"
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path=None, dialect="excel", encoding="utf-8", compress=False, max_rows=0,
+                 buffer_size=BUFFER_SIZE):
+        self.__path = path
+        self.__dialect = dialect
+        self.__encoding = encoding
+        self.__compress = compress
+        self.__max_rows = max_rows if path is not None else 0
+        self.__buffer_size = buffer_size
+        self.__paths = []
+        if max_rows and path is None:
+            logger.info("Max rows is ignored since CSV rows are written to stdout.")
+
+    @property
+    def paths(self):
+        """It returns paths of the files written by the last export.
+
+        Returns:
+            list: paths of CSV files, empty if rows were written to stdout.
+        """
+        return list(self.__paths)
 
-    def export(self, data, total_sales, total_values):
+    def export(self, rows, footer):
         """It exports sales figures in CSV.
 
         Args:
-            data (list): list of sales figures done by all salesman.
-            total_sales (int): numbers of sales.
-            total_values (Decimal): values of total sales.
+            rows (iterator): sales figures done by all salesman.
+            footer (callable): function returning numbers of sales and values of total sales.
+        """
+        self.__paths = []
+        chunk = 0
+        csv_file = None
+        try:
+            csv_file, writer = self.__open(chunk)
+            written = 0
+            for row in rows:
+                if self.__max_rows and written == self.__max_rows:
+                    self.__close(csv_file)
+                    chunk += 1
+                    csv_file, writer = self.__open(chunk)
+                    written = 0
+                writer.writerow(row)
+                written += 1
+            total_sales, total_values = footer()
+            writer.writerow([self.FOOTER_FIRST_COLUMN, total_sales, total_values])
+        finally:
+            if csv_file is not None:
+                self.__close(csv_file)
+        logger.info("Sales figures were written to: " + (", ".join(self.__paths) or "stdout"))
+
+    def __open(self, chunk):
+        if self.__path is None:
+            csv_file = sys.stdout
+        else:
+            path = self.__get_path(chunk)
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            if self.__compress:
+                binary_file = io.BufferedWriter(gzip.GzipFile(path, "wb"), self.__buffer_size)
+                csv_file = io.TextIOWrapper(binary_file, encoding=self.__encoding, newline="")
+            else:
+                csv_file = io.open(path, "w", encoding=self.__encoding, newline="", buffering=self.__buffer_size)
+            self.__paths.append(path)
+        writer = csv.writer(csv_file, dialect=self.__dialect)
+        writer.writerow(self.HEADER)
+        return csv_file, writer
+
+    def __close(self, csv_file):
+        if csv_file is sys.stdout:
+            csv_file.flush()
+        else:
+            csv_file.close()
+
+    def __get_path(self, chunk):
+        path = self.__path
+        if self.__max_rows:
+            stem, extension = os.path.splitext(path)
+            path = self.CHUNK_PATH_TEMPLATE.format(stem, chunk + 1, extension)
+        if self.__compress:
+            path += self.GZIP_EXTENSION
+        return path
+
+
+class JsonLinesExporter(Exporter):
+    """It streams sales figures to a JSON Lines file or to stdout.
+
+    Every row is serialized to a line as it comes, the totals line is written last.
+    Rows are serialized by orjson or ujson if one of them is installed, otherwise by json.
+
+    Attributes:
+        __path (str): path of the file, lines are written to stdout if it is None.
+        __compress (bool): whether the file is gzip compressed, .gz is appended to its name.
+        __buffer_size (int): size in bytes of the write buffer.
+        __dumps (callable): function serializing a dict to bytes of a line.
+        __paths (list): paths of the files written by the last export.
+    """
+    FIELDS = ("seller_name", "sales_number", "sales_value")
+    TOTAL_FIELDS = ("total_sales_number", "total_sales_value")
+    GZIP_EXTENSION = ".gz"
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path=None, compress=False, buffer_size=BUFFER_SIZE):
+        self.__path = path
+        self.__compress = compress
+        self.__buffer_size = buffer_size
+        self.__dumps = self.__get_dumps()
+        self.__paths = []
+
+    @property
+    def paths(self):
+        """It returns paths of the files written by the last export.
+
+        Returns:
+            list: path of JSON Lines file, empty if lines were written to stdout.
+        """
+        return list(self.__paths)
+
+    def export(self, rows, footer):
+        """It exports sales figures in JSON Lines.
+
+        Sales numbers are written as numbers and sales values as strings, so values keep their 4 fraction digits.
+
+        Args:
+            rows (iterator): sales figures done by all salesman.
+            footer (callable): function returning numbers of sales and values of total sales.
+        """
+        self.__paths = []
+        dumps = self.__dumps
+        json_file = self.__open()
+        try:
+            for fullname, sales_number, sales_value in rows:
+                json_file.write(dumps({"seller_name": fullname, "sales_number": int(sales_number),
+                                       "sales_value": sales_value}))
+            total_sales, total_values = footer()
+            json_file.write(dumps({"total_sales_number": int(total_sales), "total_sales_value": total_values}))
+        finally:
+            if json_file is self.__get_stdout():
+                json_file.flush()
+            else:
+                json_file.close()
+        logger.info("Sales figures were written to: " + (", ".join(self.__paths) or "stdout"))
+
+    def __open(self):
+        if self.__path is None:
+            return self.__get_stdout()
+        path = self.__path + (self.GZIP_EXTENSION if self.__compress else "")
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.__paths.append(path)
+        if self.__compress:
+            return io.BufferedWriter(gzip.GzipFile(path, "wb"), self.__buffer_size)
+        return io.open(path, "wb", buffering=self.__buffer_size)
+
+    @staticmethod
+    def __get_stdout():
+        return getattr(sys.stdout, "buffer", sys.stdout)
+
+    @staticmethod
+    def __get_dumps():
+        if orjson is not None:
+            return lambda record: orjson.dumps(record) + b"\n"
+        if ujson is not None:
+            return lambda record: (ujson.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        return lambda record: (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class ColumnarExporter(Exporter):
+    """It exports sales figures to a binary columnar file that can be memory mapped without parsing.
+
+    The file starts with a header holding magic, version, number of columns, number of rows and totals,
+    a descriptor of every column follows, it holds length-prefixed name, type, scale, data offset and data size.
+    Column data is aligned to 8 bytes. Integer columns are arrays of little-endian int64, sales values
+    are int64 numbers of ten-thousandths (scale 4). String columns are an array of n + 1 int64 offsets
+    followed by UTF-8 bytes of all the strings. Columns are collected into typed arrays
+    since the number of rows is known only at the end, so memory use is about 16 bytes per seller plus its name.
+    The file is written to a temporary file of the same directory that replaces the previous file once it is
+    synced to disk, so a reader never maps a partly written file.
+
+    Attributes:
+        __path (str): path of the file.
+        __paths (list): paths of the files written by the last export.
+    """
+    MAGIC = b"SALESCOL"
+    VERSION = 1
+    HEADER = struct.Struct("<8sIIqqq")
+    DESCRIPTOR = struct.Struct("<ccxxxxxxqq")
+    NAME_LENGTH = struct.Struct("<H")
+    INT64 = b"q"
+    STRING = b"s"
+    ALIGNMENT = 8
+    COLUMNS = ("seller_name", "sales_number", "sales_value")
+    DEFAULT_PATH = "./../outcome/report.col"
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.__path = path
+        self.__paths = []
+
+    @property
+    def paths(self):
+        """It returns paths of the files written by the last export.
+
+        Returns:
+            list: path of the columnar file.
+        """
+        return list(self.__paths)
+
+    def export(self, rows, footer):
+        """It exports sales figures in the columnar format.
+
+        Args:
+            rows (iterator): sales figures done by all salesman.
+            footer (callable): function returning numbers of sales and values of total sales.
+        """
+        self.__paths = []
+        name_offsets, names = array("q", [0]), bytearray()
+        sales_numbers, sales_values = array("q"), array("q")
+        for fullname, sales_number, sales_value in rows:
+            names.extend(fullname.encode("utf-8"))
+            name_offsets.append(len(names))
+            sales_numbers.append(int(sales_number))
+            sales_values.append(Money.to_units(sales_value))
+        total_sales, total_values = footer()
+        columns = [(self.STRING, 0, [self.__to_bytes(name_offsets), bytes(names)]),
+                   (self.INT64, 0, [self.__to_bytes(sales_numbers)]),
+                   (self.INT64, Money.DIGITS, [self.__to_bytes(sales_values)])]
+        directory = os.path.dirname(self.__path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(self.__path) + ".", suffix=".tmp",
+                                                 dir=directory or ".")
+        try:
+            with io.open(descriptor, "wb") as columnar_file:
+                self.__write(columnar_file, columns, len(sales_numbers), int(total_sales),
+                             Money.to_units(total_values))
+                columnar_file.flush()
+                os.fsync(columnar_file.fileno())
+            os.replace(temp_path, self.__path)
+        except Exception as e:
+            os.remove(temp_path)
+            raise e
+        self.__paths.append(self.__path)
+        logger.info("Sales figures were written to: " + self.__path)
+
+    @classmethod
+    def load(cls, path):
+        """It reads a columnar file by memory mapping it.
+
+        Args:
+            path (str): path of the columnar file.
+
+        Returns:
+            dict: list of every column by its name, sales values as Money, and totals
+                by total_sales_number and total_sales_value keys.
+
+        Raises:
+            ServiceError: if the file is not a columnar file of sales figures.
+        """
+        with io.open(path, "rb") as columnar_file:
+            data = mmap.mmap(columnar_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, column_number, row_number, total_sales, total_values = cls.HEADER.unpack_from(data, 0)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ServiceError("There was an attempt to load unknown columnar file: " + path)
+            loaded = {"total_sales_number": total_sales, "total_sales_value": Money(total_values)}
+            position = cls.HEADER.size
+            for column in range(column_number):
+                name_length, = cls.NAME_LENGTH.unpack_from(data, position)
+                position += cls.NAME_LENGTH.size
+                name = data[position:position + name_length].decode("utf-8")
+                position += name_length
+                column_type, scale, offset, size = cls.DESCRIPTOR.unpack_from(data, position)
+                position += cls.DESCRIPTOR.size
+                loaded[name] = cls.__read_column(data, column_type, ord(scale), offset, size, row_number)
+            return loaded
+        finally:
+            data.close()
+
+    def __write(self, columnar_file, columns, row_number, total_sales, total_values):
+        names = [name.encode("utf-8") for name in self.COLUMNS]
+        header_size = self.HEADER.size + sum([self.NAME_LENGTH.size + len(name) + self.DESCRIPTOR.size
+                                              for name in names])
+        offset = self.__align(header_size)
+        descriptors = []
+        for name, (column_type, scale, chunks) in zip(names, columns):
+            size = sum([len(chunk) for chunk in chunks])
+            descriptors.append(self.NAME_LENGTH.pack(len(name)) + name +
+                               self.DESCRIPTOR.pack(column_type, six.int2byte(scale), offset, size))
+            offset = self.__align(offset + size)
+        columnar_file.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(columns), row_number, total_sales,
+                                             total_values))
+        columnar_file.write(b"".join(descriptors))
+        for column_type, scale, chunks in columns:
+            columnar_file.write(b"\0" * (self.__align(columnar_file.tell()) - columnar_file.tell()))
+            for chunk in chunks:
+                columnar_file.write(chunk)
+
+    @classmethod
+    def __read_column(cls, data, column_type, scale, offset, size, row_number):
+        if column_type == cls.INT64:
+            values = cls.__from_bytes(data[offset:offset + size])
+            return [Money(value) for value in values] if scale == Money.DIGITS else list(values)
+        offsets_size = (row_number + 1) * cls.ALIGNMENT
+        offsets = cls.__from_bytes(data[offset:offset + offsets_size])
+        strings = data[offset + offsets_size:offset + size]
+        return [strings[offsets[index]:offsets[index + 1]].decode("utf-8") for index in range(row_number)]
+
+    @classmethod
+    def __align(cls, position):
+        return (position + cls.ALIGNMENT - 1) // cls.ALIGNMENT * cls.ALIGNMENT
+
+    @staticmethod
+    def __to_bytes(values):
+        if sys.byteorder == "big":
+            values = array("q", values)
+            values.byteswap()
+        return values.tobytes()
+
+    @staticmethod
+    def __from_bytes(data):
+        values = array("q")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+
+class FanOutExporter(Exporter):
+    """It exports the same sales figures with several exporters reading the rows once.
+
+    If it is threaded, every exporter runs on a thread of its own and gets the rows through a bounded queue,
+    so a slow exporter holds the rows back by queue size at most and no exporter waits for the others to finish.
+    Otherwise the rows are collected and given to the exporters one by one.
+    An exporter that fails stops getting rows, the others complete their export and the first error is raised then.
+
+    Attributes:
+        __exporters (list): bunch of Exporter object.
+        __threaded (bool): whether every exporter runs on a thread of its own.
+        __queue_size (int): max number of rows waiting for an exporter.
+    """
+    QUEUE_SIZE = 1000
+    PUT_TIMEOUT = 0.1
+    DONE = object()
+    ABORTED = object()
+
+    def __init__(self, exporters, threaded=True, queue_size=QUEUE_SIZE):
+        self.__exporters = list(exporters)
+        self.__threaded = threaded
+        self.__queue_size = queue_size
+
+    def export(self, rows, footer):
+        """It exports sales figures with every exporter.
+
+        Args:
+            rows (iterator): sales figures done by all salesman.
+            footer (callable): function returning numbers of sales and values of total sales.
 
         Raises:
-            NotImplementedError: if method is invoked. The method has not bee implemented yet.
+            AttributeError: if one of the exporters does not implement Exporter interface.
+            Exception: if one of the exporters fails.
         """
-        raise NotImplementedError()
+        exports = [exporter.export for exporter in self.__exporters]
+        if not self.__threaded:
+            data = list(rows)
+            for export in exports:
+                export(iter(data), footer)
+            return
+        channels = [queue.Queue(maxsize=self.__queue_size) for export in exports]
+        stopped = [threading.Event() for export in exports]
+        errors = [None] * len(exports)
+        threads = [threading.Thread(target=self.__consume, args=(exports[index], channels[index], footer,
+                                                                   stopped[index], errors, index),
+                                    name="exporter-" + str(index))
+                   for index in range(len(exports))]
+        for thread in threads:
+            thread.start()
+        last = self.ABORTED
+        try:
+            for row in rows:
+                for channel, channel_stopped in zip(channels, stopped):
+                    self.__put(channel, row, channel_stopped)
+            last = self.DONE
+        finally:
+            for channel, channel_stopped in zip(channels, stopped):
+                self.__put(channel, last, channel_stopped)
+            for thread in threads:
+                thread.join()
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def __consume(self, export, channel, footer, stopped, errors, index):
+        try:
+            export(self.__drain(channel), footer)
+        except Exception as e:
+            logger.exception(e)
+            errors[index] = e
+        finally:
+            stopped.set()
+
+    def __drain(self, channel):
+        while True:
+            row = channel.get()
+            if row is self.DONE:
+                return
+            if row is self.ABORTED:
+                raise ServiceError("Sales figures were not read completely.")
+            yield row
+
+    def __put(self, channel, row, stopped):
+        while not stopped.is_set():
+            try:
+                channel.put(row, timeout=self.PUT_TIMEOUT)
+                return
+            except queue.Full:
+                pass
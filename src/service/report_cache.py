@@ -0,0 +1,144 @@
+"""This module contains a cache of the last report keyed by the watermark of the data it was made of."""
+import logging
+import threading
+import time
+
+logger = logging.getLogger()
+
+
+class ReportSnapshot(object):
+    """Representation of sales records of a report together with the watermark they were read at.
+
+    Attributes:
+        __watermark (tuple): watermark of the data the records were read from.
+        __records (list): bunch of ReportRecord object.
+        __created_at (float): time the snapshot was made at.
+    """
+
+    def __init__(self, watermark, records):
+        self.__watermark = watermark
+        self.__records = records
+        self.__created_at = time.time()
+
+    @property
+    def watermark(self):
+        return self.__watermark
+
+    @property
+    def records(self):
+        return self.__records
+
+    @property
+    def created_at(self):
+        return self.__created_at
+
+
+class ReportCache(object):
+    """It keeps the last report snapshot and serves it while the watermark of the data is unchanged.
+
+    A watermark is cheap to read and changes whenever an order is saved or deleted, so a report
+    is aggregated again only if the data has changed since the snapshot was made. Once the data is stale,
+    the stale snapshot is served while a background thread makes a new one, unless the stale snapshot
+    is older than max stale age. Only one refresh runs at a time.
+
+    Attributes:
+        __background (bool): whether stale snapshots are refreshed in background.
+        __max_stale_age (float): seconds after which a stale snapshot is not served any more.
+        __lock (Lock): lock guarding the snapshot and counters.
+        __snapshot (ReportSnapshot): the last snapshot, None if no report was made yet.
+        __refresh (Thread): running background refresh, None if there is no one.
+        __hits (int): number of reports served from an up to date snapshot.
+        __stale_hits (int): number of reports served from a stale snapshot.
+        __misses (int): number of reports aggregated while the caller waited.
+        __last_error (Exception): error of the last failed background refresh, None if there was no failure.
+    """
+
+    MAX_STALE_AGE = 60
+
+    def __init__(self, background=True, max_stale_age=MAX_STALE_AGE):
+        self.__background = background
+        self.__max_stale_age = max_stale_age
+        self.__lock = threading.Lock()
+        self.__snapshot = None
+        self.__refresh = None
+        self.__hits = 0
+        self.__stale_hits = 0
+        self.__misses = 0
+        self.__last_error = None
+
+    def get(self, read_watermark, make_snapshot):
+        """It returns a snapshot of the report, it makes a new one if the data has changed.
+
+        Args:
+            read_watermark (callable): function reading current watermark of the data.
+            make_snapshot (callable): function taking a watermark and making ReportSnapshot of the data.
+
+        Returns:
+            ReportSnapshot: up to date snapshot, or a stale one while it is being refreshed in background.
+        """
+        watermark = read_watermark()
+        with self.__lock:
+            snapshot = self.__snapshot
+            if snapshot is not None and snapshot.watermark == watermark:
+                self.__hits += 1
+                return snapshot
+            if snapshot is not None and self.__background and \
+                    time.time() - snapshot.created_at < self.__max_stale_age:
+                self.__stale_hits += 1
+                self.__start_refresh(watermark, make_snapshot)
+                return snapshot
+            self.__misses += 1
+        logger.info("Report snapshot is missing or stale, making it at watermark: " + str(watermark))
+        snapshot = make_snapshot(watermark)
+        self.__put(snapshot)
+        return snapshot
+
+    def invalidate(self):
+        """It drops the snapshot, the next report is aggregated while the caller waits.
+        """
+        with self.__lock:
+            self.__snapshot = None
+
+    def status(self):
+        """It reports usage of the cache.
+
+        Returns:
+            dict: numbers of reports served from up to date and stale snapshots and made while waiting,
+                watermark of the snapshot, whether a refresh is running and the last refresh error.
+        """
+        with self.__lock:
+            return {"hits": self.__hits, "stale_hits": self.__stale_hits, "misses": self.__misses,
+                    "watermark": self.__snapshot.watermark if self.__snapshot is not None else None,
+                    "refreshing": self.__refresh is not None, "last_error": self.__last_error}
+
+    def close(self):
+        """It waits for a running background refresh to finish.
+        """
+        with self.__lock:
+            refresh = self.__refresh
+        if refresh is not None:
+            refresh.join()
+
+    def __start_refresh(self, watermark, make_snapshot):
+        if self.__refresh is None:
+            self.__refresh = threading.Thread(target=self.__run_refresh, args=(watermark, make_snapshot),
+                                              name="report-refresh")
+            self.__refresh.daemon = True
+            self.__refresh.start()
+
+    def __run_refresh(self, watermark, make_snapshot):
+        try:
+            self.__put(make_snapshot(watermark))
+            logger.info("Report snapshot was refreshed at watermark: " + str(watermark))
+        except Exception as e:
+            logger.exception(e)
+            with self.__lock:
+                self.__last_error = e
+        finally:
+            with self.__lock:
+                self.__refresh = None
+
+    def __put(self, snapshot):
+        with self.__lock:
+            if self.__snapshot is None or self.__snapshot.created_at <= snapshot.created_at:
+                self.__snapshot = snapshot
@@ -1,11 +1,17 @@
 """This module contains classes that are responsible for performing different operations over business entities."""
+import glob
 import logging
+import os
 
-from decimal import Decimal
 from datetime import datetime
 
-from src.base.entity import round_cost
+from src.base.money import Money
 from .exception import ServiceError
+from .exporter import FanOutExporter
+from .report_cache import ReportSnapshot
+from .statistics import SalesStatistics
+from src.store.archive import BillArchive
+from src.store.shard import ShardMap
 from src.utils.file import TemplateUtil, FileUtil
 
 logger = logging.getLogger()
@@ -15,44 +21,94 @@ class OrderService(object):
     """It does different operations over order object.
 
     It makes the bill of order as well as saves order details to persistent storage.
+    If orders are sharded, an order is saved to the shard of its seller.
+    Bills are appended to the bill archive under id of their order, so an order is saved before its bill is made.
 
     Attributes:
         __dao_manager (DaoManager): an object holding DAO for all business entities.
+        __shard_map (ShardMap): an object mapping a seller to the shard holding orders of the seller.
+        __bill_archive (BillArchive): an archive bills are appended to.
     """
 
     BILL_DATA_FORMAT = "%Y-%m-%d %H:%M:%S"
     BILL_TEMPLATE_PATH = "./../resource/template/bill.txt"
-    BILL_OUTCOME_PATH_TEMPLATE = "./../outcome/{}.txt"
+    BILL_ARCHIVE_PATH = "./../outcome"
+    BILL_FILE_PATTERN = "*.txt"
+    COMPACT_BATCH_SIZE = 1000
+    PURGE_BATCH_SIZE = 500
 
-    def __init__(self, dao_manager):
+    def __init__(self, dao_manager, shard_map=None, bill_archive=None):
         self.__dao_manager = dao_manager
+        self.__shard_map = shard_map or ShardMap([dao_manager])
+        self.__bill_archive = bill_archive or BillArchive(self.BILL_ARCHIVE_PATH)
 
     def make_bill(self, order):
         """It makes the bill from provided order object.
 
         Args:
-            order (Order): an object from which the bill is created.
+            order (Order): a saved object from which the bill is created.
+
+        Returns:
+            BillLocation: location of the bill in the bill archive.
 
         Raises:
-            ServiceError: if provided order does not contain items.
+            ServiceError: if provided order does not contain items or has not been saved.
         """
-        logger.info("Trying to make the order bill: {}.".format(order))
-        if order is None or len(order.items) == 0:
-            raise ServiceError("There was an attempt to save invalid order." + str(order))
+        return self.make_bills([order])[0]
+
+    def make_bills(self, orders):
+        """It makes the bills from provided order objects rendering them in one go.
+
+        Args:
+            orders (list): saved objects from which the bills are created.
+
+        Returns:
+            list: bunch of BillLocation object in the bill archive.
+
+        Raises:
+            ServiceError: if one of provided orders does not contain items or has not been saved.
+        """
+        for order in orders:
+            logger.info("Trying to make the order bill: {}.".format(order))
+            if order is None or len(order.items) == 0:
+                raise ServiceError("There was an attempt to save invalid order." + str(order))
+            if not order.id:
+                raise ServiceError("There was an attempt to make the bill of unsaved order." + str(order))
 
         order_date = datetime.now().strftime(self.BILL_DATA_FORMAT)
-        bill_location = self.BILL_OUTCOME_PATH_TEMPLATE.format(order_date)
+        template_data = []
+        for order in orders:
+            items_to_string = "\n".join([item.__str__() for item in order.items])
+            template_data.append({"date": order_date, "user": order.user.fullname, "item": items_to_string})
 
-        items_to_string = "\n".join([item.__str__() for item in order.items])
-        template_data = {"date": order_date, "user": order.user.fullname, "item": items_to_string}
+        logger.info("Starting making the order bills")
+        bills = TemplateUtil.process_many(self.BILL_TEMPLATE_PATH, template_data)
 
-        logger.info("Starting making the order bill")
-        bill = TemplateUtil.process(self.BILL_TEMPLATE_PATH, template_data)
-        logger.debug("The bill representation: \n" + bill)
+        locations = []
+        for order, bill in zip(orders, bills):
+            logger.debug("The bill representation: \n" + bill)
+            locations.append(self.__bill_archive.append(order.id, order_date, bill))
+            logger.info("The order bill was archived at: " + repr(locations[-1]))
+        logger.info("The bills were successfully created")
+        return locations
 
-        logger.info("The order bill is being written to: " + bill_location)
-        FileUtil.write(bill_location, bill)
-        logger.info("The bill was successfully created")
+    def reprint(self, order_id):
+        """It reads the bill of an order from the bill archive.
+
+        Args:
+            order_id (int): id of the order.
+
+        Returns:
+            str: content of the bill.
+
+        Raises:
+            ServiceError: if there is no bill of the order in the archive.
+        """
+        logger.info("Reprinting the bill of the order: " + str(order_id))
+        bill = self.__bill_archive.read(order_id)
+        if bill is None:
+            raise ServiceError("There is no bill of the order: " + str(order_id))
+        return bill
 
     def save(self, order):
         """It saves order in persistent storage in one transaction.
@@ -64,73 +120,323 @@ class OrderService(object):
             ServiceError: if provided order does not contain items.
             Exception: if order can not be persisted due to exception in dao layer.
         """
-        logger.info("Trying to save the order: {}.".format(order))
-        if order is None or len(order.items) == 0:
-            raise ServiceError("There was an attempt to save invalid order." + str(order))
+        self.save_batch([order])
+
+    def save_batch(self, orders, journal_name=None, journal_position=None, order_positions=None):
+        """It saves orders in persistent storage in one transaction.
+
+        If journal position is provided it is saved in the same transaction as the orders,
+        so every journaled order is saved exactly once.
+        If orders are sharded, every shard has a transaction of its own and the journal position is saved
+        in the transaction of every shard the orders are saved to as well as on the primary store.
+        The shards are committed before the primary store, so after a crash in between the orders are
+        read from the journal again. If positions right after every order in the journal are provided,
+        an order is skipped if its shard has already been flushed past it, so no order is saved twice.
+
+        Args:
+            orders (list): objects to save.
+            journal_name (str): name of the journal orders were read from.
+            journal_position (JournalPosition): position in the journal right after the orders.
+            order_positions (list): positions in the journal right after every one of the orders.
+
+        Returns:
+            list: saved orders, orders saved to their shards before are not included.
+
+        Raises:
+            ServiceError: if one of provided orders does not contain items.
+            Exception: if orders can not be persisted due to exception in dao layer.
+        """
+        for order in orders:
+            logger.info("Trying to save the order: {}.".format(order))
+            if order is None or len(order.items) == 0:
+                raise ServiceError("There was an attempt to save invalid order." + str(order))
+        shards = []
+        shard_positions = []
+        saved = []
         try:
-            logger.info("Persisting the order: {}.".format(order))
-            order_id = self.__dao_manager.order_dao.persist(order)
-            logger.info("The order was persisted with order id: " + str(order_id))
-            for item in order.items:
-                logger.info("Persisting the item: {}.".format(item))
-                item_id = self.__dao_manager.item_dao.persist(item, order_id)
-                logger.info("The item was persisted with item id: " + str(item_id))
+            for index, order in enumerate(orders):
+                shard = self.__shard_map.get_shard(order.user.fullname)
+                if shard not in shards:
+                    shards.append(shard)
+                    if order_positions is not None:
+                        shard_positions.append(shard.journal_dao.find_position(journal_name))
+                if order_positions is not None and order_positions[index] <= shard_positions[shards.index(shard)]:
+                    logger.info("The order was saved to its shard before: {}.".format(order))
+                    continue
+                self.__persist(shard, order)
+                saved.append(order)
+            if journal_position is not None:
+                if self.__dao_manager not in shards:
+                    shards.append(self.__dao_manager)
+                for shard in shards:
+                    shard.journal_dao.save_position(journal_name, journal_position)
         except Exception as e:
+            for shard in shards:
+                shard.rollback()
+            logger.info("The orders were rolled back.")
             raise e
         else:
-            self.__dao_manager.commit()
-            logger.info("The order was committed to DB.")
+            for shard in sorted(shards, key=lambda s: s is self.__dao_manager):
+                shard.commit()
+            logger.info("The number of orders committed to DB: " + str(len(saved)))
         finally:
-            self.__dao_manager.close_connection()
-            logger.info("DB connection was closed.")
+            for shard in shards:
+                shard.release_connection()
+            if self.__dao_manager not in shards:
+                self.__dao_manager.release_connection()
+            logger.info("DB connection was returned to the pool.")
+        return saved
+
+    def compact_bills(self, batch_size=COMPACT_BATCH_SIZE):
+        """It compresses segments of the bill archive that are not appended to anymore
+        and moves separate bill files of the archive folder into the archive.
+
+        A bill file is removed once the index entry of its bill is written. A bill file that has been imported
+        but not removed because of a crash is recognized by its date and content hash and is not imported again.
+        Dates and hashes of imported bills are read from the archive once per run.
+
+        Args:
+            batch_size (int): max number of bill files imported at once.
+
+        Returns:
+            int: number of compressed bills.
+        """
+        logger.info("Compacting the bill archive.")
+        compacted = self.__bill_archive.compact()
+        paths = sorted(glob.glob(os.path.join(self.__bill_archive.directory, self.BILL_FILE_PATTERN)))
+        imported = self.__bill_archive.find_imported_digests() if paths else set()
+        for start in range(0, len(paths), batch_size):
+            bills = []
+            pending = []
+            for path in paths[start:start + batch_size]:
+                date = self.__get_bill_file_date(path)
+                bill = FileUtil.read_to_string(path)
+                key = (date, self.__bill_archive.get_digest(bill))
+                if key in imported:
+                    os.remove(path)
+                else:
+                    bills.append((date, bill))
+                    pending.append((path, key))
+            locations = self.__bill_archive.import_bills(bills)
+            imported.update([(location.date, location.digest) for location in locations])
+            for path, key in pending:
+                if key in imported:
+                    os.remove(path)
+            compacted += len(bills)
+            logger.info("Bill files were moved to the archive: " + str(len(bills)))
+        logger.info("The number of compacted bills: " + str(compacted))
+        return compacted
+
+    def purge_older_than(self, before, batch_size=PURGE_BATCH_SIZE):
+        """It deletes orders created before provided time in batches committing every batch.
+
+        Committing every batch keeps lock time and undo log size bounded however many orders are purged.
+        Shards are purged in parallel.
+
+        Args:
+            before (datetime): time before which orders are deleted.
+            batch_size (int): max number of orders deleted in one transaction.
+
+        Returns:
+            int: number of deleted orders.
+
+        Raises:
+            Exception: if orders can not be deleted due to exception in dao layer.
+        """
+        logger.info("Purging orders created before: " + str(before))
+        purged = sum(self.__shard_map.map(lambda shard: self.__purge_shard(shard, before, batch_size)))
+        logger.info("The number of purged orders: " + str(purged))
+        return purged
+
+    def __get_bill_file_date(self, path):
+        date = os.path.splitext(os.path.basename(path))[0]
+        try:
+            datetime.strptime(date, self.BILL_DATA_FORMAT)
+        except ValueError:
+            date = datetime.fromtimestamp(os.path.getmtime(path)).strftime(self.BILL_DATA_FORMAT)
+        return date
+
+    @staticmethod
+    def __purge_shard(dao_manager, before, batch_size):
+        purged = 0
+        try:
+            while True:
+                order_ids = dao_manager.order_dao.find_ids_older_than(before, batch_size)
+                if not order_ids:
+                    break
+                for record in dao_manager.report_dao.get_orders_sales_records(order_ids):
+                    dao_manager.report_dao.add_sales(record.fullname, -record.sales_number, -record.sales_value)
+                purged += dao_manager.order_dao.delete_by_ids(order_ids, batch_size)
+                dao_manager.commit()
+                logger.info("Purged orders so far: " + str(purged))
+        except Exception as e:
+            dao_manager.rollback()
+            logger.info("The current batch of purged orders was rolled back.")
+            raise e
+        return purged
+
+    @staticmethod
+    def __persist(dao_manager, order):
+        logger.info("Persisting the order: {}.".format(order))
+        order.id = dao_manager.order_dao.persist(order)
+        logger.info("The order was persisted with order id: " + str(order.id))
+        logger.info("Persisting the items: {}.".format(order.items))
+        item_ids = dao_manager.item_dao.persist_many(order.items, order.id)
+        logger.info("The items were persisted with item ids: " + str(item_ids))
+        order_value = sum([item.cost for item in order.items])
+        dao_manager.report_dao.add_sales(order.user.fullname, len(order.items), order_value)
+        logger.info("Sales summary of the seller was updated.")
 
 
 class ReportService(object):
     """It does different operations for reporting needs.
 
-    It extracts sales records from a persistent store
+    It extracts sales records from a persistent store.
+    If orders are sharded, sales records are streamed from every shard in parallel.
+    If a report cache is provided, records are read once per watermark of the data and served from the cache.
 
     Attributes:
         __dao_manager (DaoManager): an object holding DAO for all business entities.
+        __shard_map (ShardMap): an object holding the shards of orders.
+        __report_cache (ReportCache): an object holding the last report snapshot, None if reports are not cached.
     """
 
-    def __init__(self, dao_manager):
+    def __init__(self, dao_manager, shard_map=None, report_cache=None):
         self.__dao_manager = dao_manager
+        self.__shard_map = shard_map or ShardMap([dao_manager])
+        self.__report_cache = report_cache
+
+    def report(self, exporters, threaded=False, queue_size=FanOutExporter.QUEUE_SIZE):
+        """It streams sales details from persistent storage to export interfaces.
 
-    def report(self, exporter):
-        """It extracts sales details from persistent storage and exports it by using export interface.
+        Rows are produced while the exporter consumes them and totals are accumulated on the fly.
+        If the report cache is disabled, records are streamed from db, so memory use does not depend
+        on the number of sellers. Otherwise the cached snapshot holds one sales record per seller in memory
+        and the report is made of it while the data is unchanged. A seller has sales records in one shard only,
+        so records of the shards are not merged. The exporter gets totals from the footer callback
+        once it has consumed all the rows. Sales records are read once however many exporters are provided.
 
         Args:
-            exporter (Exporter): interface of exporting sales figures.
+            exporters (object): interface of exporting sales figures or a list of them.
+            threaded (bool): whether every one of several exporters runs on a thread of its own.
+            queue_size (int): max number of rows waiting for a threaded exporter.
 
         Raises:
             AttributeError: if provided arg object does not implement Exporter interface.
+            Exception: if one of the exporters fails.
         """
+        if not isinstance(exporters, (list, tuple)):
+            exporters = [exporters]
+        exporter = exporters[0] if len(exporters) == 1 else FanOutExporter(exporters, threaded, queue_size)
+        totals = {"sales": 0, "value_units": 0}
+        if self.__report_cache is not None:
+            snapshot = self.__report_cache.get(self.__read_watermark, self.__make_snapshot)
+            logger.info("Reading sales records of the snapshot at watermark: " + str(snapshot.watermark))
+            records = iter(snapshot.records)
+        else:
+            logger.info("Streaming sales records from db.")
+            records = self.__stream_records()
+        rows = self.__to_rows(records, totals)
         try:
-            logger.info("Extracting sales records from db.")
-            records = self.__dao_manager.report_dao.get_sales_records()
-        except Exception as e:
+            logger.info("Exporting sales data.")
+            exporter.export(rows, lambda: (str(totals["sales"]), str(Money(totals["value_units"]))))
+        except AttributeError as e:
             raise e
         else:
-            logger.info("Sales records were extracted.")
-            logger.debug("Extracted sales records: %s", records)
+            logger.info("Exporting was completed.")
+        finally:
+            rows.close()
 
-        total_sales = 0
-        total_values = 0.0000
-        export_data = []
-        for record in records:
-            sales_number = record.sales_number
-            sales_value = record.sales_value
-            total_sales = total_sales + sales_number
-            total_values = Decimal(total_values) + Decimal(sales_value)
-            export_data.append((record.fullname, str(sales_number), str(sales_value)))
-        logger.debug("Sales data: \n %s", export_data)
-        logger.debug("Total sales: %s. Total cost: %s", total_sales, round_cost(total_values))
+    def statistics(self, percentiles=SalesStatistics.DEFAULT_PERCENTILES):
+        """It reads sales figures of every shard into columns and computes their statistics.
+
+        Args:
+            percentiles (tuple): percentiles of seller sales values to compute.
+
+        Returns:
+            SalesStatistics: totals, shares and percentiles of sales figures.
+
+        Raises:
+            ServiceError: if NumPy is not installed.
+        """
+        logger.info("Computing sales statistics.")
+        columns_list = self.__shard_map.map(lambda shard: shard.report_dao.get_sales_columns())
+        statistics = SalesStatistics(columns_list, percentiles)
+        logger.info("Sales statistics were computed for the number of sellers: " + str(statistics.seller_number))
+        return statistics
+
+    def rebuild_summary(self):
+        """It recomputes the summary of sales figures the reports are made from.
 
+        Raises:
+            Exception: if the summary can not be rebuilt due to exception in dao layer.
+        """
+        logger.info("Rebuilding sales summary.")
+        self.__shard_map.map(self.__rebuild_shard_summary)
+        if self.__report_cache is not None:
+            self.__report_cache.invalidate()
+        logger.info("Sales summary was rebuilt.")
+
+    def verify_summary(self, repair=False):
+        """It recomputes sales figures from all the orders and compares them with the summary reports are made from.
+
+        The summary is updated by the transactions saving and purging orders, so reports never aggregate
+        order history. The verification is a full recompute and is meant to run off-peak, for example nightly.
+
+        Args:
+            repair (bool): whether the summary of a shard having mismatches is rebuilt, a cached report is dropped then.
+
+        Returns:
+            list: bunch of tuples holding ReportRecord of the summary and ReportRecord recomputed from orders
+                of every seller whose figures differ.
+
+        Raises:
+            Exception: if the summary can not be verified due to exception in dao layer.
+        """
+        logger.info("Verifying sales summary.")
+        mismatches = []
+        shards_mismatches = self.__shard_map.map(lambda shard: shard.report_dao.find_summary_mismatches())
+        for shard, shard_mismatches in zip(self.__shard_map.shards, shards_mismatches):
+            if shard_mismatches and repair:
+                logger.info("Repairing sales summary of the sellers: " +
+                            ", ".join([summary.fullname for summary, recomputed in shard_mismatches]))
+                try:
+                    self.__rebuild_shard_summary(shard)
+                finally:
+                    shard.release_connection()
+                if self.__report_cache is not None:
+                    self.__report_cache.invalidate()
+            mismatches.extend(shard_mismatches)
+        logger.info("Sales summary was verified, the number of mismatches: " + str(len(mismatches)))
+        return mismatches
+
+    @staticmethod
+    def __rebuild_shard_summary(dao_manager):
         try:
-            logger.info("Exporting sales data.")
-            exporter.export(export_data, str(total_sales), str(round_cost(total_values)))
-        except AttributeError as e:
+            dao_manager.report_dao.rebuild_summary()
+        except Exception as e:
+            dao_manager.rollback()
             raise e
         else:
-            logger.info("Exporting was completed.")
+            dao_manager.commit()
+
+    def __stream_records(self):
+        return self.__shard_map.stream(lambda shard: shard.report_dao.iter_sales_records())
+
+    def __read_watermark(self):
+        return tuple(self.__shard_map.map(lambda shard: shard.report_dao.get_watermark()))
+
+    def __make_snapshot(self, watermark):
+        return ReportSnapshot(watermark, list(self.__stream_records()))
+
+    @staticmethod
+    def __to_rows(records, totals):
+        sales, value_units = 0, 0
+        for record in records:
+            sales_number = record.sales_number
+            sales_value = record.sales_value
+            sales += sales_number
+            value_units += sales_value.units
+            yield record.fullname, str(sales_number), str(sales_value)
+        totals["sales"], totals["value_units"] = sales, value_units
+        logger.debug("Total sales: %s. Total cost: %s", sales, Money(value_units))
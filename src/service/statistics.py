@@ -0,0 +1,108 @@
+"""This module contains vectorized statistics of sales figures.
+
+NumPy is an optional dependency, it is installed by the stats extra of the package.
+"""
+import logging
+
+from src.base.entity import ReportRecord
+from src.base.money import Money
+from .exception import ServiceError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger()
+
+
+class SalesStatistics(object):
+    """It computes totals, shares and percentiles of sales figures held in columns.
+
+    Values are kept as 64-bit integer ten-thousandths, so totals and percentiles are exact
+    and shares are integer basis points rounded down. Records are created only for the sellers asked for by top.
+
+    Attributes:
+        __sellers (list): fullnames of salesmen.
+        __sales_numbers (ndarray): sales numbers.
+        __sales_values (ndarray): sales values in ten-thousandths.
+        __total_sales (int): number of all the sales.
+        __total_value (Money): value of all the sales.
+        __percentiles (dict): sales value of a seller at every requested percentile.
+    """
+
+    DEFAULT_PERCENTILES = (50, 90, 99)
+    BASIS_POINTS = 10000
+
+    def __init__(self, columns_list, percentiles=DEFAULT_PERCENTILES):
+        if numpy is None:
+            raise ServiceError("NumPy is required for sales statistics, install the stats extra of the package.")
+        self.__sellers = [seller for columns in columns_list for seller in columns.sellers]
+        self.__sales_numbers = self.__concatenate([columns.sales_numbers for columns in columns_list])
+        self.__sales_values = self.__concatenate([columns.sales_values for columns in columns_list])
+        self.__total_sales = int(self.__sales_numbers.sum())
+        self.__total_value = Money(int(self.__sales_values.sum()))
+        self.__percentiles = self.__compute_percentiles(percentiles)
+
+    @property
+    def seller_number(self):
+        return len(self.__sellers)
+
+    @property
+    def total_sales(self):
+        return self.__total_sales
+
+    @property
+    def total_value(self):
+        return self.__total_value
+
+    @property
+    def percentiles(self):
+        """It returns sales values at requested percentiles by the nearest rank method.
+
+        Returns:
+            dict: Money value of every percentile, empty if there are no sellers.
+        """
+        return dict(self.__percentiles)
+
+    def get_shares(self):
+        """It computes shares of every seller in the value of all the sales.
+
+        Returns:
+            ndarray: shares in basis points in the order of sellers.
+        """
+        if self.__total_value.units == 0:
+            return numpy.zeros(len(self.__sellers), dtype=numpy.int64)
+        return self.__sales_values * self.BASIS_POINTS // self.__total_value.units
+
+    def top(self, limit):
+        """It finds the sellers with the largest sales values.
+
+        Args:
+            limit (int): max number of sellers.
+
+        Returns:
+            list: tuples of ReportRecord object and its share in basis points ordered by sales value.
+        """
+        order = numpy.argsort(-self.__sales_values, kind="stable")[:limit]
+        shares = self.get_shares()
+        return [(self.__get_record(index), int(shares[index])) for index in order]
+
+    def __get_record(self, index):
+        return ReportRecord(self.__sellers[index], int(self.__sales_numbers[index]),
+                            Money(int(self.__sales_values[index])))
+
+    def __compute_percentiles(self, percentiles):
+        values = numpy.sort(self.__sales_values)
+        if len(values) == 0:
+            return {}
+        ranks = (numpy.array(percentiles, dtype=numpy.int64) * len(values) + 99) // 100
+        indexes = numpy.clip(ranks - 1, 0, len(values) - 1)
+        return dict([(percentile, Money(int(values[index]))) for percentile, index in zip(percentiles, indexes)])
+
+    @staticmethod
+    def __concatenate(columns):
+        arrays = [numpy.frombuffer(column, dtype=numpy.int64) for column in columns if len(column) > 0]
+        if not arrays:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate(arrays)
@@ -0,0 +1,196 @@
+"""This module contains write-behind submission of orders through a durable local journal."""
+import logging
+import threading
+
+from .exception import ServiceError
+
+logger = logging.getLogger()
+
+
+class WriteBehindQueue(object):
+    """It acknowledges an order as soon as it is journaled and saves journaled orders to DB in the background.
+
+    A background worker reads orders that follow the flushed position of the journal and saves them
+    in group-committed batches. The flushed position is saved in the same transaction as a batch,
+    so after a crash the worker resumes right after the last committed batch and no order is lost.
+    If orders are sharded, every shard saves the flushed position in its own transaction, so after a crash
+    between the commits of the shards the orders already committed to a shard are skipped and not saved twice.
+
+    Saved orders are handed to the bill writer that retries failed bills, or their bills are made by the worker
+    in a few attempts if there is no bill writer. Ids of the orders whose bills were not made are reported
+    by status. Bills of a batch that was committed right before a crash are not made.
+
+    Attributes:
+        __order_service (OrderService): an object saving batches of orders and making their bills.
+        __dao_manager (DaoManager): an object providing access to flushed journal position.
+        __journal (OrderJournal): journal orders are appended to.
+        __batch_size (int): max number of orders saved in one transaction.
+        __flush_interval (float): seconds the worker waits for new orders before it flushes.
+        __bill_writer (BillWriter): an object making bills in background, None if bills are made by the worker.
+        __bill_attempts (int): max number of attempts the worker makes bills of a batch in.
+        __bill_failed (list): ids of the orders whose bills were not made or queued.
+        __last_bill_error (Exception): error of the last bill that was not made or queued, None if there was no one.
+        __position (JournalPosition): position up to which the journal was flushed.
+        __flushed (int): number of orders flushed since the queue was started.
+        __last_error (Exception): error of the last failed flush, None if it succeeded.
+        __flush_lock (Lock): lock making flushes sequential, status does not wait for it.
+        __wakeup (Event): event waking up the worker.
+        __stopped (Event): event stopping the worker.
+        __worker (Thread): background worker.
+    """
+
+    def __init__(self, order_service, dao_manager, journal, batch_size=100, flush_interval=0.5, bill_writer=None,
+                 bill_attempts=3):
+        self.__order_service = order_service
+        self.__dao_manager = dao_manager
+        self.__journal = journal
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__bill_writer = bill_writer
+        self.__bill_attempts = bill_attempts
+        self.__bill_failed = []
+        self.__last_bill_error = None
+        self.__position = None
+        self.__flushed = 0
+        self.__last_error = None
+        self.__flush_lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__stopped = threading.Event()
+        self.__worker = None
+
+    def submit(self, order):
+        """It journals an order, the order is saved to DB by the worker later.
+
+        Args:
+            order (Order): order to submit.
+
+        Raises:
+            ServiceError: if provided order does not contain items.
+        """
+        if order is None or len(order.items) == 0:
+            raise ServiceError("There was an attempt to submit invalid order." + str(order))
+        position = self.__journal.append(order)
+        logger.info("The order was journaled up to: " + repr(position))
+        if self.__worker is not None:
+            self.__wakeup.set()
+
+    def start(self):
+        """It starts the background worker.
+        """
+        if self.__worker is None:
+            self.__stopped.clear()
+            self.__worker = threading.Thread(target=self.__run, name="write-behind")
+            self.__worker.daemon = True
+            self.__worker.start()
+            logger.info("Write-behind worker was started.")
+
+    def stop(self):
+        """It stops the background worker after it flushes journaled orders.
+        """
+        if self.__worker is not None:
+            self.__stopped.set()
+            self.__wakeup.set()
+            self.__worker.join()
+            self.__worker = None
+            logger.info("Write-behind worker was stopped.")
+        self.__journal.close()
+
+    def flush(self):
+        """It saves all the journaled orders to DB.
+
+        Returns:
+            int: number of saved orders.
+
+        Raises:
+            Exception: if orders can not be saved, they stay in the journal.
+        """
+        flushed = 0
+        with self.__flush_lock:
+            while True:
+                position = self.__get_position()
+                entries, next_position = self.__journal.read_entries(position, self.__batch_size)
+                if not entries:
+                    if next_position != position:
+                        self.__save_position(next_position)
+                    break
+                orders = [order for order, order_position in entries]
+                saved = self.__order_service.save_batch(orders, self.__journal.name, next_position,
+                                                        [order_position for order, order_position in entries])
+                self.__make_bills(saved)
+                self.__position = next_position
+                self.__journal.remove_before(next_position)
+                flushed += len(orders)
+                self.__flushed += len(orders)
+                logger.info("Journaled orders were saved to DB: " + str(len(orders)))
+        return flushed
+
+    def status(self):
+        """It reports the backlog of the queue.
+
+        The counters are read without waiting for a running flush, so the backlog may include orders
+        of the batch that is being saved.
+
+        Returns:
+            dict: number of orders waiting in the journal, number of orders flushed since start,
+                whether the worker is running, the last flush error, ids of the orders whose bills
+                were not made or queued and the last bill error.
+        """
+        pending = self.__journal.count(self.__get_position())
+        return {"pending": pending, "flushed": self.__flushed, "running": self.__worker is not None,
+                "last_error": self.__last_error, "bill_failed": list(self.__bill_failed),
+                "last_bill_error": self.__last_bill_error}
+
+    def __run(self):
+        while True:
+            self.__wakeup.wait(self.__flush_interval)
+            self.__wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(e)
+                self.__last_error = e
+            else:
+                self.__last_error = None
+            if self.__stopped.is_set():
+                break
+
+    def __make_bills(self, orders):
+        if self.__bill_writer is None:
+            for attempt in range(1, self.__bill_attempts + 1):
+                try:
+                    self.__order_service.make_bills(orders)
+                    return
+                except Exception as e:
+                    if attempt == self.__bill_attempts:
+                        self.__fail_bills(orders, e)
+                    else:
+                        logger.exception(e)
+            return
+        for order in orders:
+            try:
+                self.__bill_writer.submit(order)
+            except Exception as e:
+                self.__fail_bills([order], e)
+
+    def __fail_bills(self, orders, error):
+        logger.exception(error)
+        logger.info("Bills of saved orders were not made: " + ", ".join([str(order.id) for order in orders]))
+        self.__bill_failed.extend([order.id for order in orders])
+        self.__last_bill_error = error
+
+    def __get_position(self):
+        if self.__position is None:
+            try:
+                self.__position = self.__dao_manager.journal_dao.find_position(self.__journal.name)
+            finally:
+                self.__dao_manager.release_connection()
+        return self.__position
+
+    def __save_position(self, position):
+        try:
+            self.__dao_manager.journal_dao.save_position(self.__journal.name, position)
+            self.__dao_manager.commit()
+        finally:
+            self.__dao_manager.release_connection()
+        self.__position = position
+        self.__journal.remove_before(position)
@@ -0,0 +1,361 @@
+"""This module contains an append-only archive of order bills."""
+import errno
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+import zlib
+
+from src.base.entity import BillLocation
+
+logger = logging.getLogger()
+
+
+class BillArchive(object):
+    """It appends bills to segment files and finds any of them by order id with a single seek.
+
+    Every appended bill gets a line in the index file that holds its order id, date, segment, offset and length.
+    The index line is written after the bill, so a bill torn by a crash is never indexed,
+    and an index line torn by a crash is recognized by its missing line end and truncated.
+    A new segment is started once the current one grows over segment size.
+
+    Segments that are no longer appended to can be compacted. A compacted segment is made of
+    independently compressed blocks of bills, so reading a bill decompresses one block only.
+    Compaction appends index lines of the new locations before the plain segment is removed,
+    the latest index line of an order wins when the index is loaded.
+    Index lines of imported bills hold content hash of the bills, so an imported bill is recognized
+    without reading the archive.
+
+    Attributes:
+        __directory (str): directory holding segment and index files.
+        __name (str): name of the archive, it prefixes file names.
+        __segment_size (int): size in bytes after which a new segment is started.
+        __block_size (int): max size in bytes of bills compressed in one block.
+        __sync (bool): whether every append is flushed to disk before it is acknowledged.
+        __lock (Lock): lock guarding appends and the index.
+        __locations (dict): location of the bill of every order id, it is loaded on first use.
+        __imported (list): locations of the bills imported from bill files.
+        __segment (int): number of the segment bills are appended to.
+        __file (file): file of the segment bills are appended to.
+        __index_file (file): index file locations are appended to.
+    """
+
+    SEGMENT_TEMPLATE = "{}-{:06d}.seg"
+    COMPRESSED_SEGMENT_TEMPLATE = "{}-{:06d}.zseg"
+    INDEX_TEMPLATE = "{}.idx"
+    SEGMENT_SIZE = 16 * 1024 * 1024
+    BLOCK_SIZE = 64 * 1024
+    IMPORT_SEGMENT = 0
+    INDEX_SEPARATOR = "\t"
+
+    def __init__(self, directory, name="bills", segment_size=SEGMENT_SIZE, block_size=BLOCK_SIZE, sync=False):
+        self.__directory = directory
+        self.__name = name
+        self.__segment_size = segment_size
+        self.__block_size = block_size
+        self.__sync = sync
+        self.__lock = threading.Lock()
+        self.__locations = None
+        self.__imported = []
+        self.__segment = None
+        self.__file = None
+        self.__index_file = None
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    @property
+    def name(self):
+        return self.__name
+
+    def append(self, order_id, date, bill):
+        """It appends the bill of an order to the archive.
+
+        Args:
+            order_id (int): id of the order the bill was made of.
+            date (str): date the bill was made at.
+            bill (str): content of the bill.
+
+        Returns:
+            BillLocation: location of the appended bill.
+        """
+        data = bill.encode("utf-8")
+        with self.__lock:
+            segment_file = self.__get_file()
+            offset = segment_file.tell()
+            if offset > 0 and offset + len(data) > self.__segment_size:
+                segment_file = self.__start_segment(self.__segment + 1)
+                offset = 0
+            segment_file.write(data)
+            segment_file.flush()
+            if self.__sync:
+                os.fsync(segment_file.fileno())
+            location = BillLocation(order_id, date, self.__segment, offset, len(data))
+            self.__write_index([location])
+        return location
+
+    def find(self, order_id):
+        """It finds location of the bill of an order.
+
+        Args:
+            order_id (int): id of the order.
+
+        Returns:
+            BillLocation: location of the bill, None if the bill is not archived.
+        """
+        with self.__lock:
+            return self.__get_locations().get(order_id)
+
+    def find_by_date(self, day):
+        """It finds locations of the bills made on a day.
+
+        Args:
+            day (str): day in format of %Y-%m-%d.
+
+        Returns:
+            list: bunch of BillLocation object ordered by order id.
+        """
+        with self.__lock:
+            locations = list(self.__get_locations().values()) + self.__imported
+        return sorted([location for location in locations if location.date.startswith(day)],
+                      key=lambda location: location.order_id)
+
+    def read(self, order_id):
+        """It reads the bill of an order.
+
+        If the segment of the bill has been compacted by another archive in the meantime,
+        the index is reloaded and the bill is read from its new location.
+
+        Args:
+            order_id (int): id of the order.
+
+        Returns:
+            str: content of the bill, None if the bill is not archived.
+        """
+        location = self.find(order_id)
+        if location is None:
+            return None
+        try:
+            return self.read_at(location)
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise e
+        with self.__lock:
+            self.__reload_index()
+            location = self.__locations.get(order_id)
+        return self.read_at(location) if location is not None else None
+
+    def read_at(self, location):
+        """It reads a bill at provided location.
+
+        Args:
+            location (BillLocation): location of the bill.
+
+        Returns:
+            str: content of the bill.
+        """
+        if not location.is_compressed:
+            with open(self.__get_path(location.segment), "rb") as segment_file:
+                segment_file.seek(location.offset)
+                return segment_file.read(location.length).decode("utf-8")
+        with open(self.__get_compressed_path(location.segment), "rb") as segment_file:
+            segment_file.seek(location.block_offset)
+            block = zlib.decompress(segment_file.read(location.block_length))
+        return block[location.offset:location.offset + location.length].decode("utf-8")
+
+    def compact(self):
+        """It compresses all the segments but the last one that bills are appended to.
+
+        Returns:
+            int: number of compressed bills.
+        """
+        compacted = 0
+        with self.__lock:
+            self.__reload_index()
+        for segment in self.__find_segments()[:-1]:
+            compacted += self.__compact_segment(segment)
+        return compacted
+
+    def import_bills(self, bills):
+        """It compresses bills that were not made of saved orders, for example bills of separate bill files.
+
+        Args:
+            bills (list): bunch of tuples holding date and content of a bill.
+
+        Returns:
+            list: bunch of BillLocation object of the imported bills.
+        """
+        locations = [BillLocation(0, date, self.IMPORT_SEGMENT, 0, 0, digest=self.get_digest(bill))
+                     for date, bill in bills]
+        return self.__write_blocks(self.IMPORT_SEGMENT, locations, [bill.encode("utf-8") for date, bill in bills])
+
+    def find_imported_digests(self):
+        """It finds dates and content hashes of all the imported bills.
+
+        Hash of a bill imported before hashes were indexed is computed from its content.
+
+        Returns:
+            set: bunch of tuples holding date and content hash of an imported bill.
+        """
+        with self.__lock:
+            self.__get_locations()
+            imported = list(self.__imported)
+        return set([(location.date, location.digest or self.get_digest(self.read_at(location)))
+                    for location in imported])
+
+    @staticmethod
+    def get_digest(bill):
+        """It computes content hash of a bill.
+
+        Args:
+            bill (str): content of the bill.
+
+        Returns:
+            int: first 8 bytes of SHA-1 hash of the bill content.
+        """
+        return int(hashlib.sha1(bill.encode("utf-8")).hexdigest()[:16], 16)
+
+    def close(self):
+        """It closes the segment and the index file bills are appended to.
+        """
+        with self.__lock:
+            for opened_file in (self.__file, self.__index_file):
+                if opened_file is not None:
+                    opened_file.close()
+            self.__file = None
+            self.__index_file = None
+
+    def __compact_segment(self, segment):
+        with self.__lock:
+            locations = [location for location in self.__get_locations().values()
+                         if location.segment == segment and not location.is_compressed]
+        locations.sort(key=lambda location: location.offset)
+        with open(self.__get_path(segment), "rb") as segment_file:
+            content = segment_file.read()
+        bills = [content[location.offset:location.offset + location.length] for location in locations]
+        self.__write_blocks(segment, locations, bills)
+        os.remove(self.__get_path(segment))
+        logger.info("Bill segment was compacted: {} ({} bills)".format(segment, len(locations)))
+        return len(locations)
+
+    def __write_blocks(self, segment, locations, bills):
+        if not os.path.isdir(self.__directory):
+            os.makedirs(self.__directory)
+        compressed_locations = []
+        with open(self.__get_compressed_path(segment), "ab") as segment_file:
+            block_locations, block = [], []
+            for location, bill in zip(locations, bills):
+                if block and sum([len(data) for data in block]) + len(bill) > self.__block_size:
+                    compressed_locations.extend(self.__write_block(segment_file, segment, block_locations, block))
+                    block_locations, block = [], []
+                block_locations.append(location)
+                block.append(bill)
+            if block:
+                compressed_locations.extend(self.__write_block(segment_file, segment, block_locations, block))
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        with self.__lock:
+            self.__write_index(compressed_locations, sync=True)
+        return compressed_locations
+
+    @staticmethod
+    def __write_block(segment_file, segment, locations, bills):
+        data = zlib.compress(b"".join(bills))
+        block_offset = segment_file.tell()
+        segment_file.write(data)
+        compressed_locations = []
+        offset = 0
+        for location, bill in zip(locations, bills):
+            compressed_locations.append(BillLocation(location.order_id, location.date, segment, offset, len(bill),
+                                                     block_offset, len(data), location.digest))
+            offset += len(bill)
+        return compressed_locations
+
+    def __get_file(self):
+        if self.__file is None:
+            if not os.path.isdir(self.__directory):
+                os.makedirs(self.__directory)
+            self.__get_locations()
+            segments = self.__find_segments()
+            self.__start_segment(segments[-1] if segments else 1)
+        return self.__file
+
+    def __start_segment(self, segment):
+        if self.__file is not None:
+            self.__file.close()
+        self.__segment = segment
+        self.__file = open(self.__get_path(segment), "ab")
+        return self.__file
+
+    def __write_index(self, locations, sync=False):
+        if self.__index_file is None:
+            self.__get_locations()
+            self.__index_file = open(self.__get_index_path(), "ab")
+        self.__index_file.write(b"".join([self.__to_index_line(location) for location in locations]))
+        self.__index_file.flush()
+        if self.__sync or sync:
+            os.fsync(self.__index_file.fileno())
+        for location in locations:
+            self.__add_location(location)
+
+    def __add_location(self, location):
+        if location.order_id:
+            self.__locations[location.order_id] = location
+        else:
+            self.__imported.append(location)
+
+    def __get_locations(self):
+        if self.__locations is None:
+            self.__locations = {}
+            self.__imported = []
+            if os.path.exists(self.__get_index_path()):
+                self.__load_index(truncate=True)
+        return self.__locations
+
+    def __reload_index(self):
+        self.__locations = {}
+        self.__imported = []
+        if os.path.exists(self.__get_index_path()):
+            self.__load_index(truncate=False)
+
+    def __load_index(self, truncate):
+        with open(self.__get_index_path(), "rb") as index_file:
+            content = index_file.read()
+        complete_size = content.rfind(b"\n") + 1
+        for line in content[:complete_size].decode("utf-8").splitlines():
+            values = line.split(self.INDEX_SEPARATOR)
+            self.__add_location(BillLocation(int(values[0]), values[1], *[int(value) for value in values[2:]]))
+        if truncate and complete_size < len(content):
+            logger.info("Torn bill index line was truncated in: " + self.__get_index_path())
+            with open(self.__get_index_path(), "r+b") as index_file:
+                index_file.truncate(complete_size)
+        logger.info("Bill archive index was loaded: " + str(len(self.__locations)))
+
+    def __to_index_line(self, location):
+        values = [location.order_id, location.date, location.segment, location.offset, location.length]
+        if location.is_compressed:
+            values.extend([location.block_offset, location.block_length])
+        if location.digest:
+            values.append(location.digest)
+        return (self.INDEX_SEPARATOR.join([str(value) for value in values]) + "\n").encode("utf-8")
+
+    def __find_segments(self):
+        pattern = re.compile(re.escape(self.__name) + r"-(\d+)\.seg$")
+        segments = []
+        for path in glob.glob(os.path.join(self.__directory, self.__name + "-*.seg")):
+            match = pattern.search(path)
+            if match is not None:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def __get_path(self, segment):
+        return os.path.join(self.__directory, self.SEGMENT_TEMPLATE.format(self.__name, segment))
+
+    def __get_compressed_path(self, segment):
+        return os.path.join(self.__directory, self.COMPRESSED_SEGMENT_TEMPLATE.format(self.__name, segment))
+
+    def __get_index_path(self):
+        return os.path.join(self.__directory, self.INDEX_TEMPLATE.format(self.__name))
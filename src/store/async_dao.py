@@ -0,0 +1,219 @@
+"""This module contains asyncio counterparts of DAO that allow serving many sessions in one process.
+
+Blocking DAO calls are run in a thread pool executor. Every call is a unit of work of its own:
+it checks a connection out of the connection pool in a worker thread, commits if it writes and returns the connection.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+
+class AsyncOrderDao(object):
+    """It is asyncio counterpart of OrderDao.
+
+    Attributes:
+        __manager (AsyncDaoManager): an object running units of work in the executor.
+    """
+
+    def __init__(self, manager):
+        self.__manager = manager
+
+    async def persist(self, order):
+        """It saves the order with its items and adds them to the sales summary of the seller in one transaction.
+
+        Args:
+            order (Order): order to persist.
+
+        Returns:
+            int: id of persisted order.
+        """
+        return await self.__manager.run_in_transaction(lambda dao_manager: self.__persist(dao_manager, order))
+
+    async def find_by_id(self, order_id):
+        return await self.__manager.run(lambda dao_manager: dao_manager.order_dao.find_by_id(order_id))
+
+    async def find_all(self):
+        return await self.__manager.run(lambda dao_manager: dao_manager.order_dao.find_all())
+
+    async def find_page(self, after_order_id=0, limit=100):
+        return await self.__manager.run(lambda dao_manager: dao_manager.order_dao.find_page(after_order_id, limit))
+
+    async def iter_all(self, batch_size=1000):
+        """It iterates over all the orders reading them page by page.
+
+        Every page is read in a unit of work of its own, so no connection is held between pages.
+
+        Args:
+            batch_size (int): number of orders read at once.
+
+        Yields:
+            Order: next order in store.
+        """
+        page = await self.find_page(0, batch_size)
+        while True:
+            for order in page:
+                yield order
+            if page.is_last:
+                break
+            page = await self.find_page(page.next_token, batch_size)
+
+    async def delete_by_id(self, order_id):
+        """It deletes the order and subtracts its sales from the summary in one transaction.
+        """
+        await self.delete_by_ids([order_id])
+
+    async def delete_by_ids(self, order_ids):
+        """It deletes the orders and subtracts their sales from the summary in one transaction.
+
+        Args:
+            order_ids (list): ids of orders to delete.
+
+        Returns:
+            int: number of deleted orders.
+        """
+        return await self.__manager.run_in_transaction(lambda dao_manager: self.__delete(dao_manager, order_ids))
+
+    @staticmethod
+    def __persist(dao_manager, order):
+        order_id = dao_manager.order_dao.persist(order)
+        if order.items:
+            dao_manager.item_dao.persist_many(order.items, order_id)
+            dao_manager.report_dao.add_sales(order.user.fullname, len(order.items),
+                                             sum([item.cost for item in order.items]))
+        return order_id
+
+    @staticmethod
+    def __delete(dao_manager, order_ids):
+        for record in dao_manager.report_dao.get_orders_sales_records(order_ids):
+            dao_manager.report_dao.add_sales(record.fullname, -record.sales_number, -record.sales_value)
+        return dao_manager.order_dao.delete_by_ids(order_ids)
+
+
+class AsyncItemDao(object):
+    """It is asyncio counterpart of ItemDao.
+
+    Items persisted by it are not added to the sales summary, orders are saved together with their items
+    by AsyncOrderDao.persist.
+
+    Attributes:
+        __manager (AsyncDaoManager): an object running units of work in the executor.
+    """
+
+    def __init__(self, manager):
+        self.__manager = manager
+
+    async def persist(self, item, order_id):
+        return await self.__manager.run_in_transaction(lambda dao_manager: dao_manager.item_dao.persist(item, order_id))
+
+    async def persist_many(self, items, order_id):
+        return await self.__manager.run_in_transaction(
+            lambda dao_manager: dao_manager.item_dao.persist_many(items, order_id))
+
+    async def find_by_id(self, item_id):
+        return await self.__manager.run(lambda dao_manager: dao_manager.item_dao.find_by_id(item_id))
+
+    async def find_page(self, after_item_id=0, limit=100):
+        return await self.__manager.run(lambda dao_manager: dao_manager.item_dao.find_page(after_item_id, limit))
+
+
+class AsyncReportDao(object):
+    """It is asyncio counterpart of ReportDao.
+
+    Attributes:
+        __manager (AsyncDaoManager): an object running units of work in the executor.
+    """
+
+    def __init__(self, manager):
+        self.__manager = manager
+
+    async def get_sales_records(self):
+        return await self.__manager.run(lambda dao_manager: dao_manager.report_dao.get_sales_records())
+
+
+class AsyncDaoManager(object):
+    """It holds asyncio counterparts of all the DAO and runs their calls in a thread pool executor.
+
+    The executor has as many workers as connections in the pool, pool_size of DB config section
+    unless max workers are provided, so a call waits for a free worker rather than for a free connection.
+    Several DAO calls can be done in one transaction by run_in_transaction.
+
+    Attributes:
+        __dao_manager (DaoManager): an object holding blocking DAO.
+        __executor (ThreadPoolExecutor): executor running blocking DAO calls.
+        __order_dao (AsyncOrderDao): an object providing access to order
+        __item_dao (AsyncItemDao): an object providing access to item
+        __report_dao (AsyncReportDao): an object providing access to sales figures
+    """
+
+    POOL_SIZE = 5
+
+    def __init__(self, dao_manager, max_workers=None):
+        self.__dao_manager = dao_manager
+        if max_workers is None:
+            max_workers = int(dao_manager.data_source.get_property("pool_size", self.POOL_SIZE))
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.__order_dao = AsyncOrderDao(self)
+        self.__item_dao = AsyncItemDao(self)
+        self.__report_dao = AsyncReportDao(self)
+
+    @property
+    def order_dao(self):
+        return self.__order_dao
+
+    @property
+    def item_dao(self):
+        return self.__item_dao
+
+    @property
+    def report_dao(self):
+        return self.__report_dao
+
+    async def run(self, work):
+        """It runs read only work in the executor.
+
+        Args:
+            work (callable): function taking DaoManager.
+
+        Returns:
+            object: result of the work.
+        """
+        return await self.__submit(work, False)
+
+    async def run_in_transaction(self, work):
+        """It runs work in the executor committing its changes if it succeeds.
+
+        Args:
+            work (callable): function taking DaoManager.
+
+        Returns:
+            object: result of the work.
+
+        Raises:
+            Exception: if the work fails, its changes are rolled back.
+        """
+        return await self.__submit(work, True)
+
+    def close(self):
+        """It waits for running work to complete and closes DB connection pool.
+        """
+        self.__executor.shutdown(wait=True)
+        self.__dao_manager.close_connection()
+
+    async def __submit(self, work, commit):
+        # get_running_loop appeared in Python 3.7, get_event_loop returns the running loop before that
+        loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)()
+        return await loop.run_in_executor(self.__executor, self.__run_unit_of_work, work, commit)
+
+    def __run_unit_of_work(self, work, commit):
+        try:
+            result = work(self.__dao_manager)
+            if commit:
+                self.__dao_manager.commit()
+            return result
+        except Exception as e:
+            self.__dao_manager.rollback()
+            raise e
+        finally:
+            self.__dao_manager.release_connection()
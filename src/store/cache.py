@@ -0,0 +1,215 @@
+"""This module contains caches that keep business entities read from persistent store in memory."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger()
+
+
+class LruCache(object):
+    """It keeps a bounded number of entries evicting the least recently used one when it is full.
+
+    Attributes:
+        __size (int): max number of entries.
+        __ttl (float): seconds during which an entry is valid, None if entries do not expire.
+        __entries (OrderedDict): entries with their expiry time in LRU order.
+        __lock (Lock): lock guarding the entries and counters.
+        __hits (int): number of lookups that found a valid entry.
+        __misses (int): number of lookups that did not find a valid entry.
+    """
+
+    def __init__(self, size, ttl=None):
+        self.__size = size
+        self.__ttl = ttl
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    def get(self, key):
+        """It returns a valid entry by provided key.
+
+        Args:
+            key (tuple): key of the entry.
+
+        Returns:
+            object: cached value, otherwise None.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.__entries[key]
+            self.__misses += 1
+            return None
+
+    def put(self, key, value):
+        """It puts an entry to the cache evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (tuple): key of the entry.
+            value (object): value to cache.
+        """
+        expires_at = time.time() + self.__ttl if self.__ttl else None
+        with self.__lock:
+            self.__entries[key] = (value, expires_at)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """It removes an entry by provided key.
+
+        Args:
+            key (tuple): key of the entry.
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def invalidate_namespace(self, namespace):
+        """It removes all the entries whose key starts with provided namespace.
+
+        Args:
+            namespace (str): first element of the keys to remove.
+        """
+        with self.__lock:
+            for key in [key for key in self.__entries if key[0] == namespace]:
+                del self.__entries[key]
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+class DaoCache(object):
+    """It is a read-through cache of DAO point lookups that is aware of transactions.
+
+    Writes of a unit of work are staged and reach the cache only when the unit of work is committed,
+    so rolled back changes never leak into it. While a key or its namespace has a staged write, lookups
+    of the same unit of work bypass the cache and read own changes from DB. Units of work are bound to threads.
+    Deleted entries are removed both when they are staged and on commit, so an entry that another unit of work
+    read from DB before the commit does not outlive it.
+
+    Attributes:
+        __cache (LruCache): committed entries.
+        __local (local): thread local holder of staged writes and invalidated namespaces.
+    """
+
+    __INVALIDATED = object()
+
+    def __init__(self, size, ttl=None):
+        self.__cache = LruCache(size, ttl)
+        self.__local = threading.local()
+
+    @property
+    def hits(self):
+        return self.__cache.hits
+
+    @property
+    def misses(self):
+        return self.__cache.misses
+
+    def get(self, key):
+        """It returns cached value unless current unit of work has changed it.
+
+        Args:
+            key (tuple): key of the entry.
+
+        Returns:
+            object: cached value, otherwise None.
+        """
+        if key in self.__get_staged() or key[0] in self.__get_namespaces():
+            return None
+        return self.__cache.get(key)
+
+    def populate(self, key, value):
+        """It puts a value that was read from DB to the cache.
+
+        Args:
+            key (tuple): key of the entry.
+            value (object): value read from DB.
+        """
+        if key not in self.__get_staged() and key[0] not in self.__get_namespaces():
+            self.__cache.put(key, value)
+
+    def stage_put(self, key, value):
+        """It stages a value written by current unit of work, the value is cached on commit.
+
+        Args:
+            key (tuple): key of the entry.
+            value (object): written value.
+        """
+        self.__get_staged()[key] = value
+
+    def stage_invalidate(self, key):
+        """It removes an entry deleted by current unit of work, the entry is removed once again on commit.
+
+        Args:
+            key (tuple): key of the entry.
+        """
+        self.__cache.invalidate(key)
+        self.__get_staged()[key] = self.__INVALIDATED
+
+    def invalidate_namespace(self, namespace):
+        """It removes all the entries of provided namespace.
+
+        Args:
+            namespace (str): namespace of the entries to remove.
+        """
+        self.__cache.invalidate_namespace(namespace)
+
+    def stage_invalidate_namespace(self, namespace):
+        """It removes all the entries of a namespace changed by current unit of work, they are removed again on commit.
+
+        Args:
+            namespace (str): namespace of the entries to remove.
+        """
+        self.__cache.invalidate_namespace(namespace)
+        self.__get_namespaces().add(namespace)
+
+    def commit(self):
+        """It applies the writes staged by current unit of work.
+        """
+        namespaces = self.__get_namespaces()
+        for namespace in namespaces:
+            self.__cache.invalidate_namespace(namespace)
+        namespaces.clear()
+        staged = self.__get_staged()
+        for key, value in staged.items():
+            if value is self.__INVALIDATED:
+                self.__cache.invalidate(key)
+            else:
+                self.__cache.put(key, value)
+        staged.clear()
+
+    def rollback(self):
+        """It drops the writes staged by current unit of work.
+        """
+        self.__get_staged().clear()
+        self.__get_namespaces().clear()
+
+    def __get_staged(self):
+        staged = getattr(self.__local, "staged", None)
+        if staged is None:
+            staged = self.__local.staged = {}
+        return staged
+
+    def __get_namespaces(self):
+        namespaces = getattr(self.__local, "namespaces", None)
+        if namespaces is None:
+            namespaces = self.__local.namespaces = set()
+        return namespaces
+
+    def __len__(self):
+        return len(self.__cache)
@@ -1,8 +1,7 @@
 """This module contains classes that save, delete and retrieve business entities from persistent store."""
 import logging
-from decimal import Decimal
-
-from src.base.entity import ReportRecord, Item, TYPE, Order, User
+from src.base.entity import ReportRecord, Item, TYPE, Order, User, Page, JournalPosition, SalesColumns, round_cost
+from src.base.money import Money
 from src.utils.file import PropertyUtil
 
 logger = logging.getLogger()
@@ -13,15 +12,23 @@ class OrderDao(object):
 
     Attributes:
         __data_source (DataSource): an object holding DB connection and configuration.
+        __read_source (DataSource): an object providing connections for read only calls.
     """
 
     INSERT_ORDER = "INSERT INTO orders (seller_name) VALUES (%s)"
     SELECT_BY_ID = "SELECT seller_name FROM orders WHERE order_id = (%s)"
     SELECT_ALL = "SELECT order_id, seller_name FROM orders"
+    SELECT_PAGE = "SELECT order_id, seller_name FROM orders WHERE order_id > (%s) ORDER BY order_id LIMIT %s"
     DELETE_BY_ID = "DELETE FROM orders WHERE order_id = (%s)"
+    DELETE_BY_IDS = "DELETE FROM orders WHERE order_id IN ({})"
+    COUNT_DELETED = "UPDATE store_counter SET counter_value = counter_value + %s WHERE counter_name = 'deleted_orders'"
+    SELECT_IDS_OLDER_THAN = "SELECT order_id FROM orders WHERE created_at < (%s) ORDER BY order_id LIMIT %s"
+    DEFAULT_BATCH_SIZE = 1000
+    DEFAULT_PAGE_SIZE = 100
 
-    def __init__(self, data_source):
+    def __init__(self, data_source, read_source=None):
         self.__data_source = data_source
+        self.__read_source = read_source or data_source
 
     def persist(self, order):
         """It saves order details in persistent store.
@@ -49,12 +56,12 @@ class OrderDao(object):
             Order: found order by provided order id.
         """
         logger.info("Looking for order by id: " + str(order_id))
-        with self.__data_source.get_connection().cursor() as cursor:
+        with self.__read_source.get_connection().cursor() as cursor:
             cursor.execute(self.SELECT_BY_ID, order_id)
             row = cursor.fetchone()
             if row is not None:
                 logger.info("Order was found.")
-                return Order(User().from_string(row.get("seller_name")))
+                return Order(User().from_string(row.get("seller_name")), order_id)
             else:
                 logger.info("Order was not found.")
                 return Order(User())
@@ -68,7 +75,7 @@ class OrderDao(object):
         """
         logger.info("Looking for all existing orders.")
         orders = []
-        with self.__data_source.get_connection().cursor() as cursor:
+        with self.__read_source.get_connection().cursor() as cursor:
             cursor.execute(self.SELECT_ALL)
             data = cursor.fetchall()
             for row in data:
@@ -76,28 +83,131 @@ class OrderDao(object):
         logger.info("There was found the following number of orders: " + str(len(orders)))
         return orders
 
+    def iter_all(self, batch_size=DEFAULT_BATCH_SIZE):
+        """It iterates over all the orders in store without loading them into memory at once.
+
+        Orders are read by an unbuffered server side cursor in batches of batch_size rows,
+        so the connection can not be used for other statements until iteration is over.
+
+        Args:
+            batch_size (int): number of rows fetched from DB at once.
+
+        Yields:
+            Order: next order in store.
+        """
+        logger.info("Iterating over all existing orders by batches of: " + str(batch_size))
+        orders_number = 0
+        with self.__read_source.get_streaming_cursor() as cursor:
+            cursor.execute(self.SELECT_ALL)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                for row in rows:
+                    yield Order(User().from_string(row.get("seller_name")), row.get("order_id"))
+                orders_number += len(rows)
+                rows = cursor.fetchmany(batch_size)
+        logger.info("There was iterated over the following number of orders: " + str(orders_number))
+
+    def find_page(self, after_order_id=0, limit=DEFAULT_PAGE_SIZE):
+        """It finds a page of orders whose ids follow provided order id.
+
+        The page is sought by primary key, so fetching it takes the same time however deep it is.
+
+        Args:
+            after_order_id (int): id of the last order of previous page, 0 for the first page.
+            limit (int): max number of orders in the page.
+
+        Returns:
+            Page: found orders along with the token of the next page.
+        """
+        logger.info("Looking for a page of orders after order id: " + str(after_order_id))
+        with self.__read_source.get_connection().cursor() as cursor:
+            cursor.execute(self.SELECT_PAGE, (after_order_id, limit + 1))
+            rows = cursor.fetchall()
+        orders = [Order(User().from_string(row.get("seller_name")), row.get("order_id")) for row in rows[:limit]]
+        next_token = orders[-1].id if len(rows) > limit else None
+        logger.info("There was found the following number of orders: " + str(len(orders)))
+        return Page(orders, next_token)
+
     def delete_by_id(self, order_id):
-        """It deletes order by provided order id.
+        """It deletes order by provided order id and counts it as deleted in the same transaction.
         """
         logger.info("Deleting the order that has id: " + str(order_id))
         with self.__data_source.get_connection().cursor() as cursor:
             cursor.execute(self.DELETE_BY_ID, order_id)
+            if cursor.rowcount > 0:
+                cursor.execute(self.COUNT_DELETED, cursor.rowcount)
         logger.info("The order was removed from persistent store.")
 
+    def delete_by_ids(self, order_ids, batch_size=DEFAULT_BATCH_SIZE):
+        """It deletes orders by provided order ids issuing one statement per batch of ids.
+
+        Number of deleted orders is added to the deleted orders counter in the same transaction.
+
+        Args:
+            order_ids (list): ids of orders to delete.
+            batch_size (int): max number of ids in one statement.
+
+        Returns:
+            int: number of deleted orders.
+        """
+        logger.info("Deleting the following number of orders: " + str(len(order_ids)))
+        deleted = 0
+        with self.__data_source.get_connection().cursor() as cursor:
+            for start in range(0, len(order_ids), batch_size):
+                batch = list(order_ids[start:start + batch_size])
+                cursor.execute(self.DELETE_BY_IDS.format(", ".join(["%s"] * len(batch))), batch)
+                deleted += cursor.rowcount
+            if deleted > 0:
+                cursor.execute(self.COUNT_DELETED, deleted)
+        logger.info("The following number of orders was removed from persistent store: " + str(deleted))
+        return deleted
+
+    def find_ids_older_than(self, before, limit=DEFAULT_BATCH_SIZE):
+        """It finds ids of the oldest orders that were created before provided time.
+
+        The ids are read from primary store as they are deleted in the same transaction,
+        a replica lagging behind would return ids of orders that were deleted already.
+
+        Args:
+            before (datetime): time before which the orders were created.
+            limit (int): max number of ids to return.
+
+        Returns:
+            list: ids of found orders in ascending order, otherwise empty list.
+        """
+        logger.info("Looking for ids of orders created before: " + str(before))
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.SELECT_IDS_OLDER_THAN, (before, limit))
+            order_ids = [row.get("order_id") for row in cursor.fetchall()]
+        logger.info("There was found the following number of order ids: " + str(len(order_ids)))
+        return order_ids
+
 
 class ItemDao(object):
     """It works with persistent store to save and retrieve order items.
 
+    Costs are read and written as integer number of ten-thousandths, the queries convert them to DECIMAL of the store.
+
     Attributes:
         __data_source (DataSource): an object holding DB connection and configuration.
+        __read_source (DataSource): an object providing connections for read only calls.
     """
 
-    INSERT_ITEM = "INSERT INTO order_items (item_name, item_type, cost, order_id) VALUES (%s, %s, %s, %s)"
-    SELECT_BY_ITEM_ID = "SELECT item_name, item_type, cost, order_id FROM order_items WHERE item_id = (%s)"
-    SELECT_BY_ORDER_ID = "SELECT item_id, item_name, item_type, cost FROM order_items WHERE order_id = (%s)"
-
-    def __init__(self, data_source):
+    INSERT_ITEM = "INSERT INTO order_items (item_name, item_type, cost, order_id) VALUES (%s, %s, %s * 0.0001, %s)"
+    INSERT_ITEMS = "INSERT INTO order_items (item_name, item_type, cost, order_id) VALUES "
+    ITEM_VALUES = "(%s, %s, %s * 0.0001, %s)"
+    MAX_PACKET_SIZE = 1024 * 1024
+    SELECT_BY_ITEM_ID = ("SELECT item_name, item_type, CAST(cost * 10000 AS SIGNED) as cost_units, order_id "
+                         "FROM order_items WHERE item_id = (%s)")
+    SELECT_BY_ORDER_ID = ("SELECT item_id, item_name, item_type, CAST(cost * 10000 AS SIGNED) as cost_units "
+                          "FROM order_items WHERE order_id = (%s)")
+    SELECT_PAGE = ("SELECT item_id, item_name, item_type, CAST(cost * 10000 AS SIGNED) as cost_units "
+                   "FROM order_items WHERE item_id > (%s) ORDER BY item_id LIMIT %s")
+    DEFAULT_PAGE_SIZE = 100
+
+    def __init__(self, data_source, read_source=None):
         self.__data_source = data_source
+        self.__read_source = read_source or data_source
 
     def persist(self, item, order_id):
         """It saves item in persistent store that is related to order id.
@@ -112,12 +222,40 @@ class ItemDao(object):
         logger.info("Order id of persisted item: " + str(order_id))
         logger.info("Persisting item: " + repr(item))
         with self.__data_source.get_connection().cursor() as cursor:
-            params = (item.name, item.item_type, item.cost, order_id)
+            params = (item.name, item.item_type, item.cost.units, order_id)
             cursor.execute(self.INSERT_ITEM, params)
             item_id = cursor.lastrowid
         logger.info("Persisted item id: " + str(item_id))
         return item_id
 
+    def persist_many(self, items, order_id, max_packet_size=MAX_PACKET_SIZE):
+        """It saves items related to order id in persistent store by multi-row inserts.
+
+        Items are split into chunks so that every statement stays under max_packet_size bytes.
+        Ids are derived from the first generated id of a statement since MySQL assigns
+        consecutive auto increment values to the rows of a single multi-row insert.
+
+        Args:
+            items (list): items to persist.
+            order_id (int): order id that items belong to.
+            max_packet_size (int): upper bound of a statement size in bytes.
+
+        Returns:
+            list: persisted item ids in the order of provided items.
+        """
+        logger.info("Order id of persisted items: " + str(order_id))
+        logger.info("Persisting items: " + repr(items))
+        item_ids = []
+        with self.__data_source.get_connection().cursor() as cursor:
+            for chunk in self.__split_to_chunks(items, order_id, max_packet_size):
+                statement = self.INSERT_ITEMS + ", ".join([self.ITEM_VALUES] * len(chunk))
+                params = [param for row in chunk for param in row]
+                cursor.execute(statement, params)
+                first_item_id = cursor.lastrowid
+                item_ids.extend(range(first_item_id, first_item_id + len(chunk)))
+        logger.info("Persisted item ids: " + str(item_ids))
+        return item_ids
+
     def find_by_id(self, item_id):
         """It finds item by provided item id.
 
@@ -128,48 +266,377 @@ class ItemDao(object):
             Item: found item by provided item id, otherwise empty item
         """
         logger.info("Looking for item by item id: " + str(item_id))
-        with self.__data_source.get_connection().cursor() as cursor:
+        with self.__read_source.get_connection().cursor() as cursor:
             cursor.execute(self.SELECT_BY_ITEM_ID, item_id)
             row = cursor.fetchone()
             if row is not None:
                 logger.info("The item was found.")
-                return Item(row.get("item_name"), row.get("cost"), row.get("item_type"), item_id)
+                return Item(row.get("item_name"), self.__to_cost(row), row.get("item_type"), item_id)
             else:
                 logger.info("The item was not found.")
                 return Item()
 
+    def find_page(self, after_item_id=0, limit=DEFAULT_PAGE_SIZE):
+        """It finds a page of items whose ids follow provided item id.
+
+        The page is sought by primary key, so fetching it takes the same time however deep it is.
+
+        Args:
+            after_item_id (int): id of the last item of previous page, 0 for the first page.
+            limit (int): max number of items in the page.
+
+        Returns:
+            Page: found items along with the token of the next page.
+        """
+        logger.info("Looking for a page of items after item id: " + str(after_item_id))
+        with self.__read_source.get_connection().cursor() as cursor:
+            cursor.execute(self.SELECT_PAGE, (after_item_id, limit + 1))
+            rows = cursor.fetchall()
+        items = [Item(row.get("item_name"), self.__to_cost(row), row.get("item_type"), row.get("item_id"))
+                 for row in rows[:limit]]
+        next_token = items[-1].item_id if len(rows) > limit else None
+        logger.info("There was found the following number of items: " + str(len(items)))
+        return Page(items, next_token)
+
+    def __split_to_chunks(self, items, order_id, max_packet_size):
+        chunks = []
+        chunk = []
+        chunk_size = len(self.INSERT_ITEMS)
+        for item in items:
+            row = (item.name, item.item_type, item.cost.units, order_id)
+            row_size = self.__estimate_row_size(row)
+            if chunk and chunk_size + row_size > max_packet_size:
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = len(self.INSERT_ITEMS)
+            chunk.append(row)
+            chunk_size += row_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def __estimate_row_size(self, row):
+        # every value may be quoted and have each of its characters escaped
+        return len(self.ITEM_VALUES) + sum([2 * len(str(param)) + 2 for param in row])
+
+    @staticmethod
+    def __to_cost(row):
+        cost_units = row.get("cost_units")
+        return Money(cost_units) if cost_units is not None else 0
+
+
+class CachingOrderDao(OrderDao):
+    """It is OrderDao whose lookups by id are served from a cache.
+
+    Attributes:
+        __cache (DaoCache): cache of orders keyed by order id.
+    """
+
+    NAMESPACE = "order"
+
+    def __init__(self, data_source, cache, read_source=None):
+        OrderDao.__init__(self, data_source, read_source)
+        self.__cache = cache
+
+    def persist(self, order):
+        order_id = OrderDao.persist(self, order)
+        self.__cache.stage_put((self.NAMESPACE, order_id), Order(order.user, order_id))
+        return order_id
+
+    def find_by_id(self, order_id):
+        order = self.__cache.get((self.NAMESPACE, order_id))
+        if order is not None:
+            logger.info("Order was found in cache by id: " + str(order_id))
+            return order
+        order = OrderDao.find_by_id(self, order_id)
+        if order.id:
+            self.__cache.populate((self.NAMESPACE, order_id), order)
+        return order
+
+    def delete_by_id(self, order_id):
+        OrderDao.delete_by_id(self, order_id)
+        self.__cache.stage_invalidate((self.NAMESPACE, order_id))
+        # items of the order are removed by cascade and their ids are not known here
+        self.__cache.stage_invalidate_namespace(CachingItemDao.NAMESPACE)
+
+    def delete_by_ids(self, order_ids, batch_size=OrderDao.DEFAULT_BATCH_SIZE):
+        deleted = OrderDao.delete_by_ids(self, order_ids, batch_size)
+        for order_id in order_ids:
+            self.__cache.stage_invalidate((self.NAMESPACE, order_id))
+        self.__cache.stage_invalidate_namespace(CachingItemDao.NAMESPACE)
+        return deleted
+
+
+class CachingItemDao(ItemDao):
+    """It is ItemDao whose lookups by id are served from a cache.
+
+    Attributes:
+        __cache (DaoCache): cache of items keyed by item id.
+    """
+
+    NAMESPACE = "item"
+
+    def __init__(self, data_source, cache, read_source=None):
+        ItemDao.__init__(self, data_source, read_source)
+        self.__cache = cache
+
+    def persist(self, item, order_id):
+        item_id = ItemDao.persist(self, item, order_id)
+        self.__stage(item, item_id)
+        return item_id
+
+    def persist_many(self, items, order_id, max_packet_size=ItemDao.MAX_PACKET_SIZE):
+        item_ids = ItemDao.persist_many(self, items, order_id, max_packet_size)
+        for item, item_id in zip(items, item_ids):
+            self.__stage(item, item_id)
+        return item_ids
+
+    def find_by_id(self, item_id):
+        item = self.__cache.get((self.NAMESPACE, item_id))
+        if item is not None:
+            logger.info("The item was found in cache by item id: " + str(item_id))
+            return item
+        item = ItemDao.find_by_id(self, item_id)
+        if item.item_id:
+            self.__cache.populate((self.NAMESPACE, item_id), item)
+        return item
+
+    def __stage(self, item, item_id):
+        self.__cache.stage_put((self.NAMESPACE, item_id), Item(item.name, item.cost, item.item_type, item_id))
+
 
 class ReportDao(object):
     """It works with persistent store to retrieve sales figures.
 
+    Sales figures are read from the seller_sales_summary table that is kept up to date
+    by the transactions saving and deleting orders, so reading them does not depend on order history size.
+    Sales values are read and written as integer number of ten-thousandths, the queries convert them
+    to DECIMAL of the store.
+
     Attributes:
         __data_source (DataSource): an object holding DB connection and configuration.
+        __read_source (DataSource): an object providing connections for read only calls.
     """
 
-    SELECT_RECORDS = """SELECT orders.seller_name as seller_name, COUNT(orders.seller_name) as number, 
-                        SUM(order_items.cost) as value 
-                        FROM orders INNER JOIN order_items on orders.order_id = order_items.order_id 
-                        GROUP BY orders.seller_name"""
-
-    def __init__(self, data_source):
+    SELECT_RECORDS = """SELECT seller_name, sales_number as number,
+                        CAST(sales_value * 10000 AS SIGNED) as value_units
+                        FROM seller_sales_summary WHERE sales_number > 0"""
+    SELECT_ORDERS_RECORDS = """SELECT orders.seller_name as seller_name, COUNT(orders.seller_name) as number,
+                               CAST(SUM(order_items.cost) * 10000 AS SIGNED) as value_units
+                               FROM orders INNER JOIN order_items on orders.order_id = order_items.order_id
+                               WHERE orders.order_id IN ({})
+                               GROUP BY orders.seller_name"""
+    UPSERT_SALES = """INSERT INTO seller_sales_summary (seller_name, sales_number, sales_value)
+                      VALUES (%s, %s, %s * 0.0001)
+                      ON DUPLICATE KEY UPDATE sales_number = sales_number + VALUES(sales_number),
+                      sales_value = sales_value + VALUES(sales_value)"""
+    SELECT_WATERMARK = """SELECT (SELECT MAX(order_id) FROM orders) as max_order_id, counter_value as deleted_number
+                          FROM store_counter WHERE counter_name = 'deleted_orders'"""
+    SELECT_SUMMARY_CHECK = """SELECT seller_name, SUM(summary_number) as summary_number,
+                              CAST(SUM(summary_value) * 10000 AS SIGNED) as summary_units,
+                              SUM(orders_number) as orders_number,
+                              CAST(SUM(orders_value) * 10000 AS SIGNED) as orders_units
+                              FROM (SELECT seller_name, sales_number as summary_number, sales_value as summary_value,
+                                    0 as orders_number, 0 as orders_value
+                                    FROM seller_sales_summary
+                                    UNION ALL
+                                    SELECT orders.seller_name, 0, 0, COUNT(orders.seller_name), SUM(order_items.cost)
+                                    FROM orders INNER JOIN order_items on orders.order_id = order_items.order_id
+                                    GROUP BY orders.seller_name) figures
+                              GROUP BY seller_name"""
+    DELETE_SUMMARY = "DELETE FROM seller_sales_summary"
+    REBUILD_SUMMARY = """INSERT INTO seller_sales_summary (seller_name, sales_number, sales_value)
+                         SELECT orders.seller_name, COUNT(orders.seller_name), SUM(order_items.cost)
+                         FROM orders INNER JOIN order_items on orders.order_id = order_items.order_id
+                         GROUP BY orders.seller_name"""
+
+    def __init__(self, data_source, read_source=None):
         self.__data_source = data_source
+        self.__read_source = read_source or data_source
 
     def get_sales_records(self):
-        """It executes an aggregation query and returns bunch of ReportRecord object.
+        """It reads pre-aggregated sales figures and returns bunch of ReportRecord object.
 
         Returns:
             list: bunch of ReportRecord object
         """
+        return list(self.iter_sales_records())
+
+    def iter_sales_records(self, batch_size=OrderDao.DEFAULT_BATCH_SIZE):
+        """It iterates over pre-aggregated sales figures without loading them into memory at once.
+
+        Figures are read by an unbuffered server side cursor in batches of batch_size rows,
+        so the connection can not be used for other statements until iteration is over.
+
+        Args:
+            batch_size (int): number of rows fetched from DB at once.
+
+        Yields:
+            ReportRecord: sales figures of next seller.
+        """
         logger.info("Collecting sales figures.")
+        records_number = 0
+        with self.__read_source.get_streaming_cursor() as cursor:
+            cursor.execute(self.SELECT_RECORDS)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                for row in rows:
+                    yield ReportRecord(row.get("seller_name"), row.get("number"), Money(row.get("value_units")))
+                records_number += len(rows)
+                rows = cursor.fetchmany(batch_size)
+        logger.info("The number of sales figures was collected: " + str(records_number))
+
+    def get_sales_columns(self, batch_size=OrderDao.DEFAULT_BATCH_SIZE):
+        """It reads pre-aggregated sales figures into columns without creating an object per seller.
+
+        Sales values are selected as integer ten-thousandths, so every batch is copied into the columns as it is.
+
+        Args:
+            batch_size (int): number of rows fetched from DB at once.
+
+        Returns:
+            SalesColumns: sales figures of all the sellers.
+        """
+        logger.info("Collecting sales figures into columns.")
+        columns = SalesColumns()
+        with self.__read_source.get_streaming_cursor() as cursor:
+            cursor.execute(self.SELECT_RECORDS)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                columns.extend([row.get("seller_name") for row in rows], [row.get("number") for row in rows],
+                               [row.get("value_units") for row in rows])
+                rows = cursor.fetchmany(batch_size)
+        logger.info("The number of sales figures was collected: " + str(len(columns)))
+        return columns
+
+    def get_watermark(self):
+        """It reads a watermark that changes whenever an order is saved or deleted.
+
+        Order ids only grow, so a saved order raises the max order id, which is read from the primary key
+        index without scanning it. Deleting orders bumps the deleted orders counter in the same transaction.
+        The watermark is read from primary store, so it is not behind the writes because of replication lag.
+        An order committed after an order with a greater id does not change the watermark, such an order
+        is reported once a later order is saved or deleted.
+
+        Returns:
+            tuple: max order id and number of deleted orders, max order id is 0 if there are no orders.
+        """
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.SELECT_WATERMARK)
+            row = cursor.fetchone() or {}
+        return int(row.get("max_order_id") or 0), int(row.get("deleted_number") or 0)
+
+    def get_orders_sales_records(self, order_ids):
+        """It aggregates sales figures of provided orders.
+
+        Args:
+            order_ids (list): ids of orders to aggregate.
+
+        Returns:
+            list: bunch of ReportRecord object, otherwise empty list.
+        """
+        logger.info("Collecting sales figures of the following number of orders: " + str(len(order_ids)))
+        if not order_ids:
+            return []
         records = []
         with self.__data_source.get_connection().cursor() as cursor:
-            cursor.execute(self.SELECT_RECORDS)
-            data = cursor.fetchall()
-            for row in data:
-                records.append(ReportRecord(row.get("seller_name"), row.get("number"), row.get("value")))
-        logger.info("The number of sales figures was collected.")
+            cursor.execute(self.SELECT_ORDERS_RECORDS.format(", ".join(["%s"] * len(order_ids))), list(order_ids))
+            for row in cursor.fetchall():
+                records.append(ReportRecord(row.get("seller_name"), row.get("number"),
+                                            Money(row.get("value_units") or 0)))
         return records
 
+    def add_sales(self, seller_name, sales_number, sales_value):
+        """It adds sales figures of a seller to the summary, negative figures subtract deleted sales.
+
+        Args:
+            seller_name (str): fullname of salesman.
+            sales_number (int): number of sales to add.
+            sales_value (Money): value of sales to add.
+        """
+        logger.info("Adding sales figures of {}: {}, {}".format(seller_name, sales_number, sales_value))
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.UPSERT_SALES, (seller_name, sales_number, round_cost(sales_value).units))
+
+    def find_summary_mismatches(self, batch_size=OrderDao.DEFAULT_BATCH_SIZE):
+        """It recomputes sales figures from orders and their items and compares them with the summary.
+
+        Args:
+            batch_size (int): number of rows fetched from DB at once.
+
+        Returns:
+            list: bunch of tuples holding ReportRecord of the summary and ReportRecord recomputed from orders
+                of every seller whose figures differ.
+        """
+        logger.info("Verifying summary of sales figures.")
+        mismatches = []
+        with self.__read_source.get_streaming_cursor() as cursor:
+            cursor.execute(self.SELECT_SUMMARY_CHECK)
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                for row in rows:
+                    summary = ReportRecord(row.get("seller_name"), int(row.get("summary_number") or 0),
+                                           Money(int(row.get("summary_units") or 0)))
+                    recomputed = ReportRecord(row.get("seller_name"), int(row.get("orders_number") or 0),
+                                              Money(int(row.get("orders_units") or 0)))
+                    if summary != recomputed:
+                        mismatches.append((summary, recomputed))
+                rows = cursor.fetchmany(batch_size)
+        logger.info("The number of sellers whose summary differs from orders: " + str(len(mismatches)))
+        return mismatches
+
+    def rebuild_summary(self):
+        """It recomputes the summary of sales figures from orders and their items.
+        """
+        logger.info("Rebuilding summary of sales figures.")
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.DELETE_SUMMARY)
+            cursor.execute(self.REBUILD_SUMMARY)
+        logger.info("Summary of sales figures was rebuilt.")
+
+
+class JournalDao(object):
+    """It works with persistent store to save and retrieve positions up to which journals were flushed.
+
+    Attributes:
+        __data_source (DataSource): an object holding DB connection and configuration.
+    """
+
+    SELECT_POSITION = "SELECT segment, position FROM journal_checkpoint WHERE journal_name = (%s)"
+    UPSERT_POSITION = """INSERT INTO journal_checkpoint (journal_name, segment, position) VALUES (%s, %s, %s)
+                         ON DUPLICATE KEY UPDATE segment = VALUES(segment), position = VALUES(position)"""
+
+    def __init__(self, data_source):
+        self.__data_source = data_source
+
+    def find_position(self, journal_name):
+        """It finds the position up to which a journal was flushed.
+
+        Args:
+            journal_name (str): name of the journal.
+
+        Returns:
+            JournalPosition: flushed position, the journal beginning if nothing was flushed yet.
+        """
+        logger.info("Looking for flushed position of journal: " + journal_name)
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.SELECT_POSITION, journal_name)
+            row = cursor.fetchone()
+        if row is None:
+            return JournalPosition()
+        return JournalPosition(row.get("segment"), row.get("position"))
+
+    def save_position(self, journal_name, position):
+        """It saves the position up to which a journal was flushed.
+
+        Args:
+            journal_name (str): name of the journal.
+            position (JournalPosition): flushed position.
+        """
+        logger.info("Saving flushed position of journal {}: {}".format(journal_name, repr(position)))
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.UPSERT_POSITION, (journal_name, position.segment, position.offset))
+
 
 class DaoManager(object):
     """It holds all of the DAO allowing to do operations from different DAO in one transaction.
@@ -179,13 +646,37 @@ class DaoManager(object):
         __item_dao (ItemDao): an object providing access to item
         __order_dao (OrderDao): an object providing access to order
         __report_dao (ReportDao): an object providing access to sales figures
+        __journal_dao (JournalDao): an object providing access to flushed journal positions
+        __cache (DaoCache): cache of order and item lookups, None if lookups are not cached.
+        __read_source (ReplicaSet): an object routing read only calls to replicas, None if reads go to primary.
     """
 
-    def __init__(self, data_source):
+    def __init__(self, data_source, cache=None, read_source=None):
         self.__data_source = data_source
+        self.__cache = cache
+        self.__read_source = read_source
         self.__item_dao = None
         self.__order_dao = None
         self.__report_dao = None
+        self.__journal_dao = None
+
+    @property
+    def data_source(self):
+        """It returns data source of primary store.
+
+        Returns:
+            DataSource: an object holding DB configuration and connection.
+        """
+        return self.__data_source
+
+    @property
+    def cache(self):
+        """It returns cache of order and item lookups.
+
+        Returns:
+            DaoCache: cache of lookups, None if lookups are not cached.
+        """
+        return self.__cache
 
     @property
     def item_dao(self):
@@ -195,7 +686,10 @@ class DaoManager(object):
             ItemDao: an object responsible for providing access to items in DB.
         """
         if self.__item_dao is None:
-            self.__item_dao = ItemDao(self.__data_source)
+            if self.__cache is not None:
+                self.__item_dao = CachingItemDao(self.__data_source, self.__cache, self.__read_source)
+            else:
+                self.__item_dao = ItemDao(self.__data_source, self.__read_source)
         return self.__item_dao
 
     @property
@@ -206,7 +700,10 @@ class DaoManager(object):
             OrderDao: an object responsible for providing access to orders in DB.
         """
         if self.__order_dao is None:
-            self.__order_dao = OrderDao(self.__data_source)
+            if self.__cache is not None:
+                self.__order_dao = CachingOrderDao(self.__data_source, self.__cache, self.__read_source)
+            else:
+                self.__order_dao = OrderDao(self.__data_source, self.__read_source)
         return self.__order_dao
 
     @property
@@ -217,18 +714,51 @@ class DaoManager(object):
             ReportDao: an object responsible for providing access to report records in DB.
         """
         if self.__report_dao is None:
-            self.__report_dao = ReportDao(self.__data_source)
+            self.__report_dao = ReportDao(self.__data_source, self.__read_source)
         return self.__report_dao
 
+    @property
+    def journal_dao(self):
+        """It initializes JournalDao if has not been initialized yet and returns it.
+
+        Returns:
+            JournalDao: an object responsible for providing access to flushed journal positions in DB.
+        """
+        if self.__journal_dao is None:
+            self.__journal_dao = JournalDao(self.__data_source)
+        return self.__journal_dao
+
+    def release_connection(self):
+        """It returns DB connection of current unit of work to the connection pool.
+
+        Changes that were not committed are rolled back.
+        """
+        self.__data_source.release()
+        if self.__read_source is not None:
+            self.__read_source.release()
+        if self.__cache is not None:
+            self.__cache.rollback()
+
     def close_connection(self):
-        """It closes DB connection.
+        """It closes DB connection pool.
         """
         self.__data_source.close()
+        if self.__read_source is not None:
+            self.__read_source.close()
 
     def commit(self):
         """It commits changes to DB.
         """
         self.__data_source.commit()
+        if self.__cache is not None:
+            self.__cache.commit()
+
+    def rollback(self):
+        """It rolls back changes made in current unit of work.
+        """
+        self.__data_source.rollback()
+        if self.__cache is not None:
+            self.__cache.rollback()
 
 
 menu_storage_path = "./../resource/menu.cfg"
@@ -260,7 +790,7 @@ class ItemDaoFile(object):
         logger.info("There was found the following number: " + str(len(records)))
         items = []
         for name, cost in records:
-            items.append(Item(name, Decimal(cost), item_type))
+            items.append(Item(name, cost, item_type))
         return items
 
     def find_all(self):
@@ -1,9 +1,12 @@
 """This module holds classes of configuring DB connection."""
 import logging
-
-import pymysql
+import threading
+import time
+from collections import deque
 
 from src.utils.file import PropertyUtil
+from .dialect import get_dialect, MySqlDialect
+from .exception import StoreError
 
 logger = logging.getLogger()
 
@@ -11,25 +14,180 @@ path_to_config_file = "./../config/db.cfg"
 live_section = "CONFIG_LIVE"
 
 
+class ConnectionPool(object):
+    """It keeps a bounded number of DB connections that are reused between units of work.
+
+    Idle connections are checked out in LIFO order so the most recently used ones stay warm.
+    A connection is closed instead of being reused once it has been idle for longer than idle timeout
+    or has been open for longer than max lifetime.
+
+    Attributes:
+        __connect (callable): factory creating a new DB connection.
+        __size (int): max number of connections opened by the pool.
+        __idle_timeout (float): seconds after which an idle connection is closed.
+        __max_lifetime (float): seconds after which a connection is recycled.
+        __checkout_timeout (float): seconds to wait for a free connection when the pool is exhausted.
+        __ping (bool): whether a connection is checked for liveness on checkout.
+        __idle (deque): idle connections with the time they were returned to the pool.
+        __opened (int): number of opened connections including ones being opened right now.
+        __created (dict): creation time of every opened connection.
+        __condition (Condition): lock guarding the pool state.
+        __closed (bool): whether the pool was closed.
+    """
+
+    def __init__(self, connect, size=5, idle_timeout=300, max_lifetime=3600, checkout_timeout=10, ping=True):
+        self.__connect = connect
+        self.__size = size
+        self.__idle_timeout = idle_timeout
+        self.__max_lifetime = max_lifetime
+        self.__checkout_timeout = checkout_timeout
+        self.__ping = ping
+        self.__idle = deque()
+        self.__opened = 0
+        self.__created = {}
+        self.__condition = threading.Condition()
+        self.__closed = False
+
+    @property
+    def size(self):
+        return self.__size
+
+    def checkout(self):
+        """It takes an idle connection from the pool or opens a new one if the pool is not full.
+
+        Returns:
+            Connection: live connection to DB.
+
+        Raises:
+            StoreError: if the pool is closed or no connection got free within checkout timeout.
+            Exception: if a new connection can not be opened.
+        """
+        deadline = time.time() + self.__checkout_timeout
+        while True:
+            connection = self.__take_idle_or_reserve(deadline)
+            if connection is None:
+                return self.__open()
+            if not self.__ping or self.__is_alive(connection):
+                return connection
+            logger.info("Pooled connection failed liveness check and is discarded.")
+            self.__discard(connection)
+
+    def checkin(self, connection, discard=False):
+        """It returns a connection to the pool.
+
+        Args:
+            connection (Connection): connection that was checked out from the pool.
+            discard (bool): whether the connection must be closed instead of being reused.
+        """
+        with self.__condition:
+            expired = self.__is_expired(connection, time.time())
+            if not (discard or expired or self.__closed):
+                self.__idle.append((connection, time.time()))
+                self.__condition.notify()
+                return
+        self.__discard(connection)
+
+    def close(self):
+        """It closes all the idle connections, connections in use are closed when they are checked in.
+        """
+        with self.__condition:
+            self.__closed = True
+            idle = [connection for connection, released_at in self.__idle]
+            self.__idle.clear()
+        for connection in idle:
+            self.__discard(connection)
+
+    def __take_idle_or_reserve(self, deadline):
+        with self.__condition:
+            while True:
+                if self.__closed:
+                    raise StoreError("Connection pool is closed.")
+                now = time.time()
+                while self.__idle and now - self.__idle[0][1] > self.__idle_timeout:
+                    connection, released_at = self.__idle.popleft()
+                    self.__close_locked(connection)
+                while self.__idle:
+                    connection, released_at = self.__idle.pop()
+                    if not self.__is_expired(connection, now):
+                        return connection
+                    self.__close_locked(connection)
+                if self.__opened < self.__size:
+                    self.__opened += 1
+                    return None
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise StoreError("No DB connection got free within {} seconds.".format(self.__checkout_timeout))
+                self.__condition.wait(remaining)
+
+    def __open(self):
+        try:
+            connection = self.__connect()
+        except Exception as e:
+            with self.__condition:
+                self.__opened -= 1
+                self.__condition.notify()
+            raise e
+        with self.__condition:
+            self.__created[id(connection)] = time.time()
+        logger.info("New DB connection was opened by the pool.")
+        return connection
+
+    def __discard(self, connection):
+        with self.__condition:
+            self.__close_locked(connection)
+
+    def __close_locked(self, connection):
+        if self.__created.pop(id(connection), None) is not None:
+            self.__opened -= 1
+        self.__condition.notify()
+        try:
+            connection.close()
+        except Exception as e:
+            logger.info("Closing pooled connection failed: " + str(e))
+
+    def __is_expired(self, connection, now):
+        created_at = self.__created.get(id(connection), now)
+        return now - created_at > self.__max_lifetime
+
+    @staticmethod
+    def __is_alive(connection):
+        try:
+            connection.ping(reconnect=False)
+        except Exception:
+            return False
+        else:
+            return True
+
+
 class DataSource(object):
     """It performs different operations over DB connection object.
 
-    It initializes the connection and returns it.
-    Apart from that it has responsibilities for closing connection and committing changes to DB.
+    It checks a connection out of the connection pool for the current unit of work and returns it.
+    Apart from that it has responsibilities for committing changes to DB and returning connection to the pool.
+    The checked out connection is bound to the calling thread.
+    DB backend is selected by the backend property of DB config section, mysql if it is not specified.
 
     Attributes:
-        __connection (Connection): connection to DB.
         __config_section (str): section of DB config
+        __config_path (str): path to DB config file
         __conf_property (dict): configuration data for creating DB connection
+        __dialect (object): dialect of DB backend, it is created on first use.
+        __pool (ConnectionPool): pool of DB connections, it is created on first checkout.
+        __pool_lock (Lock): lock guarding pool creation.
+        __local (local): thread local holder of the checked out connection.
     """
 
-    def __init__(self, config_section=live_section):
-        self.__connection = None
+    def __init__(self, config_section=live_section, config_path=path_to_config_file):
         self.__config_section = config_section
-        self.__conf_property = PropertyUtil().get_entries(path_to_config_file, self.__config_section)
+        self.__config_path = config_path
+        self.__conf_property = PropertyUtil().get_entries(config_path, self.__config_section)
+        self.__dialect = None
+        self.__pool = None
+        self.__pool_lock = threading.Lock()
+        self.__local = threading.local()
 
     def get_connection(self):
-        """It makes lazy initialization of DB connection and returns it.
+        """It checks a connection out of the pool if current unit of work does not hold one yet and returns it.
 
         Returns:
             Connection: initialized connection to DB.
@@ -37,30 +195,244 @@ class DataSource(object):
         Raises:
             Exception: if connect to DB can not be done mostly due to provided configuration data.
         """
-        if self.__connection is None:
-            config = {entity[0]: entity[1] for entity in self.__conf_property}
-            try:
-                self.__connection = pymysql.connect(host=config.get("host"), port=int(config.get("port")),
-                                                    user=config.get("user"), passwd=config.get("passwd"),
-                                                    database=config.get("database"), db=config.get("store"),
-                                                    cursorclass=pymysql.cursors.DictCursor)
-            except Exception as e:
-                raise e
-            else:
-                return self.__connection
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            pool = self.__get_pool()
+            connection = pool.checkout()
+            self.__local.connection = connection
+            self.__local.pool = pool
+        return connection
+
+    @property
+    def config_section(self):
+        return self.__config_section
+
+    @property
+    def config_path(self):
+        return self.__config_path
+
+    def holds_connection(self):
+        """It tells whether current unit of work holds a connection.
+
+        Returns:
+            bool: True if a connection is checked out by the calling thread.
+        """
+        return getattr(self.__local, "connection", None) is not None
+
+    def get_property(self, name, default=None):
+        """It returns a property of DB config section.
+
+        Args:
+            name (str): name of the property.
+            default (str): value returned if the property is not specified.
+
+        Returns:
+            str: value of the property.
+        """
+        return self.__get_config().get(name, default)
+
+    def get_streaming_cursor(self):
+        """It returns an unbuffered server side cursor of current unit of work connection.
+
+        Rows are read from DB as they are fetched, so the cursor has to be exhausted or closed
+        before any other statement is executed over the same connection.
+
+        Returns:
+            Cursor: unbuffered cursor returning rows as dicts.
+        """
+        return self.get_dialect().get_streaming_cursor(self.get_connection())
+
+    def get_dialect(self):
+        """It returns dialect of DB backend.
+
+        Returns:
+            object: dialect of DB backend.
+
+        Raises:
+            ValueError: if DB config section specifies unknown backend.
+        """
+        if self.__dialect is None:
+            self.__dialect = get_dialect(self.get_property("backend", MySqlDialect.NAME))
+        return self.__dialect
+
+    def release(self):
+        """It rolls back not committed changes and returns connection of current unit of work to the pool.
+        """
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            return
+        pool = self.__local.pool
+        self.__local.connection = None
+        self.__local.pool = None
+        try:
+            connection.rollback()
+        except Exception as e:
+            logger.info("Connection is discarded since it can not be rolled back: " + str(e))
+            pool.checkin(connection, discard=True)
         else:
-            return self.__connection
+            pool.checkin(connection)
 
     def close(self):
-        """It closes DB connection.
+        """It returns connection of current unit of work and closes the pool.
         """
-        self.__connection.close()
-        self.__connection = None
+        self.release()
+        with self.__pool_lock:
+            if self.__pool is not None:
+                self.__pool.close()
+                self.__pool = None
 
     def commit(self):
         """It commits changes to DB.
         """
-        if self.__connection is not None:
-            self.__connection.commit()
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            connection.commit()
         else:
             logger.error("commit was not done because connection is None")
+
+    def rollback(self):
+        """It rolls back changes made by current unit of work.
+        """
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            connection.rollback()
+        else:
+            logger.error("rollback was not done because connection is None")
+
+    def __get_pool(self):
+        with self.__pool_lock:
+            if self.__pool is None:
+                config = self.__get_config()
+                self.__pool = ConnectionPool(self.__connect,
+                                             size=int(config.get("pool_size", 5)),
+                                             idle_timeout=float(config.get("pool_idle_timeout", 300)),
+                                             max_lifetime=float(config.get("pool_max_lifetime", 3600)),
+                                             checkout_timeout=float(config.get("pool_checkout_timeout", 10)),
+                                             ping=config.get("pool_ping", "true").lower() == "true")
+            return self.__pool
+
+    def __connect(self):
+        return self.get_dialect().connect(self.__get_config())
+
+    def __get_config(self):
+        return {entity[0]: entity[1] for entity in self.__conf_property if entity}
+
+
+class ReplicaSet(object):
+    """It routes read only calls to replicas of the primary DB.
+
+    A replica is chosen in round robin order among the ones whose lag does not exceed max lag.
+    Lag of a replica is checked at most once per check interval, an unreachable replica is skipped until
+    the next check. Reads go to the primary if no replica is fit or if current unit of work holds
+    a primary connection, so it reads its own changes.
+
+    Attributes:
+        __primary (DataSource): primary DB.
+        __replicas (list): replica DB.
+        __max_lag (float): max seconds a replica can be behind the primary.
+        __check_interval (float): seconds during which checked lag is trusted.
+        __checked (dict): lag check time and result of every replica.
+        __next (int): index of the replica to try first.
+        __lock (Lock): lock guarding checks and round robin index.
+        __local (local): thread local holder of the source of current unit of work.
+    """
+
+    def __init__(self, primary, replicas, max_lag=5, check_interval=10):
+        self.__primary = primary
+        self.__replicas = replicas
+        self.__max_lag = max_lag
+        self.__check_interval = check_interval
+        self.__checked = {}
+        self.__next = 0
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    @classmethod
+    def from_config(cls, primary):
+        """It creates replica set of the sections listed in replicas property of primary DB config section.
+
+        Args:
+            primary (DataSource): primary DB.
+
+        Returns:
+            ReplicaSet: replica set, None if no replicas are configured.
+        """
+        sections = [section.strip() for section in primary.get_property("replicas", "").split(",") if section.strip()]
+        if not sections:
+            return None
+        replicas = [DataSource(section, primary.config_path) for section in sections]
+        return cls(primary, replicas, max_lag=float(primary.get_property("max_replica_lag", 5)),
+                   check_interval=float(primary.get_property("replica_check_interval", 10)))
+
+    def get_connection(self):
+        """It returns a connection of the source chosen for current unit of work.
+
+        Returns:
+            Connection: connection to a replica or to the primary.
+        """
+        return self.__get_source().get_connection()
+
+    def get_streaming_cursor(self):
+        """It returns an unbuffered cursor of the source chosen for current unit of work.
+
+        Returns:
+            Cursor: unbuffered cursor returning rows as dicts.
+        """
+        return self.__get_source().get_streaming_cursor()
+
+    def release(self):
+        """It returns a replica connection of current unit of work to its pool.
+        """
+        source = getattr(self.__local, "source", None)
+        self.__local.source = None
+        if source is not None and source is not self.__primary:
+            source.release()
+
+    def close(self):
+        """It closes connection pools of the replicas.
+        """
+        self.release()
+        for replica in self.__replicas:
+            replica.close()
+
+    def __get_source(self):
+        if self.__primary.holds_connection():
+            return self.__primary
+        source = getattr(self.__local, "source", None)
+        if source is None:
+            source = self.__choose_replica() or self.__primary
+            self.__local.source = source
+        return source
+
+    def __choose_replica(self):
+        with self.__lock:
+            start = self.__next
+            self.__next = (self.__next + 1) % len(self.__replicas)
+        for shift in range(len(self.__replicas)):
+            replica = self.__replicas[(start + shift) % len(self.__replicas)]
+            if self.__is_fit(replica):
+                return replica
+        logger.info("No replica is fit for reading, the primary is used.")
+        return None
+
+    def __is_fit(self, replica):
+        now = time.time()
+        with self.__lock:
+            checked = self.__checked.get(replica)
+        if checked is None or now - checked[0] > self.__check_interval:
+            checked = (now, self.__check_lag(replica))
+            with self.__lock:
+                self.__checked[replica] = checked
+        lag = checked[1]
+        return lag is not None and lag <= self.__max_lag
+
+    def __check_lag(self, replica):
+        try:
+            lag = replica.get_dialect().get_replica_lag(replica.get_connection())
+        except Exception as e:
+            logger.info("Replica {} is unreachable: {}".format(replica.config_section, e))
+            return None
+        finally:
+            replica.release()
+        logger.info("Replica {} lag: {}".format(replica.config_section, lag))
+        return lag
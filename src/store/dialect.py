@@ -0,0 +1,327 @@
+"""This module contains dialects that make DAO work on top of different DB backends.
+
+DAO queries are written for MySQL. A dialect opens connections of its backend and,
+if the backend speaks another SQL, wraps them so that DAO queries are translated on the fly.
+DAO queries read money as integer number of ten-thousandths by CAST(<expression> * 10000 AS SIGNED)
+and write it from ten-thousandths by %s * 0.0001. SQLite has no exact decimal type, so money is stored there
+as integer number of ten-thousandths and both conversions are dropped by the translation.
+"""
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+import pymysql
+
+logger = logging.getLogger()
+
+sqlite_schema_path = "./../resource/schema/sqlite.sql"
+
+
+class MySqlDialect(object):
+    """It opens pymysql connections, DAO queries are passed to MySQL as they are.
+    """
+
+    NAME = "mysql"
+
+    def connect(self, config):
+        """It opens a connection to MySQL.
+
+        Args:
+            config (dict): configuration data of DB config section.
+
+        Returns:
+            Connection: connection returning rows as dicts.
+        """
+        return pymysql.connect(host=config.get("host"), port=int(config.get("port")),
+                               user=config.get("user"), passwd=config.get("passwd"),
+                               database=config.get("database"), db=config.get("store"),
+                               cursorclass=pymysql.cursors.DictCursor)
+
+    def get_streaming_cursor(self, connection):
+        """It returns an unbuffered server side cursor.
+
+        Args:
+            connection (Connection): connection to create the cursor of.
+
+        Returns:
+            SSDictCursor: unbuffered cursor returning rows as dicts.
+        """
+        return connection.cursor(pymysql.cursors.SSDictCursor)
+
+    def get_replica_lag(self, connection):
+        """It reads how many seconds a replica is behind its primary.
+
+        Args:
+            connection (Connection): connection to the replica.
+
+        Returns:
+            int: lag in seconds, None if the replica is not replicating.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return row.get("Seconds_Behind_Master", row.get("Seconds_Behind_Source"))
+
+    def find_full_scans(self, cursor, query, args):
+        """It explains a query and finds the tables the query reads in full.
+
+        Args:
+            cursor (Cursor): cursor to explain the query with.
+            query (str): DAO query.
+            args (list): values bound to placeholders of the query, None if there are no placeholders.
+
+        Returns:
+            list: tuples holding name of a table read in full and number of rows MySQL estimates to read.
+        """
+        cursor.execute("EXPLAIN " + query, args)
+        return [(row.get("table"), row.get("rows")) for row in cursor.fetchall() if row.get("type") == "ALL"]
+
+
+class SqliteDialect(object):
+    """It opens connections to an embedded SQLite file and translates DAO queries to SQLite SQL.
+
+    A new file is initialized by the SQLite schema script that brings it to the latest migration version,
+    since some of the migration scripts use MySQL only DDL. Money columns of the script are integer
+    numbers of ten-thousandths, so sums and upserts of money are exact integer arithmetic.
+    Files created before that hold amounts and are converted by the SQLite migration of version 6.
+
+    Attributes:
+        __schema_path (str): path to the SQLite schema script.
+        __schema_lock (Lock): lock making schema initialization run once.
+    """
+
+    NAME = "sqlite"
+    PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL", "foreign_keys": "ON", "temp_store": "MEMORY",
+               "cache_size": "-16000", "mmap_size": "268435456", "busy_timeout": "5000"}
+    SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+    def __init__(self, schema_path=sqlite_schema_path):
+        self.__schema_path = schema_path
+        self.__schema_lock = threading.Lock()
+
+    def connect(self, config):
+        """It opens a connection to SQLite file and applies pragmas of DB config section.
+
+        Pragmas are taken from sqlite_<pragma> properties, for example sqlite_synchronous=FULL.
+        The schema script can be overridden by schema_path property.
+
+        Args:
+            config (dict): configuration data of DB config section.
+
+        Returns:
+            SqliteConnection: connection translating DAO queries.
+        """
+        path = config.get("path")
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        for pragma, default in sorted(self.PRAGMAS.items()):
+            connection.execute("PRAGMA {} = {}".format(pragma, config.get("sqlite_" + pragma, default)))
+        self.__init_schema(connection, config.get("schema_path", self.__schema_path))
+        return SqliteConnection(connection)
+
+    def get_streaming_cursor(self, connection):
+        """It returns a cursor of SQLite connection, SQLite cursors read rows as they are fetched.
+
+        Args:
+            connection (SqliteConnection): connection to create the cursor of.
+
+        Returns:
+            SqliteCursor: cursor returning rows as dicts.
+        """
+        return connection.cursor()
+
+    def get_replica_lag(self, connection):
+        """It returns lag of SQLite file that is always up to date since it is not replicated.
+
+        Args:
+            connection (SqliteConnection): connection to the file.
+
+        Returns:
+            int: zero lag.
+        """
+        return 0
+
+    def find_full_scans(self, cursor, query, args):
+        """It explains a query by EXPLAIN QUERY PLAN and finds the tables the query reads in full.
+
+        A SCAN step that does not use an index reads a whole table, SQLite does not estimate rows of it.
+
+        Args:
+            cursor (SqliteCursor): cursor to explain the query with.
+            query (str): DAO query.
+            args (list): values bound to placeholders of the query, None if there are no placeholders.
+
+        Returns:
+            list: tuples holding name of a table read in full and None as number of rows.
+        """
+        cursor.execute("EXPLAIN QUERY PLAN " + query, args)
+        scans = []
+        for row in cursor.fetchall():
+            match = self.SCAN_PATTERN.match(row.get("detail") or "")
+            if match is not None and "INDEX" not in row.get("detail").upper():
+                scans.append((match.group(1), None))
+        return scans
+
+    def __init_schema(self, connection, schema_path):
+        with self.__schema_lock:
+            found = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'orders'")
+            if found.fetchone() is None:
+                logger.info("Initializing SQLite schema from: " + schema_path)
+                with open(schema_path) as script:
+                    connection.executescript(script.read())
+
+
+_translations = {}
+_money_read_pattern = re.compile(r"CAST\((.+?) \* 10000 AS SIGNED\)")
+_money_write_pattern = re.compile(r"%s \* 0\.0001")
+_upsert_pattern = re.compile(r"\s+ON DUPLICATE KEY UPDATE\s+(.*)$", re.DOTALL)
+_values_pattern = re.compile(r"VALUES\((\w+)\)")
+
+
+def translate_to_sqlite(query):
+    """It translates a MySQL query used by DAO to SQLite.
+
+    Args:
+        query (str): MySQL query.
+
+    Returns:
+        str: SQLite query.
+    """
+    translated = _translations.get(query)
+    if translated is None:
+        translated = _money_read_pattern.sub(r"\1", query)
+        translated = _money_write_pattern.sub("%s", translated).replace("%s", "?")
+        match = _upsert_pattern.search(translated)
+        if match is not None:
+            assignments = _values_pattern.sub(r"excluded.\1", match.group(1))
+            translated = translated[:match.start()] + " ON CONFLICT DO UPDATE SET " + assignments
+        _translations[query] = translated
+    return translated
+
+
+def _to_sqlite_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+class SqliteCursor(object):
+    """It is a cursor that translates DAO queries and returns rows as dicts like pymysql DictCursor does.
+
+    Attributes:
+        __cursor (Cursor): SQLite cursor.
+        __first_row_id (int): id of the first row inserted by the last statement.
+    """
+
+    def __init__(self, cursor):
+        self.__cursor = cursor
+        self.__first_row_id = None
+
+    @property
+    def lastrowid(self):
+        """It returns id of the first row inserted by the last statement as MySQL does for multi-row inserts.
+        """
+        return self.__first_row_id
+
+    @property
+    def rowcount(self):
+        return self.__cursor.rowcount
+
+    def execute(self, query, args=None):
+        """It executes a DAO query.
+
+        Args:
+            query (str): MySQL query with %s placeholders.
+            args (object): a value, a list or a tuple of values bound to placeholders.
+
+        Returns:
+            int: number of affected rows.
+        """
+        if args is None:
+            args = ()
+        elif not isinstance(args, (list, tuple)):
+            args = (args,)
+        args = [_to_sqlite_value(arg) for arg in args]
+        translated = translate_to_sqlite(query)
+        self.__cursor.execute(translated, args)
+        if translated.lstrip().upper().startswith("INSERT") and self.__cursor.rowcount > 0:
+            self.__first_row_id = self.__cursor.lastrowid - self.__cursor.rowcount + 1
+        return self.__cursor.rowcount
+
+    def fetchone(self):
+        row = self.__cursor.fetchone()
+        return self.__to_dict(row) if row is not None else None
+
+    def fetchmany(self, size):
+        return [self.__to_dict(row) for row in self.__cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self.__to_dict(row) for row in self.__cursor.fetchall()]
+
+    def close(self):
+        self.__cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def __to_dict(row):
+        return dict(zip(row.keys(), row))
+
+
+class SqliteConnection(object):
+    """It is SQLite connection with the interface of pymysql connection that DataSource and DAO rely on.
+
+    Attributes:
+        __connection (Connection): SQLite connection.
+    """
+
+    def __init__(self, connection):
+        self.__connection = connection
+
+    def cursor(self, cursor_class=None):
+        return SqliteCursor(self.__connection.cursor())
+
+    def ping(self, reconnect=False):
+        self.__connection.execute("SELECT 1")
+
+    def commit(self):
+        self.__connection.commit()
+
+    def rollback(self):
+        self.__connection.rollback()
+
+    def close(self):
+        self.__connection.close()
+
+
+DIALECTS = {MySqlDialect.NAME: MySqlDialect, SqliteDialect.NAME: SqliteDialect}
+
+
+def get_dialect(name):
+    """It creates a dialect by its name.
+
+    Args:
+        name (str): name of the dialect, mysql or sqlite.
+
+    Returns:
+        object: the dialect.
+
+    Raises:
+        ValueError: if there is no dialect with provided name.
+    """
+    dialect = DIALECTS.get(name)
+    if dialect is None:
+        raise ValueError("Unknown DB backend: " + str(name))
+    return dialect()
@@ -0,0 +1,5 @@
+"""This module contains exceptions that are associated with the store module."""
+
+
+class StoreError(Exception):
+    """Raise for exceptions in persistent store"""
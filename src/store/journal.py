@@ -0,0 +1,216 @@
+"""This module contains a durable append-only journal of submitted orders."""
+import glob
+import json
+import logging
+import os
+import re
+import threading
+
+from src.base.entity import Order, User, Item, JournalPosition
+
+logger = logging.getLogger()
+
+
+def order_to_record(order):
+    """It converts an order to a JSON serializable record.
+
+    Args:
+        order (Order): order to convert.
+
+    Returns:
+        dict: record of the order.
+    """
+    return {"user": order.user.fullname, "position": order.user.position,
+            "items": [[item.name, str(item.cost), item.item_type] for item in order.items]}
+
+
+def record_to_order(record):
+    """It converts a record made by order_to_record back to an order.
+
+    Args:
+        record (dict): record of an order.
+
+    Returns:
+        Order: order of the record.
+    """
+    order = Order(User.from_string(record["user"], record["position"]))
+    order.add_items(*[Item(name, cost, item_type) for name, cost, item_type in record["items"]])
+    return order
+
+
+class OrderJournal(object):
+    """It appends orders to segment files and reads them back starting from a position.
+
+    Every order is a JSON line, so a line torn by a crash is recognized by its missing line end and skipped.
+    A new segment is started once the current one grows over segment size, segments that were fully
+    flushed can be removed.
+
+    Attributes:
+        __directory (str): directory holding segment files.
+        __name (str): name of the journal, it prefixes segment file names.
+        __segment_size (int): size in bytes after which a new segment is started.
+        __sync (bool): whether every append is flushed to disk before it is acknowledged.
+        __lock (Lock): lock guarding appends.
+        __segment (int): number of the segment orders are appended to.
+        __file (file): file of the segment orders are appended to.
+    """
+
+    SEGMENT_TEMPLATE = "{}-{:06d}.journal"
+    SEGMENT_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, directory, name="orders", segment_size=SEGMENT_SIZE, sync=True):
+        self.__directory = directory
+        self.__name = name
+        self.__segment_size = segment_size
+        self.__sync = sync
+        self.__lock = threading.Lock()
+        self.__segment = None
+        self.__file = None
+
+    @property
+    def name(self):
+        return self.__name
+
+    def append(self, order):
+        """It appends an order to the journal.
+
+        Args:
+            order (Order): order to append.
+
+        Returns:
+            JournalPosition: position right after the appended order.
+        """
+        line = (json.dumps(order_to_record(order)) + "\n").encode("utf-8")
+        with self.__lock:
+            journal_file = self.__get_file()
+            if journal_file.tell() > 0 and journal_file.tell() + len(line) > self.__segment_size:
+                journal_file = self.__start_segment(self.__segment + 1)
+            journal_file.write(line)
+            journal_file.flush()
+            if self.__sync:
+                os.fsync(journal_file.fileno())
+            return JournalPosition(self.__segment, journal_file.tell())
+
+    def read(self, position, limit):
+        """It reads orders appended after provided position.
+
+        Args:
+            position (JournalPosition): position to read from.
+            limit (int): max number of orders to read.
+
+        Returns:
+            tuple: list of read orders and position right after the last of them.
+        """
+        entries, next_position = self.read_entries(position, limit)
+        return [order for order, order_position in entries], next_position
+
+    def read_entries(self, position, limit):
+        """It reads orders appended after provided position together with the position right after every order.
+
+        Args:
+            position (JournalPosition): position to read from.
+            limit (int): max number of orders to read.
+
+        Returns:
+            tuple: list of read orders paired with positions right after them and position after the last of them.
+        """
+        entries = []
+        segment, offset = position.segment, position.offset
+        while len(entries) < limit:
+            path = self.__get_path(segment)
+            if not os.path.exists(path):
+                break
+            with open(path, "rb") as journal_file:
+                journal_file.seek(offset)
+                for line in iter(journal_file.readline, b""):
+                    if not line.endswith(b"\n"):
+                        break
+                    order = record_to_order(json.loads(line.decode("utf-8")))
+                    offset += len(line)
+                    entries.append((order, JournalPosition(segment, offset)))
+                    if len(entries) == limit:
+                        break
+            if len(entries) == limit or not os.path.exists(self.__get_path(segment + 1)):
+                break
+            segment, offset = segment + 1, 0
+        return entries, JournalPosition(segment, offset)
+
+    def count(self, position):
+        """It counts orders appended after provided position.
+
+        It does not lock the journal, segments removed while they are counted are not counted.
+
+        Args:
+            position (JournalPosition): position to count from.
+
+        Returns:
+            int: number of orders.
+        """
+        number = 0
+        segment, offset = position.segment, position.offset
+        while os.path.exists(self.__get_path(segment)):
+            try:
+                with open(self.__get_path(segment), "rb") as journal_file:
+                    journal_file.seek(offset)
+                    number += sum([1 for line in journal_file if line.endswith(b"\n")])
+            except (IOError, OSError):
+                # the segment was removed after a flush and so were the segments counted before it
+                number = 0
+            segment, offset = segment + 1, 0
+        return number
+
+    def remove_before(self, position):
+        """It removes segments preceding the segment of provided position.
+
+        Args:
+            position (JournalPosition): position all the orders before which were flushed.
+        """
+        for segment in self.__find_segments():
+            if segment < position.segment:
+                os.remove(self.__get_path(segment))
+                logger.info("Journal segment was removed: " + str(segment))
+
+    def close(self):
+        """It closes the segment orders are appended to.
+        """
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def __get_file(self):
+        if self.__file is None:
+            if not os.path.isdir(self.__directory):
+                os.makedirs(self.__directory)
+            segments = self.__find_segments()
+            self.__start_segment(segments[-1] if segments else 1)
+            self.__truncate_torn_line()
+        return self.__file
+
+    def __start_segment(self, segment):
+        if self.__file is not None:
+            self.__file.close()
+        self.__segment = segment
+        self.__file = open(self.__get_path(segment), "ab")
+        return self.__file
+
+    def __truncate_torn_line(self):
+        with open(self.__get_path(self.__segment), "rb") as journal_file:
+            content = journal_file.read()
+        complete_size = content.rfind(b"\n") + 1
+        if complete_size < len(content):
+            logger.info("Torn journal line was truncated in segment: " + str(self.__segment))
+            self.__file.truncate(complete_size)
+            self.__file.seek(complete_size)
+
+    def __find_segments(self):
+        pattern = re.compile(re.escape(self.__name) + r"-(\d+)\.journal$")
+        segments = []
+        for path in glob.glob(os.path.join(self.__directory, self.__name + "-*.journal")):
+            match = pattern.search(path)
+            if match is not None:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def __get_path(self, segment):
+        return os.path.join(self.__directory, self.SEGMENT_TEMPLATE.format(self.__name, segment))
@@ -0,0 +1,237 @@
+"""This module contains classes that bring DB schema up to date and check query plans of DAO queries."""
+import logging
+import os
+import re
+
+from src.store.dao import OrderDao, ItemDao, ReportDao
+
+logger = logging.getLogger()
+
+migration_path = "./../resource/migration"
+
+
+class Migration(object):
+    """Representation of a numbered migration script.
+
+    Script name has a format of <version>_<description>.sql, for example 001_add_orders_seller_name_index.sql.
+    A script applied to one DB backend only has a format of <version>_<description>.<backend>.sql,
+    the version is recorded as applied on other backends without running anything.
+
+    Attributes:
+        __version (int): version the schema has after the script is applied.
+        __description (str): description of the script.
+        __path (str): path to the script.
+        __backend (str): name of DB backend the script is applied to, None if it is applied to any backend.
+    """
+
+    NAME_PATTERN = re.compile(r"^(\d+)_(\w+?)(?:\.(mysql|sqlite))?\.sql$")
+
+    def __init__(self, version, description, path, backend=None):
+        self.__version = version
+        self.__description = description
+        self.__path = path
+        self.__backend = backend
+
+    @property
+    def version(self):
+        return self.__version
+
+    @property
+    def description(self):
+        return self.__description
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def backend(self):
+        return self.__backend
+
+    def get_statements(self, backend=None):
+        """It reads the script and splits it into statements.
+
+        Args:
+            backend (str): name of DB backend the statements are run on, None if it is not known.
+
+        Returns:
+            list: statements of the script, empty if the script is applied to another backend.
+        """
+        if backend is not None and self.__backend is not None and backend != self.__backend:
+            return []
+        with open(self.__path) as script:
+            lines = [line for line in script if not line.strip().startswith("--")]
+        return [statement.strip() for statement in "".join(lines).split(";") if statement.strip()]
+
+    @classmethod
+    def from_file(cls, path):
+        """It creates migration from a script whose name follows the name pattern.
+
+        Args:
+            path (str): path to the script.
+
+        Returns:
+            Migration: migration of the script, None if the script name does not follow the pattern.
+        """
+        match = cls.NAME_PATTERN.match(os.path.basename(path))
+        if match is None:
+            return None
+        return cls(int(match.group(1)), match.group(2).replace("_", " "), path, match.group(3))
+
+    def __repr__(self):
+        return "{} : {}".format(self.__version, self.__description)
+
+
+class QueryPlanWarning(object):
+    """Representation of a DAO query that makes DB read a whole table.
+
+    Attributes:
+        __query_name (str): name of the query, it is <DAO class>.<query attribute>.
+        __table (str): table that is read in full.
+        __rows (int): number of rows DB estimates to read.
+    """
+
+    def __init__(self, query_name, table, rows):
+        self.__query_name = query_name
+        self.__table = table
+        self.__rows = rows
+
+    @property
+    def query_name(self):
+        return self.__query_name
+
+    @property
+    def table(self):
+        return self.__table
+
+    @property
+    def rows(self):
+        return self.__rows
+
+    def __str__(self):
+        if self.__rows is None:
+            return "{} scans the whole table {}".format(self.__query_name, self.__table)
+        return "{} scans the whole table {} (~{} rows)".format(self.__query_name, self.__table, self.__rows)
+
+
+class MigrationRunner(object):
+    """It applies numbered migration scripts that have not been applied yet and records applied versions.
+
+    Besides that it checks plans of DAO queries for full table scans.
+
+    Attributes:
+        __data_source (DataSource): an object holding DB connection and configuration.
+        __migration_dir (str): directory holding migration scripts.
+    """
+
+    CREATE_VERSION_TABLE = """CREATE TABLE IF NOT EXISTS schema_version (
+                              version int PRIMARY KEY,
+                              description varchar(255) NOT NULL,
+                              applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"""
+    SELECT_VERSIONS = "SELECT version FROM schema_version"
+    INSERT_VERSION = "INSERT INTO schema_version (version, description) VALUES (%s, %s)"
+    CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+    CHECKED_DAO = (OrderDao, ItemDao, ReportDao)
+
+    def __init__(self, data_source, migration_dir=migration_path):
+        self.__data_source = data_source
+        self.__migration_dir = migration_dir
+
+    def find_migrations(self):
+        """It finds all the migration scripts ordered by version.
+
+        Returns:
+            list: bunch of Migration object.
+        """
+        migrations = []
+        for name in os.listdir(self.__migration_dir):
+            migration = Migration.from_file(os.path.join(self.__migration_dir, name))
+            if migration is not None:
+                migrations.append(migration)
+        return sorted(migrations, key=lambda m: m.version)
+
+    def get_applied_versions(self):
+        """It reads versions of the migrations that have been applied.
+
+        Returns:
+            set: applied versions.
+        """
+        with self.__data_source.get_connection().cursor() as cursor:
+            cursor.execute(self.CREATE_VERSION_TABLE)
+            cursor.execute(self.SELECT_VERSIONS)
+            return {row.get("version") for row in cursor.fetchall()}
+
+    def get_pending(self):
+        """It finds the migrations that have not been applied yet.
+
+        Returns:
+            list: bunch of Migration object ordered by version.
+        """
+        try:
+            applied_versions = self.get_applied_versions()
+        finally:
+            self.__data_source.release()
+        return [migration for migration in self.find_migrations() if migration.version not in applied_versions]
+
+    def apply(self):
+        """It applies pending migrations one by one committing each of them along with its version.
+
+        MySQL commits DDL statements implicitly, so a failed migration may be left partially applied
+        and its version not recorded.
+
+        Returns:
+            list: bunch of applied Migration object.
+
+        Raises:
+            Exception: if a migration script fails.
+        """
+        applied = []
+        backend = self.__data_source.get_dialect().NAME
+        try:
+            for migration in self.get_pending():
+                logger.info("Applying migration: " + repr(migration))
+                with self.__data_source.get_connection().cursor() as cursor:
+                    for statement in migration.get_statements(backend):
+                        cursor.execute(statement)
+                    cursor.execute(self.INSERT_VERSION, (migration.version, migration.description))
+                self.__data_source.commit()
+                applied.append(migration)
+                logger.info("Migration was applied: " + repr(migration))
+        finally:
+            self.__data_source.release()
+        return applied
+
+    def check_queries(self):
+        """It explains every DAO query and reports the ones reading a whole table.
+
+        Placeholders of the queries are bound to a dummy value that is good enough for the optimizer.
+        Queries are explained by the dialect of DB backend, EXPLAIN on MySQL and EXPLAIN QUERY PLAN on SQLite.
+
+        Returns:
+            list: bunch of QueryPlanWarning object.
+        """
+        warnings = []
+        dialect = self.__data_source.get_dialect()
+        try:
+            with self.__data_source.get_connection().cursor() as cursor:
+                for query_name, query in self.__collect_queries():
+                    for table, rows in dialect.find_full_scans(cursor, query, [1] * query.count("%s") or None):
+                        warnings.append(QueryPlanWarning(query_name, table, rows))
+        finally:
+            self.__data_source.release()
+        for warning in warnings:
+            logger.info("Query plan warning: " + str(warning))
+        return warnings
+
+    def __collect_queries(self):
+        queries = []
+        for dao in self.CHECKED_DAO:
+            for name in sorted(vars(dao)):
+                query = getattr(dao, name)
+                if name.isupper() and isinstance(query, str) and self.__is_checked(query):
+                    queries.append(("{}.{}".format(dao.__name__, name), query.replace("{}", "%s")))
+        return queries
+
+    def __is_checked(self, query):
+        words = query.upper().split()
+        return len(words) > 1 and (words[0] in self.CHECKED_STATEMENTS or (words[0] == "INSERT" and "SELECT" in words))
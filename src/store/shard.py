@@ -0,0 +1,190 @@
+"""This module contains a shard map that spreads orders over several DB instances by seller."""
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from six.moves import queue
+
+from src.store.db import DataSource
+
+logger = logging.getLogger()
+
+
+class ShardMap(object):
+    """It maps a seller to the shard holding orders of the seller.
+
+    A shard is a DaoManager of a DB instance of its own. The shard of a seller is picked by crc32 hash
+    of the seller name, so all the orders and the sales summary of a seller live in one shard.
+    The number and order of shards must not change once orders are saved, otherwise orders have to be moved.
+
+    Attributes:
+        __shards (list): bunch of DaoManager object, one per shard.
+        __executor (ThreadPoolExecutor): executor running work on every shard in parallel, it is created on first use.
+        __executor_lock (Lock): lock guarding executor creation.
+    """
+
+    STREAM_BUFFER_SIZE = 1000
+    PUT_TIMEOUT = 0.1
+    DONE = object()
+
+    def __init__(self, shards):
+        self.__shards = list(shards)
+        self.__executor = None
+        self.__executor_lock = threading.Lock()
+
+    @property
+    def shards(self):
+        return list(self.__shards)
+
+    @classmethod
+    def from_config(cls, primary, create_dao_manager):
+        """It creates shard map of the sections listed in shards property of primary DB config section.
+
+        Args:
+            primary (DataSource): primary DB.
+            create_dao_manager (callable): function creating DaoManager of a DataSource.
+
+        Returns:
+            ShardMap: shard map, None if no shards are configured.
+        """
+        sections = [section.strip() for section in primary.get_property("shards", "").split(",") if section.strip()]
+        if not sections:
+            return None
+        shards = []
+        for section in sections:
+            if section == primary.config_section:
+                shards.append(create_dao_manager(primary))
+            else:
+                shards.append(create_dao_manager(DataSource(section, primary.config_path)))
+        logger.info("Orders are sharded over: " + ", ".join(sections))
+        return cls(shards)
+
+    def get_shard(self, seller_name):
+        """It finds the shard holding orders of a seller.
+
+        Args:
+            seller_name (str): fullname of salesman.
+
+        Returns:
+            DaoManager: the shard of the seller.
+        """
+        return self.__shards[zlib.crc32(seller_name.encode("utf-8")) % len(self.__shards)]
+
+    def map(self, work):
+        """It runs work on every shard in parallel and releases connections of the shards.
+
+        Args:
+            work (callable): function taking DaoManager of a shard.
+
+        Returns:
+            list: results of the work in the order of shards.
+
+        Raises:
+            Exception: if the work fails on one of the shards.
+        """
+        if len(self.__shards) == 1:
+            return [self.__run(work, self.__shards[0])]
+        futures = [self.__get_executor().submit(self.__run, work, shard) for shard in self.__shards]
+        return [future.result() for future in futures]
+
+    def stream(self, work, buffer_size=STREAM_BUFFER_SIZE):
+        """It runs work yielding items on every shard in parallel and yields the items as they come.
+
+        Items of the shards are interleaved through a bounded buffer, so memory use does not depend
+        on the number of items. Connections of the shards are released once their work is over.
+
+        Args:
+            work (callable): function taking DaoManager of a shard and returning an iterator.
+            buffer_size (int): max number of items produced but not consumed yet.
+
+        Yields:
+            object: next item of one of the shards.
+
+        Raises:
+            Exception: if the work fails on one of the shards.
+        """
+        if len(self.__shards) == 1:
+            shard = self.__shards[0]
+            items = None
+            try:
+                items = work(shard)
+                for item in items:
+                    yield item
+            finally:
+                self.__close(items)
+                shard.release_connection()
+            return
+        buffer = queue.Queue(maxsize=buffer_size)
+        cancelled = threading.Event()
+        futures = [self.__get_executor().submit(self.__produce, work, shard, buffer, cancelled)
+                   for shard in self.__shards]
+        try:
+            running = len(futures)
+            while running > 0:
+                item = buffer.get()
+                if item is self.DONE:
+                    running -= 1
+                else:
+                    yield item
+            for future in futures:
+                future.result()
+        finally:
+            cancelled.set()
+
+    def release_connection(self):
+        """It returns DB connections of current unit of work on every shard to their pools.
+        """
+        for shard in self.__shards:
+            shard.release_connection()
+
+    def close_connection(self):
+        """It stops the executor and closes connection pools of every shard.
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        for shard in self.__shards:
+            shard.close_connection()
+
+    def __get_executor(self):
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=len(self.__shards))
+            return self.__executor
+
+    @classmethod
+    def __produce(cls, work, shard, buffer, cancelled):
+        items = None
+        try:
+            items = work(shard)
+            for item in items:
+                if not cls.__put(buffer, item, cancelled):
+                    break
+        finally:
+            cls.__close(items)
+            shard.release_connection()
+            cls.__put(buffer, cls.DONE, cancelled)
+
+    @classmethod
+    def __put(cls, buffer, item, cancelled):
+        while not cancelled.is_set():
+            try:
+                buffer.put(item, timeout=cls.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @staticmethod
+    def __close(items):
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+    @staticmethod
+    def __run(work, shard):
+        try:
+            return work(shard)
+        finally:
+            shard.release_connection()
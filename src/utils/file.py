@@ -1,5 +1,7 @@
 """This is util module. It holds util classes that helps to interact with different types of files."""
 import logging
+import os
+import threading
 from string import Template
 
 from future.moves import configparser
@@ -72,8 +74,81 @@ class FileUtil(object):
                 file_to_write.writelines(line)
 
 
+class TemplateRegistry(object):
+    """It keeps compiled templates, so a template file is read and parsed once.
+
+    A template is compiled again when modification time or size of its file changes,
+    which costs one stat call per rendering instead of reading the file.
+
+    Attributes:
+        __templates (dict): modification time, size and compiled template of every template file.
+        __lock (Lock): lock guarding compiled templates.
+    """
+
+    def __init__(self):
+        self.__templates = {}
+        self.__lock = threading.Lock()
+
+    def get(self, path_to_template):
+        """It returns compiled template of a file compiling it if the file is new or has been changed.
+
+        Args:
+            path_to_template (str): path to template file.
+
+        Returns:
+            Template: compiled template.
+        """
+        stat = os.stat(path_to_template)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.__lock:
+            cached = self.__templates.get(path_to_template)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        logger.info("Compiling template: " + path_to_template)
+        template = Template(FileUtil.read_to_string(path_to_template))
+        with self.__lock:
+            self.__templates[path_to_template] = (version, template)
+        return template
+
+    def render(self, path_to_template, data):
+        """It returns result of merging data with template.
+
+        Args:
+            path_to_template (str): path to template file.
+            data (dict): data that should be merged with template variables.
+
+        Returns:
+           str: string representing template populated by data.
+        """
+        return self.get(path_to_template).substitute(data)
+
+    def render_many(self, path_to_template, data_list):
+        """It merges every data with template checking the template file once.
+
+        Args:
+            path_to_template (str): path to template file.
+            data_list (list): bunch of data that should be merged with template variables.
+
+        Returns:
+           list: strings representing template populated by every data.
+        """
+        template = self.get(path_to_template)
+        return [template.substitute(data) for data in data_list]
+
+    def clear(self):
+        """It drops all the compiled templates.
+        """
+        with self.__lock:
+            self.__templates.clear()
+
+
+template_registry = TemplateRegistry()
+
+
 class TemplateUtil(object):
     """It works with simple substitute template engine.
+
+    Templates are compiled once and kept in the template registry.
     """
 
     @staticmethod
@@ -87,6 +162,17 @@ class TemplateUtil(object):
         Returns:
            str: string representing template populated by data.
         """
-        src = FileUtil.read_to_string(path_to_template)
-        template = Template(src)
-        return template.substitute(data)
+        return template_registry.render(path_to_template, data)
+
+    @staticmethod
+    def process_many(path_to_template, data_list):
+        """It returns results of merging every data with template.
+
+        Args:
+            path_to_template (str): path to template file.
+            data_list (list): bunch of data that should be merged with template variables.
+
+        Returns:
+           list: strings representing template populated by every data.
+        """
+        return template_registry.render_many(path_to_template, data_list)
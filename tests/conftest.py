@@ -1,5 +1,8 @@
+import os
+
 import pytest
 from src.base.entity import Order, Item, User, POSITION, TYPE
+from src.store.db import DataSource
 
 
 @pytest.fixture(scope="session")
@@ -12,3 +15,14 @@ def valid_order():
 @pytest.fixture(scope="session")
 def invalid_order():
     return Order(User("Aleh", "Struneuski", POSITION.SALESMAN))
+
+
+@pytest.fixture
+def sqlite_data_source(tmpdir):
+    schema_path = os.path.join(os.path.dirname(__file__), "..", "resource", "schema", "sqlite.sql")
+    config = tmpdir.join("db.cfg")
+    config.write("[CONFIG_TEST]\nbackend=sqlite\npath={}\nschema_path={}\npool_size=2\n".format(
+        tmpdir.join("coffee_db.sqlite"), os.path.abspath(schema_path)))
+    data_source = DataSource(config_section="CONFIG_TEST", config_path=str(config))
+    yield data_source
+    data_source.close()
@@ -0,0 +1,71 @@
+import pytest
+
+from src.store.archive import BillArchive
+
+
+@pytest.mark.archive
+class TestBillArchive(object):
+
+    def test_bills_are_read_by_order_id(self, tmpdir):
+        archive = BillArchive(str(tmpdir), segment_size=20)
+        archive.append(1, "2018-04-24 22:16:26", "first bill\n")
+        archive.append(2, "2018-04-24 22:16:26", "second bill\n")
+        archive.append(3, "2018-04-25 09:00:00", "third bill\n")
+        archive.close()
+
+        reopened = BillArchive(str(tmpdir))
+        assert reopened.read(2) == "second bill\n"
+        assert reopened.read(4) is None
+        assert [location.order_id for location in reopened.find_by_date("2018-04-24")] == [1, 2]
+        assert reopened.find(3).segment == 3
+
+    def test_torn_index_line_is_ignored(self, tmpdir):
+        archive = BillArchive(str(tmpdir))
+        archive.append(1, "2018-04-24 22:16:26", "first bill\n")
+        archive.close()
+        with tmpdir.join("bills.idx").open("ab") as index_file:
+            index_file.write(b"2\t2018-04")
+
+        reopened = BillArchive(str(tmpdir))
+        reopened.append(3, "2018-04-24 22:16:27", "third bill\n")
+        reopened.close()
+
+        assert BillArchive(str(tmpdir)).read(3) == "third bill\n"
+        assert BillArchive(str(tmpdir)).find(2) is None
+
+    def test_compacted_segments_are_read_by_order_id(self, tmpdir):
+        archive = BillArchive(str(tmpdir), segment_size=30, block_size=25)
+        for order_id in range(1, 6):
+            archive.append(order_id, "2018-04-24 22:16:2" + str(order_id), "bill of order {}\n".format(order_id))
+
+        assert archive.compact() == 4
+        archive.close()
+
+        reopened = BillArchive(str(tmpdir))
+        assert [reopened.read(order_id) for order_id in range(1, 6)] == [
+            "bill of order {}\n".format(order_id) for order_id in range(1, 6)]
+        assert reopened.find(1).is_compressed and not reopened.find(5).is_compressed
+        assert sorted([path.basename for path in tmpdir.listdir()]) == [
+            "bills-000001.zseg", "bills-000002.zseg", "bills-000003.zseg", "bills-000004.zseg", "bills-000005.seg",
+            "bills.idx"]
+
+    def test_imported_bills_are_found_by_date(self, tmpdir):
+        archive = BillArchive(str(tmpdir))
+
+        locations = archive.import_bills([("2018-04-24 22:16:26", "old bill"), ("2018-04-25 09:00:00", "new bill")])
+
+        assert archive.read_at(locations[1]) == "new bill"
+        assert BillArchive(str(tmpdir)).find_by_date("2018-04-24") == locations[:1]
+        assert BillArchive(str(tmpdir)).find_imported_digests() == set([
+            ("2018-04-24 22:16:26", BillArchive.get_digest("old bill")),
+            ("2018-04-25 09:00:00", BillArchive.get_digest("new bill"))])
+
+    def test_digests_of_bills_imported_without_them_are_computed(self, tmpdir):
+        archive = BillArchive(str(tmpdir))
+        archive.import_bills([("2018-04-24 22:16:26", "old bill")])
+        archive.close()
+        index = tmpdir.join("bills.idx")
+        index.write("\t".join(index.read().split("\t")[:-1]) + "\n")
+
+        assert BillArchive(str(tmpdir)).find_imported_digests() == set([
+            ("2018-04-24 22:16:26", BillArchive.get_digest("old bill"))])
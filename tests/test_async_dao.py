@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from decimal import Decimal
+
+import pytest
+from mock import Mock
+
+from src.base.entity import Order, User, Page, Item, ReportRecord, TYPE
+from src.service.service import ReportService
+from src.store.async_dao import AsyncDaoManager
+from src.store.dao import DaoManager
+from src.store.db import DataSource
+
+
+@pytest.mark.dao
+class TestAsyncDaoManager(object):
+
+    @pytest.fixture
+    def mock_dao_manager(self):
+        return Mock(spec=DaoManager(DataSource()))
+
+    @pytest.fixture
+    def async_dao_manager(self, mock_dao_manager):
+        async_dao_manager = AsyncDaoManager(mock_dao_manager, max_workers=4)
+        yield async_dao_manager
+        async_dao_manager.close()
+
+    def test_writes_are_committed_in_worker_threads(self, mock_dao_manager, async_dao_manager):
+        threads = set()
+
+        def persist(order):
+            threads.add(threading.current_thread().name)
+            return 1
+
+        mock_dao_manager.order_dao.persist.side_effect = persist
+        orders = [Order(User("first", "last")) for i in range(8)]
+
+        async def submit():
+            return await asyncio.gather(*[async_dao_manager.order_dao.persist(order) for order in orders])
+
+        assert asyncio.run(submit()) == [1] * 8
+        assert threading.current_thread().name not in threads
+        assert mock_dao_manager.commit.call_count == 8
+        assert mock_dao_manager.release_connection.call_count == 8
+
+    def test_failed_work_is_rolled_back(self, mock_dao_manager, async_dao_manager):
+        mock_dao_manager.item_dao.persist_many.side_effect = RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(async_dao_manager.item_dao.persist_many([], 1))
+
+        mock_dao_manager.rollback.assert_called_once()
+        mock_dao_manager.commit.assert_not_called()
+
+    def test_iter_all_reads_orders_page_by_page(self, mock_dao_manager, async_dao_manager):
+        first_order, second_order = Order(User("a", "b"), 1), Order(User("c", "d"), 2)
+        mock_dao_manager.order_dao.find_page.side_effect = [Page([first_order], 1), Page([second_order])]
+
+        async def read_all():
+            return [order async for order in async_dao_manager.order_dao.iter_all(batch_size=1)]
+
+        assert asyncio.run(read_all()) == [first_order, second_order]
+        mock_dao_manager.order_dao.find_page.assert_called_with(1, 1)
+        mock_dao_manager.commit.assert_not_called()
+
+    def test_executor_has_as_many_workers_as_connections_in_the_pool(self, mock_dao_manager):
+        mock_dao_manager.data_source.get_property.return_value = "3"
+
+        AsyncDaoManager(mock_dao_manager).close()
+
+        mock_dao_manager.data_source.get_property.assert_called_once_with("pool_size", AsyncDaoManager.POOL_SIZE)
+
+    def test_persisted_and_deleted_orders_update_sales_summary(self, sqlite_data_source):
+        dao_manager = DaoManager(sqlite_data_source)
+        async_dao_manager = AsyncDaoManager(dao_manager)
+        orders = []
+        sales = [("Aleh, Struneuski", "1.5000"), ("Aleh, Struneuski", "2.2500"), ("Ivan, Ivanov", "3.0000")]
+        for seller, cost in sales:
+            order = Order(User.from_string(seller))
+            order.add_items(Item("espresso", Decimal(cost), TYPE.BEVERAGE))
+            orders.append(order)
+
+        async def persist_and_delete():
+            order_ids = [await async_dao_manager.order_dao.persist(order) for order in orders]
+            await async_dao_manager.order_dao.delete_by_id(order_ids[0])
+            return await async_dao_manager.order_dao.delete_by_ids(order_ids[2:])
+
+        try:
+            assert asyncio.run(persist_and_delete()) == 1
+            expected = [ReportRecord("Aleh, Struneuski", 1, Decimal("2.2500"))]
+            assert dao_manager.report_dao.get_sales_records() == expected
+            assert ReportService(dao_manager).verify_summary() == []
+        finally:
+            async_dao_manager.close()
@@ -0,0 +1,66 @@
+import pytest
+from mock import Mock
+
+from src.base.entity import Order
+from src.service.bill_writer import BillWriter
+from src.service.exception import ServiceError
+from src.service.service import OrderService
+
+
+@pytest.mark.service
+class TestBillWriter(object):
+
+    @pytest.fixture
+    def mock_order_service(self):
+        return Mock(spec=OrderService(Mock()))
+
+    @pytest.fixture
+    def saved_order(self, valid_order):
+        order = Order(valid_order.user, order_id=7)
+        order.add_items(*valid_order.items)
+        return order
+
+    def test_bills_are_made_by_workers(self, mock_order_service, saved_order):
+        writer = BillWriter(mock_order_service, workers=2)
+        writer.start()
+        for i in range(5):
+            writer.submit(saved_order)
+        writer.stop()
+
+        assert mock_order_service.make_bill.call_count == 5
+        assert writer.status().get("written") == 5
+        assert writer.status().get("running") is False
+
+    def test_failed_bill_is_retried_and_reported(self, mock_order_service, saved_order):
+        mock_order_service.make_bill.side_effect = [IOError("disk is gone"), None, IOError("disk is gone"),
+                                                    IOError("disk is gone")]
+        writer = BillWriter(mock_order_service, workers=1, max_attempts=2, retry_delay=0)
+        writer.start()
+        writer.submit(saved_order)
+        writer.submit(saved_order)
+        writer.stop()
+
+        status = writer.status()
+        assert status.get("written") == 1
+        assert status.get("retried") == 2
+        assert status.get("failed") == [7]
+        assert isinstance(status.get("last_error"), IOError)
+
+    def test_full_queue_fails_submit(self, mock_order_service, saved_order):
+        writer = BillWriter(mock_order_service, queue_size=1, submit_timeout=0)
+        writer.submit(saved_order)
+
+        with pytest.raises(ServiceError):
+            writer.submit(saved_order)
+
+    def test_bill_of_not_queued_order_is_reported_as_failed(self, mock_order_service, saved_order):
+        writer = BillWriter(mock_order_service, queue_size=1, submit_timeout=0)
+        writer.submit(saved_order)
+        try:
+            writer.submit(saved_order)
+        except ServiceError as e:
+            writer.fail(saved_order, e)
+
+        status = writer.status()
+        assert status.get("failed") == [7]
+        assert isinstance(status.get("last_error"), ServiceError)
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from mock import patch
+
+from src.store.cache import LruCache, DaoCache
+
+
+@pytest.mark.cache
+class TestLruCache(object):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LruCache(size=2)
+        cache.put(("order", 1), "first")
+        cache.put(("order", 2), "second")
+        cache.get(("order", 1))
+        cache.put(("order", 3), "third")
+
+        assert cache.get(("order", 2)) is None
+        assert cache.get(("order", 1)) == "first"
+        assert cache.get(("order", 3)) == "third"
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    @patch("src.store.cache.time")
+    def test_expired_entry_is_not_returned(self, time_mock):
+        time_mock.time.return_value = 0
+        cache = LruCache(size=2, ttl=10)
+        cache.put(("order", 1), "first")
+
+        time_mock.time.return_value = 11
+        assert cache.get(("order", 1)) is None
+        assert len(cache) == 0
+
+
+@pytest.mark.cache
+class TestDaoCache(object):
+
+    def test_staged_write_is_cached_on_commit(self):
+        cache = DaoCache(size=10)
+        cache.stage_put(("order", 1), "order")
+        assert cache.get(("order", 1)) is None
+
+        cache.commit()
+        assert cache.get(("order", 1)) == "order"
+
+    def test_staged_write_is_dropped_on_rollback(self):
+        cache = DaoCache(size=10)
+        cache.stage_put(("order", 1), "order")
+        cache.rollback()
+
+        assert cache.get(("order", 1)) is None
+        assert len(cache) == 0
+
+    def test_deleted_entry_is_not_repopulated_before_commit(self):
+        cache = DaoCache(size=10)
+        cache.populate(("order", 1), "order")
+        cache.stage_invalidate(("order", 1))
+        cache.populate(("order", 1), "order read inside transaction")
+        assert cache.get(("order", 1)) is None
+
+        cache.commit()
+        assert cache.get(("order", 1)) is None
+
+    def test_namespace_repopulated_by_other_thread_is_invalidated_on_commit(self):
+        cache = DaoCache(size=10)
+        cache.populate(("item", 1), "item")
+        cache.stage_invalidate_namespace("item")
+        assert cache.get(("item", 1)) is None
+
+        other = threading.Thread(target=cache.populate, args=(("item", 1), "item read before commit"))
+        other.start()
+        other.join()
+        assert len(cache) == 1
+
+        cache.commit()
+        assert cache.get(("item", 1)) is None
+        assert len(cache) == 0
@@ -34,6 +34,42 @@ class TestDao(object):
 
         assert order_act.user.fullname == valid_order.user.fullname, "Persisted order was not found."
 
+    def test_order_dao_iter_all(self, dao_manager):
+        exp_orders = self.__create_random_orders(amount=5, items=1)
+        exp_order_ids = []
+        try:
+            for order in exp_orders:
+                exp_order_ids.append(dao_manager.order_dao.persist(order))
+        except Exception as e:
+            assert False, e
+        else:
+            dao_manager.commit()
+
+        act_order_ids = [order.id for order in dao_manager.order_dao.iter_all(batch_size=2)]
+
+        assert set(exp_order_ids) <= set(act_order_ids), "Not all the persisted orders were iterated over."
+
+    def test_order_dao_find_page(self, dao_manager):
+        exp_orders = self.__create_random_orders(amount=5, items=1)
+        exp_order_ids = []
+        try:
+            for order in exp_orders:
+                exp_order_ids.append(dao_manager.order_dao.persist(order))
+        except Exception as e:
+            assert False, e
+        else:
+            dao_manager.commit()
+
+        act_order_ids = []
+        page = dao_manager.order_dao.find_page(exp_order_ids[0] - 1, limit=2)
+        act_order_ids.extend([order.id for order in page])
+        while not page.is_last:
+            assert len(page) == 2, "Not the last page has to be full."
+            page = dao_manager.order_dao.find_page(page.next_token, limit=2)
+            act_order_ids.extend([order.id for order in page])
+
+        assert act_order_ids == exp_order_ids, "Pages did not return persisted orders in id order."
+
     def test_item_dao_insert(self, dao_manager, valid_order):
         exp_items = []
         try:
@@ -57,6 +93,24 @@ class TestDao(object):
 
         assert act_items == exp_items, "Persisted items were not found at all or partially."
 
+    def test_item_dao_persist_many(self, dao_manager):
+        order = self.__create_random_orders(amount=1, items=10)[0]
+        try:
+            order_id = dao_manager.order_dao.persist(order)
+            item_ids = dao_manager.item_dao.persist_many(order.items, order_id, max_packet_size=256)
+        except Exception as e:
+            assert False, e
+        else:
+            dao_manager.commit()
+
+        exp_items = []
+        for item, item_id in zip(order.items, item_ids):
+            exp_items.append(Item(item.name, item.cost, item.item_type, item_id))
+        act_items = [dao_manager.item_dao.find_by_id(item_id) for item_id in item_ids]
+
+        assert len(item_ids) == len(order.items), "Not every item got an id."
+        assert act_items == exp_items, "Items persisted in batch were not found at all or partially."
+
     def test_report_dao_get_sales_record(self, dao_manager):
         exp_orders = self.__create_random_orders(amount=2, items=2)
         for order in exp_orders:
@@ -79,6 +133,8 @@ class TestDao(object):
             exp_report_records.append(ReportRecord(fullname, sales_number, sales_value))
 
         try:
+            dao_manager.report_dao.rebuild_summary()
+            dao_manager.commit()
             act_report_records = dao_manager.report_dao.get_sales_records()
         except Exception as e:
             assert False, e
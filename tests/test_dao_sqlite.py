@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+
+from src.base.entity import Order, User, Item, ReportRecord, JournalPosition, TYPE
+from src.service.service import OrderService, ReportService
+from src.store.dao import DaoManager
+
+
+@pytest.mark.dao
+class TestSqliteDao(object):
+
+    @pytest.fixture
+    def dao_manager(self, sqlite_data_source):
+        return DaoManager(sqlite_data_source)
+
+    @pytest.fixture
+    def orders(self, dao_manager):
+        orders = []
+        for seller, costs in [("Aleh, Struneuski", ["1.5000", "2.2500"]), ("Ivan, Ivanov", ["10.0001"])]:
+            order = Order(User.from_string(seller))
+            order.add_items(*[Item("espresso", Decimal(cost), TYPE.BEVERAGE) for cost in costs])
+            OrderService(dao_manager).save(order)
+            orders.append(order)
+        return orders
+
+    def test_saved_order_is_found(self, dao_manager, orders):
+        order = dao_manager.order_dao.find_by_id(orders[0].id)
+        items = dao_manager.item_dao.find_page(0, limit=10)
+
+        assert order.user.fullname == "Aleh, Struneuski"
+        assert [item.cost for item in items] == [Decimal("1.5000"), Decimal("2.2500"), Decimal("10.0001")]
+        assert [item.item_id for item in items] == [1, 2, 3]
+
+    def test_orders_are_read_by_pages_and_stream(self, dao_manager, orders):
+        page = dao_manager.order_dao.find_page(0, limit=1)
+
+        assert [order.id for order in page] == [orders[0].id]
+        assert page.next_token == orders[0].id
+        assert [order.id for order in dao_manager.order_dao.iter_all(batch_size=1)] == [o.id for o in orders]
+
+    def test_report_reads_summary(self, dao_manager, orders):
+        exp_records = [ReportRecord("Aleh, Struneuski", 2, Decimal("3.7500")),
+                       ReportRecord("Ivan, Ivanov", 1, Decimal("10.0001"))]
+
+        assert sorted(dao_manager.report_dao.get_sales_records(), key=lambda r: r.fullname) == exp_records
+        dao_manager.report_dao.rebuild_summary()
+        dao_manager.commit()
+        assert sorted(dao_manager.report_dao.get_sales_records(), key=lambda r: r.fullname) == exp_records
+
+    def test_purge_deletes_orders_with_items(self, dao_manager, orders):
+        purged = OrderService(dao_manager).purge_older_than(datetime.now() + timedelta(days=1), batch_size=1)
+
+        assert purged == 2
+        assert dao_manager.item_dao.find_by_id(1) == Item()
+        assert dao_manager.report_dao.get_sales_records() == []
+
+    def test_journal_position_is_upserted(self, dao_manager):
+        dao_manager.journal_dao.save_position("orders", JournalPosition(1, 10))
+        dao_manager.journal_dao.save_position("orders", JournalPosition(2, 20))
+        dao_manager.commit()
+
+        assert dao_manager.journal_dao.find_position("orders") == JournalPosition(2, 20)
+
+    def test_report_reads_summary_columns(self, dao_manager, orders):
+        columns = dao_manager.report_dao.get_sales_columns(batch_size=1)
+
+        assert sorted(zip(columns.sellers, columns.sales_numbers, columns.sales_values)) == [
+            ("Aleh, Struneuski", 2, 37500), ("Ivan, Ivanov", 1, 100001)]
+
+    def test_report_watermark_changes_on_save_and_delete(self, dao_manager, orders):
+        assert dao_manager.report_dao.get_watermark() == (orders[1].id, 0)
+
+        dao_manager.order_dao.delete_by_id(orders[0].id)
+
+        assert dao_manager.report_dao.get_watermark() == (orders[1].id, 1)
+
+        dao_manager.order_dao.delete_by_ids([orders[0].id, orders[1].id])
+
+        assert dao_manager.report_dao.get_watermark() == (0, 2)
+
+    def test_report_finds_summary_mismatches(self, dao_manager, orders):
+        assert dao_manager.report_dao.find_summary_mismatches() == []
+
+        dao_manager.report_dao.add_sales("Ivan, Ivanov", 1, Decimal("0.5000"))
+
+        assert dao_manager.report_dao.find_summary_mismatches(batch_size=1) == [
+            (ReportRecord("Ivan, Ivanov", 2, Decimal("10.5001")), ReportRecord("Ivan, Ivanov", 1, Decimal("10.0001")))]
+
+    def test_money_is_stored_as_integer_ten_thousandths(self, dao_manager, orders, sqlite_data_source):
+        for i in range(3):
+            dao_manager.report_dao.add_sales("Petr, Petrov", 1, Decimal("0.1000"))
+
+        with sqlite_data_source.get_connection().cursor() as cursor:
+            cursor.execute("SELECT typeof(sales_value) as type, CAST(sales_value * 10000 AS SIGNED) as value_units "
+                           "FROM seller_sales_summary WHERE seller_name = (%s)", "Petr, Petrov")
+            assert cursor.fetchone() == {"type": "integer", "value_units": 3000}
+            cursor.execute("SELECT CAST(SUM(cost) * 10000 AS SIGNED) as value_units FROM order_items")
+            assert cursor.fetchone() == {"value_units": 137501}
+
+    def test_purge_subtracts_purged_sales_from_summary(self, dao_manager, orders, sqlite_data_source):
+        with sqlite_data_source.get_connection().cursor() as cursor:
+            cursor.execute("UPDATE orders SET created_at = (%s) WHERE order_id = (%s)",
+                           (datetime(2000, 1, 1), orders[0].id))
+        dao_manager.commit()
+
+        assert OrderService(dao_manager).purge_older_than(datetime(2001, 1, 1), batch_size=1) == 1
+        assert ReportService(dao_manager).verify_summary() == []
+        assert dao_manager.report_dao.get_sales_records() == [ReportRecord("Ivan, Ivanov", 1, Decimal("10.0001"))]
+
+    def test_purge_and_watermark_read_from_primary(self, orders, sqlite_data_source):
+        replica = mock.Mock()
+        replica.get_connection.side_effect = AssertionError("the replica must not be read")
+        dao_manager = DaoManager(sqlite_data_source, read_source=replica)
+
+        assert OrderService(dao_manager).purge_older_than(datetime.now() + timedelta(days=1), batch_size=1) == 2
+        assert dao_manager.report_dao.get_watermark() == (0, 2)
+
+    def test_add_sales_inserts_and_accumulates_seller_figures(self, dao_manager):
+        dao_manager.report_dao.add_sales("Petr, Petrov", 2, Decimal("3.5000"))
+        dao_manager.report_dao.add_sales("Petr, Petrov", 1, Decimal("1.2501"))
+        dao_manager.report_dao.add_sales("Petr, Petrov", -1, Decimal("-0.5000"))
+        dao_manager.report_dao.add_sales("Ivan, Ivanov", 1, Decimal("1.0000"))
+
+        assert sorted(dao_manager.report_dao.get_sales_records(), key=lambda record: record.fullname) == [
+            ReportRecord("Ivan, Ivanov", 1, Decimal("1.0000")), ReportRecord("Petr, Petrov", 2, Decimal("4.2501"))]
@@ -0,0 +1,93 @@
+import pytest
+from mock import Mock, patch
+
+from src.store.db import ConnectionPool, DataSource, ReplicaSet
+from src.store.exception import StoreError
+
+
+@pytest.mark.db
+class TestConnectionPool(object):
+
+    @pytest.fixture
+    def connect(self):
+        return Mock(side_effect=lambda: Mock())
+
+    def test_checkin_reuses_connection(self, connect):
+        pool = ConnectionPool(connect, size=2)
+        connection = pool.checkout()
+        pool.checkin(connection)
+
+        assert pool.checkout() is connection
+        assert connect.call_count == 1
+
+    def test_exhausted_pool_raises_error(self, connect):
+        pool = ConnectionPool(connect, size=1, checkout_timeout=0)
+        pool.checkout()
+
+        with pytest.raises(StoreError):
+            pool.checkout()
+
+    def test_dead_connection_is_replaced_on_checkout(self, connect):
+        pool = ConnectionPool(connect, size=1)
+        dead_connection = pool.checkout()
+        dead_connection.ping.side_effect = OSError("server has gone away")
+        pool.checkin(dead_connection)
+
+        connection = pool.checkout()
+
+        assert connection is not dead_connection
+        dead_connection.close.assert_called_once()
+
+    @patch("src.store.db.time")
+    def test_idle_and_expired_connections_are_recycled(self, time_mock, connect):
+        time_mock.time.return_value = 0
+        pool = ConnectionPool(connect, size=1, idle_timeout=10, max_lifetime=100)
+        idle_connection = pool.checkout()
+        pool.checkin(idle_connection)
+
+        time_mock.time.return_value = 20
+        old_connection = pool.checkout()
+        assert old_connection is not idle_connection
+        idle_connection.close.assert_called_once()
+
+        time_mock.time.return_value = 130
+        pool.checkin(old_connection)
+        old_connection.close.assert_called_once()
+
+
+@pytest.mark.db
+class TestReplicaSet(object):
+
+    @staticmethod
+    def create_data_source(lag=0, holds_connection=False):
+        data_source = Mock(spec=DataSource())
+        data_source.get_dialect.return_value.get_replica_lag.return_value = lag
+        data_source.holds_connection.return_value = holds_connection
+        return data_source
+
+    def test_reads_are_spread_over_fit_replicas(self):
+        primary = self.create_data_source()
+        replicas = [self.create_data_source(lag=1), self.create_data_source(lag=100), self.create_data_source(lag=2)]
+        replica_set = ReplicaSet(primary, replicas, max_lag=5)
+
+        connections = []
+        for i in range(3):
+            connections.append(replica_set.get_connection())
+            replica_set.release()
+
+        assert connections == [replicas[0].get_connection.return_value, replicas[2].get_connection.return_value,
+                               replicas[2].get_connection.return_value]
+
+    def test_reads_fall_back_to_primary(self):
+        primary = self.create_data_source()
+        replica_set = ReplicaSet(primary, [self.create_data_source(lag=None)], max_lag=5)
+
+        assert replica_set.get_connection() is primary.get_connection.return_value
+
+    def test_unit_of_work_reads_own_writes_from_primary(self):
+        primary = self.create_data_source(holds_connection=True)
+        replica = self.create_data_source()
+        replica_set = ReplicaSet(primary, [replica], max_lag=5)
+
+        assert replica_set.get_connection() is primary.get_connection.return_value
+        replica.get_connection.assert_not_called()
@@ -0,0 +1,197 @@
+import gzip
+import json
+
+import pytest
+from mock import patch
+
+from src.base.money import Money
+from src.service.exception import ServiceError
+from src.service.exporter import CSVExporter, Exporter, FanOutExporter, JsonLinesExporter, ColumnarExporter
+
+
+@pytest.mark.service
+class TestCSVExporter(object):
+
+    ROWS = [("Test_0, Test1", "20", "20.1010"), ("Test_2, Test_3", "10", "10.0101"), ("Test_4", "1", "1.0000")]
+
+    def test_rows_are_streamed_to_file(self, tmpdir):
+        path = str(tmpdir.join("report.csv"))
+        exporter = CSVExporter(path, dialect="unix")
+
+        exporter.export(iter(self.ROWS), lambda: ("31", "31.1111"))
+
+        assert exporter.paths == [path]
+        assert tmpdir.join("report.csv").read() == (
+            '"Seller name","Number of sales","Total Values ($)"\n"Test_0, Test1","20","20.1010"\n'
+            '"Test_2, Test_3","10","10.0101"\n"Test_4","1","1.0000"\n"Total:","31","31.1111"\n')
+
+    def test_rows_are_not_split_on_stdout(self, capsys):
+        exporter = CSVExporter(dialect="unix", max_rows=1)
+
+        exporter.export(iter(self.ROWS), lambda: ("31", "31.1111"))
+
+        assert exporter.paths == []
+        assert capsys.readouterr().out.count('"Seller name"') == 1
+
+    def test_rows_are_split_into_gzip_files(self, tmpdir):
+        exporter = CSVExporter(str(tmpdir.join("report.csv")), compress=True, max_rows=2)
+
+        exporter.export(iter(self.ROWS), lambda: ("31", "31.1111"))
+
+        assert [path[len(str(tmpdir)) + 1:] for path in exporter.paths] == ["report-0001.csv.gz",
+                                                                            "report-0002.csv.gz"]
+        with gzip.open(exporter.paths[1], "rt") as csv_file:
+            assert csv_file.read().splitlines() == ["Seller name,Number of sales,Total Values ($)",
+                                                    "Test_4,1,1.0000", "Total:,31,31.1111"]
+
+    def test_rows_are_streamed_to_stdout(self, capsys):
+        CSVExporter(dialect="excel-tab").export(iter(self.ROWS[:1]), lambda: ("20", "20.1010"))
+
+        assert capsys.readouterr().out.splitlines() == ["Seller name\tNumber of sales\tTotal Values ($)",
+                                                        "Test_0, Test1\t20\t20.1010", "Total:\t20\t20.1010"]
+
+
+
+@pytest.mark.service
+class TestJsonLinesExporter(object):
+
+    ROWS = [("Test_0, Test1", "20", "20.1010"), ("Тест, Тестов", "10", "10.0101")]
+
+    def test_rows_are_streamed_to_file(self, tmpdir):
+        path = str(tmpdir.join("report.jsonl"))
+        exporter = JsonLinesExporter(path)
+
+        exporter.export(iter(self.ROWS), lambda: ("30", "30.1111"))
+
+        assert exporter.paths == [path]
+        assert [json.loads(line) for line in tmpdir.join("report.jsonl").read_text("utf-8").splitlines()] == [
+            {"seller_name": "Test_0, Test1", "sales_number": 20, "sales_value": "20.1010"},
+            {"seller_name": "Тест, Тестов", "sales_number": 10, "sales_value": "10.0101"},
+            {"total_sales_number": 30, "total_sales_value": "30.1111"}]
+
+    @patch("src.service.exporter.orjson", None)
+    @patch("src.service.exporter.ujson", None)
+    def test_rows_are_written_to_gzip_file_by_json_module(self, tmpdir):
+        exporter = JsonLinesExporter(str(tmpdir.join("report.jsonl")), compress=True)
+
+        exporter.export(iter(self.ROWS[:1]), lambda: ("20", "20.1010"))
+
+        with gzip.open(exporter.paths[0], "rb") as json_file:
+            assert json_file.read() == (b'{"seller_name":"Test_0, Test1","sales_number":20,"sales_value":"20.1010"}\n'
+                                        b'{"total_sales_number":20,"total_sales_value":"20.1010"}\n')
+
+
+@pytest.mark.service
+class TestColumnarExporter(object):
+
+    ROWS = [("Test_0, Test1", "20", "20.1010"), ("Тест, Тестов", "10", "10.0101"), ("", "1", "-1.0000")]
+
+    def test_columns_are_loaded_by_memory_mapping(self, tmpdir):
+        path = str(tmpdir.join("report.col"))
+        exporter = ColumnarExporter(path)
+
+        exporter.export(iter(self.ROWS), lambda: ("31", "29.1111"))
+
+        assert exporter.paths == [path]
+        assert ColumnarExporter.load(path) == {
+            "seller_name": ["Test_0, Test1", "Тест, Тестов", ""], "sales_number": [20, 10, 1],
+            "sales_value": [Money.of("20.1010"), Money.of("10.0101"), Money.of("-1")],
+            "total_sales_number": 31, "total_sales_value": Money.of("29.1111")}
+
+    def test_int_columns_are_aligned_arrays(self, tmpdir):
+        path = str(tmpdir.join("report.col"))
+        ColumnarExporter(path).export(iter(self.ROWS), lambda: ("31", "29.1111"))
+
+        data = tmpdir.join("report.col").read_binary()
+        header_size = ColumnarExporter.HEADER.size + ColumnarExporter.NAME_LENGTH.size + len(b"seller_name")
+        column_type, scale, offset, size = ColumnarExporter.DESCRIPTOR.unpack_from(data, header_size)
+        names_offset = offset
+        position = header_size + ColumnarExporter.DESCRIPTOR.size
+        position += ColumnarExporter.NAME_LENGTH.size + len(b"sales_number")
+        column_type, scale, offset, size = ColumnarExporter.DESCRIPTOR.unpack_from(data, position)
+
+        assert names_offset % 8 == 0 and offset % 8 == 0
+        assert (column_type, size) == (b"q", 24)
+        assert list(memoryview(data)[offset:offset + size].cast("q")) == [20, 10, 1]
+
+    def test_empty_report_is_loaded(self, tmpdir):
+        path = str(tmpdir.join("empty.col"))
+        ColumnarExporter(path).export(iter([]), lambda: ("0", "0.0000"))
+
+        assert ColumnarExporter.load(path)["seller_name"] == []
+
+    def test_failed_export_keeps_previous_file(self, tmpdir):
+        path = str(tmpdir.join("report.col"))
+        ColumnarExporter(path).export(iter(self.ROWS), lambda: ("31", "29.1111"))
+
+        with patch("os.fsync", side_effect=IOError("disk is full")):
+            with pytest.raises(IOError):
+                ColumnarExporter(path).export(iter(self.ROWS[:1]), lambda: ("20", "20.1010"))
+
+        assert [entry.basename for entry in tmpdir.listdir()] == ["report.col"]
+        assert ColumnarExporter.load(path)["total_sales_number"] == 31
+
+    def test_unknown_file_is_not_loaded(self, tmpdir):
+        tmpdir.join("report.col").write_binary(b"\0" * 64)
+
+        with pytest.raises(ServiceError):
+            ColumnarExporter.load(str(tmpdir.join("report.col")))
+
+class CollectingExporter(Exporter):
+
+    def __init__(self, fail_after=None):
+        self.rows = []
+        self.footer = None
+        self.__fail_after = fail_after
+
+    def export(self, rows, footer):
+        for row in rows:
+            if len(self.rows) == self.__fail_after:
+                raise IOError("disk is gone")
+            self.rows.append(row)
+        self.footer = footer()
+
+
+@pytest.mark.service
+class TestFanOutExporter(object):
+
+    ROWS = [("Test_{}".format(i), "1", "1.0000") for i in range(50)]
+
+    @pytest.mark.parametrize("threaded", [True, False])
+    def test_rows_are_read_once_by_every_exporter(self, threaded):
+        consumed = []
+        exporters = [CollectingExporter() for i in range(3)]
+
+        def rows():
+            for row in self.ROWS:
+                consumed.append(row)
+                yield row
+
+        FanOutExporter(exporters, threaded=threaded, queue_size=2).export(rows(), lambda: ("50", "50.0000"))
+
+        assert consumed == self.ROWS
+        for exporter in exporters:
+            assert exporter.rows == self.ROWS
+            assert exporter.footer == ("50", "50.0000")
+
+    def test_failed_exporter_does_not_stop_others(self):
+        failing, exporter = CollectingExporter(fail_after=3), CollectingExporter()
+
+        with pytest.raises(IOError):
+            FanOutExporter([failing, exporter], queue_size=1).export(iter(self.ROWS), lambda: ("50", "50.0000"))
+
+        assert failing.rows == self.ROWS[:3]
+        assert exporter.rows == self.ROWS
+
+    def test_failed_rows_abort_exporters(self):
+        exporter = CollectingExporter()
+
+        def rows():
+            yield self.ROWS[0]
+            raise IOError("db is gone")
+
+        with pytest.raises(IOError):
+            FanOutExporter([exporter, CollectingExporter()]).export(rows(), lambda: ("50", "50.0000"))
+
+        assert exporter.rows == self.ROWS[:1]
+        assert exporter.footer is None
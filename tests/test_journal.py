@@ -0,0 +1,46 @@
+import pytest
+
+from src.base.entity import JournalPosition
+from src.store.journal import OrderJournal
+
+
+@pytest.mark.journal
+class TestOrderJournal(object):
+
+    def test_appended_orders_are_read_in_batches(self, tmpdir, valid_order):
+        journal = OrderJournal(str(tmpdir), sync=False)
+        for i in range(3):
+            journal.append(valid_order)
+
+        first_batch, position = journal.read(JournalPosition(), limit=2)
+        second_batch, end_position = journal.read(position, limit=2)
+
+        assert len(first_batch) == 2 and len(second_batch) == 1
+        assert second_batch[0].user.fullname == valid_order.user.fullname
+        assert [repr(item) for item in second_batch[0].items] == [repr(item) for item in valid_order.items]
+        assert journal.count(position) == 1
+        assert journal.count(end_position) == 0
+
+    def test_segments_are_rolled_and_removed(self, tmpdir, valid_order):
+        journal = OrderJournal(str(tmpdir), segment_size=1, sync=False)
+        for i in range(3):
+            journal.append(valid_order)
+
+        orders, position = journal.read(JournalPosition(), limit=10)
+        journal.remove_before(position)
+
+        assert len(orders) == 3
+        assert position.segment == 3
+        assert len(tmpdir.listdir()) == 1
+
+    def test_torn_line_is_skipped_and_truncated(self, tmpdir, valid_order):
+        journal = OrderJournal(str(tmpdir), sync=False)
+        journal.append(valid_order)
+        journal.close()
+        with tmpdir.listdir()[0].open("ab") as segment:
+            segment.write(b'{"user": "torn')
+
+        assert journal.count(JournalPosition()) == 1
+        journal.append(valid_order)
+        orders, position = journal.read(JournalPosition(), limit=10)
+        assert len(orders) == 2
@@ -0,0 +1,114 @@
+import os
+from decimal import Decimal
+
+import pytest
+from mock import MagicMock, Mock
+
+from src.base.entity import ReportRecord
+from src.store.dao import DaoManager
+from src.store.db import DataSource
+from src.store.dialect import MySqlDialect
+from src.store.migration import MigrationRunner
+
+resource_dir = os.path.join(os.path.dirname(__file__), "..", "resource")
+
+
+@pytest.mark.migration
+class TestMigrationRunner(object):
+
+    @pytest.fixture
+    def cursor(self):
+        return Mock()
+
+    @pytest.fixture
+    def mock_data_source(self, cursor):
+        data_source = Mock(spec=DataSource())
+        data_source.get_dialect.return_value = MySqlDialect()
+        connection = data_source.get_connection.return_value
+        connection.cursor.return_value = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+        return data_source
+
+    @pytest.fixture
+    def migration_dir(self, tmpdir):
+        tmpdir.join("002_second_step.sql").write("CREATE INDEX b ON orders (b);\n-- comment\nCREATE INDEX c ON orders (c);")
+        tmpdir.join("001_first_step.sql").write("CREATE INDEX a ON orders (a);")
+        tmpdir.join("readme.txt").write("not a migration")
+        return str(tmpdir)
+
+    def test_find_migrations_ordered_by_version(self, mock_data_source, migration_dir):
+        migrations = MigrationRunner(mock_data_source, migration_dir).find_migrations()
+
+        assert [(m.version, m.description) for m in migrations] == [(1, "first step"), (2, "second step")]
+        assert migrations[1].get_statements() == ["CREATE INDEX b ON orders (b)", "CREATE INDEX c ON orders (c)"]
+
+    def test_apply_only_pending_migrations(self, mock_data_source, cursor, migration_dir):
+        cursor.fetchall.return_value = [{"version": 1}]
+
+        applied = MigrationRunner(mock_data_source, migration_dir).apply()
+
+        assert [migration.version for migration in applied] == [2]
+        cursor.execute.assert_any_call("CREATE INDEX c ON orders (c)")
+        cursor.execute.assert_any_call(MigrationRunner.INSERT_VERSION, (2, "second step"))
+        mock_data_source.commit.assert_called_once()
+
+    def test_check_queries_flags_full_scans(self, mock_data_source, cursor, migration_dir):
+        cursor.fetchall.return_value = [{"table": "orders", "type": "ALL", "rows": 10},
+                                        {"table": "order_items", "type": "ref", "rows": 1}]
+
+        warnings = MigrationRunner(mock_data_source, migration_dir).check_queries()
+
+        assert len(warnings) == cursor.execute.call_count
+        assert {warning.table for warning in warnings} == {"orders"}
+        cursor.execute.assert_any_call("EXPLAIN " + "SELECT order_id, seller_name FROM orders", None)
+
+    def test_check_queries_explains_query_plans_on_sqlite(self, sqlite_data_source, migration_dir):
+        warnings = MigrationRunner(sqlite_data_source, migration_dir).check_queries()
+
+        assert "ReportDao.SELECT_RECORDS" in [warning.query_name for warning in warnings]
+        assert "OrderDao.SELECT_BY_ID" not in [warning.query_name for warning in warnings]
+        assert str([w for w in warnings if w.query_name == "ReportDao.SELECT_RECORDS"][0]) == (
+            "ReportDao.SELECT_RECORDS scans the whole table seller_sales_summary")
+
+    def test_apply_records_migration_of_another_backend_without_running_it(self, mock_data_source, cursor, tmpdir):
+        tmpdir.join("001_convert_money.sqlite.sql").write("UPDATE order_items SET cost = cost * 10000;")
+        cursor.fetchall.return_value = []
+
+        applied = MigrationRunner(mock_data_source, str(tmpdir)).apply()
+
+        assert [(m.version, m.description, m.backend) for m in applied] == [(1, "convert money", "sqlite")]
+        assert "UPDATE order_items SET cost = cost * 10000" not in [c[0][0] for c in cursor.execute.call_args_list]
+        cursor.execute.assert_any_call(MigrationRunner.INSERT_VERSION, (1, "convert money"))
+
+    def test_new_sqlite_file_has_no_pending_migrations(self, sqlite_data_source):
+        runner = MigrationRunner(sqlite_data_source, os.path.join(resource_dir, "migration"))
+
+        assert runner.get_pending() == []
+
+    def test_money_of_old_sqlite_file_is_converted_to_units(self, tmpdir):
+        with open(os.path.join(resource_dir, "schema", "sqlite.sql")) as script:
+            schema = script.read().replace("cost INTEGER", "cost DECIMAL(10,4)")
+        schema = schema.replace("sales_value INTEGER", "sales_value DECIMAL(14,4)")
+        schema = schema.replace(",\n(6, 'convert money to units')", "")
+        tmpdir.join("old.sql").write(schema)
+        tmpdir.join("db.cfg").write("[CONFIG_TEST]\nbackend=sqlite\npath={}\nschema_path={}\n".format(
+            tmpdir.join("old.sqlite"), tmpdir.join("old.sql")))
+        data_source = DataSource(config_section="CONFIG_TEST", config_path=str(tmpdir.join("db.cfg")))
+        with data_source.get_connection().cursor() as cursor:
+            cursor.execute("INSERT INTO orders (seller_name) VALUES ('Ivan, Ivanov')")
+            cursor.execute("INSERT INTO order_items (item_name, item_type, cost, order_id) VALUES "
+                           "('espresso', 'beverage', 1.5, 1), ('latte', 'beverage', 2, 1)")
+            cursor.execute("INSERT INTO seller_sales_summary VALUES ('Ivan, Ivanov', 2, 3.5)")
+        data_source.commit()
+        data_source.release()
+
+        try:
+            applied = MigrationRunner(data_source, os.path.join(resource_dir, "migration")).apply()
+            dao_manager = DaoManager(data_source)
+
+            assert [migration.version for migration in applied] == [6]
+            assert dao_manager.report_dao.get_sales_records() == [ReportRecord("Ivan, Ivanov", 2, Decimal("3.5000"))]
+            assert dao_manager.report_dao.find_summary_mismatches() == []
+            assert dao_manager.item_dao.find_by_id(2).cost == Decimal("2.0000")
+        finally:
+            data_source.close()
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import pytest
+
+from src.base.money import Money
+
+
+@pytest.mark.money
+class TestMoney(object):
+
+    @pytest.mark.parametrize("value, expected", [
+        ("2.3493", "2.3493"), ("-20.101", "-20.1010"), (".5", "0.5000"), (7, "7.0000"), (6.5013, "6.5013"),
+        ("1.23455", "1.2346"), (Decimal("1.00005"), "1.0000"), (Decimal("-1.00015"), "-1.0002")])
+    def test_conversion_rounds_half_to_even(self, value, expected):
+        assert str(Money.of(value)) == expected
+
+    def test_arithmetic_is_exact(self):
+        total = sum([Money.of("0.1")] * 3)
+
+        assert total == Money.of("0.3")
+        assert total - Money.of("0.3") == 0
+        assert -total * 2 == Money.of("-0.6")
+        assert total.to_decimal() == Decimal("0.3000")
+
+    def test_money_equals_decimal_of_same_value(self):
+        assert Money.of("20.101") == Decimal("20.1010")
+        assert hash(Money.of("20.101")) == hash(Decimal("20.1010"))
+        assert Money.of("1") < Money.of("1.0001")
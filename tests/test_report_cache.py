@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from mock import Mock
+
+from src.service.report_cache import ReportCache, ReportSnapshot
+
+
+@pytest.mark.service
+class TestReportCache(object):
+
+    @pytest.fixture
+    def make_snapshot(self):
+        return Mock(side_effect=lambda watermark: ReportSnapshot(watermark, [watermark]))
+
+    def test_snapshot_is_served_while_watermark_is_unchanged(self, make_snapshot):
+        cache = ReportCache()
+
+        first = cache.get(lambda: (1, 1), make_snapshot)
+        second = cache.get(lambda: (1, 1), make_snapshot)
+
+        assert second is first
+        make_snapshot.assert_called_once_with((1, 1))
+        assert cache.status().get("hits") == 1
+        assert cache.status().get("misses") == 1
+
+    def test_stale_snapshot_is_served_while_refreshed_in_background(self):
+        refreshing = threading.Event()
+        cache = ReportCache()
+        cache.get(lambda: (1, 1), lambda watermark: ReportSnapshot(watermark, []))
+
+        def make_snapshot(watermark):
+            refreshing.wait(5)
+            return ReportSnapshot(watermark, [watermark])
+
+        stale = cache.get(lambda: (2, 2), make_snapshot)
+        assert stale.watermark == (1, 1)
+        assert cache.status().get("refreshing") is True
+        refreshing.set()
+        cache.close()
+
+        assert cache.get(lambda: (2, 2), make_snapshot).records == [(2, 2)]
+        assert cache.status().get("stale_hits") == 1
+        assert cache.status().get("refreshing") is False
+
+    def test_stale_snapshot_is_made_while_waiting_without_background(self, make_snapshot):
+        cache = ReportCache(background=False)
+        cache.get(lambda: (1, 1), make_snapshot)
+
+        assert cache.get(lambda: (1, 0), make_snapshot).watermark == (1, 0)
+        assert make_snapshot.call_count == 2
+
+    def test_too_old_stale_snapshot_is_not_served(self, make_snapshot):
+        cache = ReportCache(max_stale_age=0)
+        cache.get(lambda: (1, 1), make_snapshot)
+
+        assert cache.get(lambda: (2, 2), make_snapshot).watermark == (2, 2)
+        assert cache.status().get("stale_hits") == 0
+
+    def test_failed_refresh_is_reported(self, make_snapshot):
+        cache = ReportCache()
+        cache.get(lambda: (1, 1), make_snapshot)
+        make_snapshot.side_effect = IOError("db is gone")
+
+        assert cache.get(lambda: (2, 2), make_snapshot).watermark == (1, 1)
+        cache.close()
+
+        assert isinstance(cache.status().get("last_error"), IOError)
+        assert cache.status().get("watermark") == (1, 1)
@@ -1,14 +1,21 @@
+import timeit
+
 import pytest
 from mock import Mock, patch
 from datetime import datetime
+from decimal import Decimal
 
-from src.base.entity import ReportRecord
+from src.base.entity import ReportRecord, Order, User, Item, JournalPosition, TYPE
+from src.base.money import Money
 from src.service.exception import ServiceError
 from src.service.exporter import ConsoleExporter
+from src.service.report_cache import ReportCache
 from src.service.service import ReportService, OrderService
+from src.store.archive import BillArchive
 from src.store.dao import DaoManager
 from src.store.db import DataSource
-from src.utils.file import TemplateUtil, FileUtil
+from src.store.shard import ShardMap
+from src.utils.file import TemplateUtil
 
 
 @pytest.mark.service
@@ -23,35 +30,85 @@ class TestOrderService(object):
         return Mock(spec=ConsoleExporter())
 
     @pytest.fixture
-    def order_service(self, mock_dao_manager):
-        return OrderService(mock_dao_manager)
+    def mock_bill_archive(self):
+        return Mock(spec=BillArchive("outcome"))
+
+    @pytest.fixture
+    def order_service(self, mock_dao_manager, mock_bill_archive):
+        return OrderService(mock_dao_manager, bill_archive=mock_bill_archive)
 
     @pytest.fixture
     def report_service(self, mock_dao_manager):
         return ReportService(mock_dao_manager)
 
     @patch("src.service.service.datetime")
-    @patch.object(FileUtil, 'write')
-    @patch.object(TemplateUtil, 'process')
-    def test_order_service_make_bill(self, template_util, file_util, datetime_mock, order_service, valid_order):
+    @patch.object(TemplateUtil, 'process_many')
+    def test_order_service_make_bill(self, template_util, datetime_mock, order_service, mock_bill_archive,
+                                     valid_order):
         bill_data_format = "%Y-%m-%d %H:%M:%S"
         bill_template_path = "./../resource/template/bill.txt"
-        bill_outcome_path_template = "./../outcome/{}.txt"
+        saved_order = Order(valid_order.user, order_id=7)
+        saved_order.add_items(*valid_order.items)
 
         template = "template string"
-        template_util.return_value = template
+        template_util.return_value = [template]
 
         time_now = datetime(2018, 4, 24, 22, 16, 26, 39793)
         formatted_date = time_now.strftime(bill_data_format)
         datetime_mock.now = Mock(return_value=time_now)
 
-        order_service.make_bill(valid_order)
+        order_service.make_bill(saved_order)
+
+        items_to_string = "\n".join([item.__str__() for item in saved_order.items])
+        template_data = {"date": formatted_date, "user": saved_order.user.fullname, "item": items_to_string}
+
+        template_util.assert_called_once_with(bill_template_path, [template_data])
+        mock_bill_archive.append.assert_called_once_with(7, formatted_date, template)
+
+    def test_order_service_make_bill_unsaved_order(self, order_service, valid_order):
+        unsaved_order = Order(valid_order.user)
+        unsaved_order.add_items(*valid_order.items)
+
+        with pytest.raises(ServiceError):
+            order_service.make_bill(unsaved_order)
+
+    def test_order_service_compact_bills(self, tmpdir, mock_dao_manager):
+        tmpdir.join("2018-04-24 22:16:26.txt").write("old bill")
+        archive = BillArchive(str(tmpdir))
+        order_service = OrderService(mock_dao_manager, bill_archive=archive)
+
+        assert order_service.compact_bills() == 1
+        assert [path.basename for path in tmpdir.listdir() if path.ext == ".txt"] == []
+        assert archive.read_at(archive.find_by_date("2018-04-24")[0]) == "old bill"
+
+    def test_order_service_compact_bills_of_same_date_and_size(self, tmpdir, mock_dao_manager):
+        tmpdir.join("2018-04-24 22:16:26.txt").write("old bill")
+        order_service = OrderService(mock_dao_manager, bill_archive=BillArchive(str(tmpdir)))
+        order_service.compact_bills()
+        tmpdir.join("2018-04-24 22:16:26.txt").write("new bill")
+        tmpdir.join("2018-04-24 22:16:27.txt").write("old bill")
+
+        assert OrderService(mock_dao_manager, bill_archive=BillArchive(str(tmpdir))).compact_bills() == 2
+        assert [path.basename for path in tmpdir.listdir() if path.ext == ".txt"] == []
+        archive = BillArchive(str(tmpdir))
+        assert sorted([archive.read_at(location) for location in archive.find_by_date("2018-04-24")]) == [
+            "new bill", "old bill", "old bill"]
+
+    def test_order_service_compact_bills_skips_imported_bill(self, tmpdir, mock_dao_manager):
+        BillArchive(str(tmpdir)).import_bills([("2018-04-24 22:16:26", "old bill")])
+        tmpdir.join("2018-04-24 22:16:26.txt").write("old bill")
+
+        assert OrderService(mock_dao_manager, bill_archive=BillArchive(str(tmpdir))).compact_bills() == 0
+        assert [path.basename for path in tmpdir.listdir() if path.ext == ".txt"] == []
+        assert len(BillArchive(str(tmpdir)).find_by_date("2018-04-24")) == 1
 
-        items_to_string = "\n".join([item.__str__() for item in valid_order.items])
-        template_data = {"date": formatted_date, "user": valid_order.user.fullname, "item": items_to_string}
+    def test_order_service_reprint(self, order_service, mock_bill_archive):
+        mock_bill_archive.read.return_value = "bill"
 
-        template_util.assert_called_once_with(bill_template_path, template_data)
-        file_util.assert_called_once_with(bill_outcome_path_template.format(formatted_date), template)
+        assert order_service.reprint(7) == "bill"
+        mock_bill_archive.read.return_value = None
+        with pytest.raises(ServiceError):
+            order_service.reprint(8)
 
     def test_order_service_make_bill_invalid_order(self, order_service, invalid_order):
         with pytest.raises(ServiceError, message="Expect ServiceError if order passed to service is without items"):
@@ -64,16 +121,42 @@ class TestOrderService(object):
         order_service.save(valid_order)
 
         mock_dao_manager.order_dao.persist.assert_called_with(valid_order)
-        for item in valid_order.items:
-            mock_dao_manager.item_dao.persist.assert_any_call(item, order_id)
+        mock_dao_manager.item_dao.persist_many.assert_called_once_with(valid_order.items, order_id)
+        mock_dao_manager.report_dao.add_sales.assert_called_once_with(
+            valid_order.user.fullname, len(valid_order.items), sum([item.cost for item in valid_order.items]))
 
         mock_dao_manager.commit.assert_called_once()
-        mock_dao_manager.close_connection.assert_called_once()
+        mock_dao_manager.release_connection.assert_called_once()
+
+    def test_order_service_save_rollback_on_error(self, mock_dao_manager, order_service, valid_order):
+        mock_dao_manager.order_dao.persist.side_effect = RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError):
+            order_service.save(valid_order)
+
+        mock_dao_manager.rollback.assert_called_once()
+        mock_dao_manager.commit.assert_not_called()
+        mock_dao_manager.release_connection.assert_called_once()
 
     def test_order_service_save_invalid_order(self, order_service, invalid_order):
         with pytest.raises(ServiceError, message="Expect ServiceError if order passed to service is without items"):
             order_service.save(invalid_order)
 
+    def test_order_service_purge_commits_every_batch(self, mock_dao_manager, order_service):
+        before = datetime(2018, 4, 24)
+        mock_dao_manager.order_dao.find_ids_older_than.side_effect = [[1, 2], [3], []]
+        mock_dao_manager.order_dao.delete_by_ids.side_effect = [2, 1]
+        mock_dao_manager.report_dao.get_orders_sales_records.side_effect = [
+            [ReportRecord("Test_0, Test1", 3, Decimal("20.1010"))], [ReportRecord("Test_0, Test1", 1, Decimal("1.5000"))]]
+
+        purged = order_service.purge_older_than(before, batch_size=2)
+
+        assert purged == 3
+        mock_dao_manager.order_dao.find_ids_older_than.assert_called_with(before, 2)
+        assert mock_dao_manager.commit.call_count == 2
+        mock_dao_manager.report_dao.add_sales.assert_any_call("Test_0, Test1", -3, Decimal("-20.1010"))
+        mock_dao_manager.release_connection.assert_called_once()
+
     def test_report_service_report_to_console(self, mock_dao_manager, report_service, mock_console_exporter):
         test_report_records = [ReportRecord("Test_0, Test1", 20, 20.1010),
                                ReportRecord("Test_2, Test_3", 10, 10.0101)]
@@ -83,14 +166,162 @@ class TestOrderService(object):
         exp_total_sales = str(sum([report_record.sales_number for report_record in test_report_records]))
         exp_total_values = str(sum([report_record.sales_value for report_record in test_report_records]))
 
-        mock_dao_manager.report_dao.get_sales_records.return_value = test_report_records
+        mock_dao_manager.report_dao.iter_sales_records.return_value = iter(test_report_records)
+        exported = self.collect_export(mock_console_exporter)
         report_service.report(mock_console_exporter)
-        mock_console_exporter.export.assert_called_once_with(exp_export_data, exp_total_sales, exp_total_values)
+        assert exported == [(exp_export_data, (exp_total_sales, exp_total_values))]
+        mock_dao_manager.release_connection.assert_called_once()
+
+    def test_report_service_sums_values_without_converting_them(self, mock_dao_manager, report_service,
+                                                                mock_console_exporter):
+        records = [ReportRecord("Test_{}, Test".format(i), 1, Money(i * 10001)) for i in range(1, 1001)]
+        mock_dao_manager.report_dao.iter_sales_records.return_value = iter(records)
+        exported = self.collect_export(mock_console_exporter)
+
+        with patch.object(Money, "to_units", side_effect=AssertionError("a sales value was converted")):
+            report_service.report(mock_console_exporter)
+
+        assert exported[0][1] == ("1000", str(Money(10001 * 500500)))
+
+    def test_report_totals_of_units_are_faster_than_decimal_totals(self):
+        units = [i * 10000 + i % 10000 for i in range(100000)]
+        values = [Money(unit).to_decimal() for unit in units]
+
+        def sum_decimals():
+            total = Decimal(0)
+            for value in values:
+                total = Decimal(total) + Decimal(round(value, 4))
+            return total
+
+        def sum_converted_decimals():
+            total = Money()
+            for value in values:
+                total += Money.of(value)
+            return total
+
+        def sum_units():
+            total = 0
+            for unit in units:
+                total += Money(unit).units
+            return total
+
+        assert Money(sum_units()) == sum_decimals() == sum_converted_decimals()
+        units_time = min(timeit.repeat(sum_units, number=1, repeat=5))
+        assert units_time < min(timeit.repeat(sum_decimals, number=1, repeat=5))
+        assert units_time < min(timeit.repeat(sum_converted_decimals, number=1, repeat=5))
+
+    def test_order_service_saves_order_to_seller_shard(self, mock_dao_manager, valid_order):
+        shards = [Mock(spec=DaoManager(DataSource())) for i in range(2)]
+        shard_map = ShardMap(shards)
+        owner = shard_map.get_shard(valid_order.user.fullname)
+
+        OrderService(mock_dao_manager, shard_map).save(valid_order)
+
+        owner.order_dao.persist.assert_called_once_with(valid_order)
+        owner.commit.assert_called_once()
+        for shard in shards:
+            if shard is not owner:
+                shard.order_dao.persist.assert_not_called()
+        mock_dao_manager.order_dao.persist.assert_not_called()
+
+    def test_order_service_skips_orders_committed_to_shard_before_crash(self, mock_dao_manager):
+        shards = [Mock(spec=DaoManager(DataSource())) for i in range(2)]
+        shard_map = ShardMap(shards)
+        sellers = ["Seller_{}, Test".format(i) for i in range(10)]
+        orders = [Order(User.from_string(next(seller for seller in sellers if shard_map.get_shard(seller) is shard)))
+                  for shard in shards]
+        for order in orders:
+            order.add_items(Item("espresso", Decimal("1.5"), TYPE.BEVERAGE))
+        order_positions = [JournalPosition(1, 100), JournalPosition(1, 200)]
+        shards[0].journal_dao.find_position.return_value = JournalPosition(1, 200)
+        shards[1].journal_dao.find_position.return_value = JournalPosition(1, 0)
+
+        saved = OrderService(mock_dao_manager, shard_map).save_batch(orders, "orders", JournalPosition(1, 200),
+                                                                     order_positions)
+
+        assert saved == orders[1:]
+        shards[0].order_dao.persist.assert_not_called()
+        shards[1].order_dao.persist.assert_called_once_with(orders[1])
+        for dao_manager in shards + [mock_dao_manager]:
+            dao_manager.journal_dao.save_position.assert_called_once_with("orders", JournalPosition(1, 200))
+            dao_manager.commit.assert_called_once()
+
+    def test_report_service_streams_shard_records(self, mock_dao_manager, mock_console_exporter):
+        shards = [Mock(spec=DaoManager(DataSource())) for i in range(2)]
+        shards[0].report_dao.iter_sales_records.return_value = iter([ReportRecord("Test_0, Test1", 20,
+                                                                                  Decimal("20.1010"))])
+        shards[1].report_dao.iter_sales_records.return_value = iter([ReportRecord("Test_2, Test_3", 10,
+                                                                                  Decimal("10.0101")),
+                                                                     ReportRecord("Test_4, Test_5", 1,
+                                                                                  Decimal("1.0000"))])
+        shard_map = ShardMap(shards)
+        exported = self.collect_export(mock_console_exporter)
+
+        ReportService(mock_dao_manager, shard_map).report(mock_console_exporter)
+        shard_map.close_connection()
+
+        rows, footer = exported[0]
+        assert sorted(rows) == [("Test_0, Test1", "20", "20.1010"), ("Test_2, Test_3", "10", "10.0101"),
+                                ("Test_4, Test_5", "1", "1.0000")]
+        assert footer == ("31", "31.1111")
+        for shard in shards:
+            shard.release_connection.assert_called_once()
+
+    def test_report_service_reads_records_once_for_several_exporters(self, mock_dao_manager, report_service):
+        exporters = [Mock(spec=ConsoleExporter()) for i in range(2)]
+        exported = [self.collect_export(exporter) for exporter in exporters]
+        mock_dao_manager.report_dao.iter_sales_records.return_value = iter([ReportRecord("Test_0, Test1", 20,
+                                                                                         Decimal("20.1010"))])
+
+        report_service.report(exporters, threaded=True)
+
+        assert exported[0] == exported[1] == [([("Test_0, Test1", "20", "20.1010")], ("20", "20.1010"))]
+        mock_dao_manager.report_dao.iter_sales_records.assert_called_once()
+
+    def test_report_service_serves_cached_report(self, mock_dao_manager, mock_console_exporter):
+        mock_dao_manager.report_dao.get_watermark.return_value = (2, 2)
+        mock_dao_manager.report_dao.iter_sales_records.return_value = iter([ReportRecord("Test_0, Test1", 20,
+                                                                                         Decimal("20.1010"))])
+        report_service = ReportService(mock_dao_manager, report_cache=ReportCache())
+        exported = self.collect_export(mock_console_exporter)
+
+        report_service.report(mock_console_exporter)
+        report_service.report(mock_console_exporter)
+
+        assert exported[0] == exported[1] == ([("Test_0, Test1", "20", "20.1010")], ("20", "20.1010"))
+        mock_dao_manager.report_dao.iter_sales_records.assert_called_once()
+        assert mock_dao_manager.report_dao.get_watermark.call_count == 2
+
+    def test_report_service_repairs_mismatched_summary(self, mock_dao_manager):
+        mismatch = (ReportRecord("Test_0, Test1", 2, Decimal("3.0000")),
+                    ReportRecord("Test_0, Test1", 1, Decimal("1.0000")))
+        mock_dao_manager.report_dao.find_summary_mismatches.return_value = [mismatch]
+        report_cache = Mock(spec=ReportCache())
+
+        mismatches = ReportService(mock_dao_manager, report_cache=report_cache).verify_summary(repair=True)
+
+        assert mismatches == [mismatch]
+        mock_dao_manager.report_dao.rebuild_summary.assert_called_once()
+        mock_dao_manager.commit.assert_called_once()
+        report_cache.invalidate.assert_called_once()
+
+    def test_report_service_verifies_summary_without_repair(self, mock_dao_manager, report_service):
+        mock_dao_manager.report_dao.find_summary_mismatches.return_value = []
+
+        assert report_service.verify_summary(repair=True) == []
+        mock_dao_manager.report_dao.rebuild_summary.assert_not_called()
+
+    @staticmethod
+    def collect_export(exporter):
+        exported = []
+        exporter.export.side_effect = lambda rows, footer: exported.append((list(rows), footer()))
+        return exported
 
     def test_report_service_attribute_error(self, mock_dao_manager, report_service):
         with pytest.raises(AttributeError, message="Expect AttributeError if the arg of report method is an object "
                                                    "without export interface."):
-            mock_dao_manager.report_dao.get_sales_records.return_value = [ReportRecord("Test_0, Test1", 20, 20.1010)]
+            mock_dao_manager.report_dao.iter_sales_records.return_value = iter([ReportRecord("Test_0, Test1", 20,
+                                                                                             20.1010)])
             mock_without_export_method = Mock(spec=ObjectWoExportMethod())
             report_service.report(mock_without_export_method)
 
@@ -0,0 +1,50 @@
+import pytest
+from mock import Mock
+
+from src.store.dao import DaoManager
+from src.store.db import DataSource
+from src.store.shard import ShardMap
+
+
+@pytest.mark.db
+class TestShardMap(object):
+
+    @pytest.fixture
+    def shards(self):
+        return [Mock(spec=DaoManager(DataSource())) for i in range(3)]
+
+    def test_seller_is_mapped_to_one_shard(self, shards):
+        shard_map = ShardMap(shards)
+
+        sellers = ["Seller_{}".format(i) for i in range(30)]
+        owners = [shard_map.get_shard(seller) for seller in sellers]
+
+        assert owners == [shard_map.get_shard(seller) for seller in sellers]
+        assert set(owners) == set(shards)
+
+    def test_map_runs_work_on_every_shard(self, shards):
+        shard_map = ShardMap(shards)
+
+        assert shard_map.map(lambda shard: shards.index(shard)) == [0, 1, 2]
+        for shard in shards:
+            shard.release_connection.assert_called_once()
+        shard_map.close_connection()
+
+    def test_map_releases_shard_on_error(self, shards):
+        shard_map = ShardMap(shards[:1])
+        work = Mock(side_effect=ValueError("shard is down"))
+
+        with pytest.raises(ValueError):
+            shard_map.map(work)
+        shards[0].release_connection.assert_called_once()
+
+    def test_stream_yields_items_of_every_shard(self, shards):
+        shard_map = ShardMap(shards)
+
+        items = list(shard_map.stream(lambda shard: iter(range(shards.index(shard) * 10, shards.index(shard) * 10 + 3)),
+                                      buffer_size=2))
+
+        assert sorted(items) == [0, 1, 2, 10, 11, 12, 20, 21, 22]
+        for shard in shards:
+            shard.release_connection.assert_called_once()
+        shard_map.close_connection()
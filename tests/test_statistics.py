@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+import pytest
+from mock import patch
+
+from src.base.entity import SalesColumns, ReportRecord
+from src.base.money import Money
+from src.service.exception import ServiceError
+from src.service.service import ReportService
+from src.service.statistics import SalesStatistics
+from src.store.dao import DaoManager
+
+
+@pytest.mark.service
+class TestSalesStatistics(object):
+
+    @pytest.fixture
+    def columns_list(self):
+        first, second = SalesColumns(), SalesColumns()
+        first.append("Test_0, Test1", 20, "60.0000")
+        first.append("Test_2, Test_3", 10, "30.0000")
+        second.append("Test_4, Test_5", 1, "10.0000")
+        return [first, second, SalesColumns()]
+
+    def test_totals_shares_and_percentiles(self, columns_list):
+        pytest.importorskip("numpy")
+
+        statistics = SalesStatistics(columns_list, percentiles=(50, 100))
+
+        assert statistics.seller_number == 3
+        assert statistics.total_sales == 31
+        assert statistics.total_value == Money.of("100")
+        assert statistics.percentiles == {50: Money.of("30"), 100: Money.of("60")}
+        assert list(statistics.get_shares()) == [6000, 3000, 1000]
+        assert statistics.top(2) == [(ReportRecord("Test_0, Test1", 20, Money.of("60")), 6000),
+                                     (ReportRecord("Test_2, Test_3", 10, Money.of("30")), 3000)]
+
+    def test_statistics_of_columns_read_from_summary(self, sqlite_data_source):
+        pytest.importorskip("numpy")
+        dao_manager = DaoManager(sqlite_data_source)
+        for seller, value in [("Test_0, Test1", "60.0001"), ("Test_2, Test_3", "30.0000"), ("Test_4, Test_5", "0.5")]:
+            dao_manager.report_dao.add_sales(seller, 2, Decimal(value))
+        dao_manager.commit()
+
+        with patch.object(Money, "to_units", side_effect=AssertionError("a sales value was converted")):
+            statistics = ReportService(dao_manager).statistics(percentiles=(50,))
+
+        assert statistics.total_sales == 6
+        assert statistics.total_value == Money.of("90.5001")
+        assert statistics.percentiles == {50: Money.of("30")}
+        assert [record.fullname for record, share in statistics.top(1)] == ["Test_0, Test1"]
+
+    @patch("src.service.statistics.numpy", None)
+    def test_missing_numpy_raises_service_error(self, columns_list):
+        with pytest.raises(ServiceError):
+            SalesStatistics(columns_list)
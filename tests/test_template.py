@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from mock import patch
+
+from src.utils.file import TemplateRegistry, FileUtil
+
+
+@pytest.mark.utils
+class TestTemplateRegistry(object):
+
+    @pytest.fixture
+    def template_path(self, tmpdir):
+        template = tmpdir.join("bill.txt")
+        template.write("User: $user")
+        return str(template)
+
+    def test_template_is_read_once(self, template_path):
+        registry = TemplateRegistry()
+
+        with patch.object(FileUtil, "read_to_string", wraps=FileUtil.read_to_string) as read_mock:
+            assert registry.render(template_path, {"user": "Aleh"}) == "User: Aleh"
+            assert registry.render(template_path, {"user": "Ivan"}) == "User: Ivan"
+
+        read_mock.assert_called_once_with(template_path)
+
+    def test_changed_template_is_compiled_again(self, template_path):
+        registry = TemplateRegistry()
+        registry.render(template_path, {"user": "Aleh"})
+
+        with open(template_path, "w") as template:
+            template.write("Seller: $user")
+        stat = os.stat(template_path)
+        os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        assert registry.render(template_path, {"user": "Aleh"}) == "Seller: Aleh"
+
+    def test_render_many(self, template_path):
+        registry = TemplateRegistry()
+
+        bills = registry.render_many(template_path, [{"user": "Aleh"}, {"user": "Ivan"}])
+
+        assert bills == ["User: Aleh", "User: Ivan"]
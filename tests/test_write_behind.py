@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+from mock import Mock
+
+from src.base.entity import JournalPosition
+from src.service.bill_writer import BillWriter
+from src.service.exception import ServiceError
+from src.service.service import OrderService
+from src.service.write_behind import WriteBehindQueue
+from src.store.dao import DaoManager
+from src.store.db import DataSource
+from src.store.journal import OrderJournal
+
+
+@pytest.mark.service
+class TestWriteBehindQueue(object):
+
+    @pytest.fixture
+    def mock_dao_manager(self):
+        dao_manager = Mock(spec=DaoManager(DataSource()))
+        dao_manager.journal_dao.find_position.return_value = JournalPosition()
+        return dao_manager
+
+    @pytest.fixture
+    def mock_order_service(self):
+        order_service = Mock(spec=OrderService(Mock()))
+        order_service.save_batch.side_effect = lambda orders, *args: orders
+        return order_service
+
+    def test_flush_saves_orders_in_batches_with_position(self, tmpdir, mock_dao_manager, mock_order_service,
+                                                         valid_order):
+        journal = OrderJournal(str(tmpdir), sync=False)
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, journal, batch_size=2)
+        for i in range(3):
+            queue.submit(valid_order)
+
+        assert queue.status().get("pending") == 3
+        assert queue.flush() == 3
+        assert mock_order_service.save_batch.call_count == 2
+        assert mock_order_service.make_bills.call_count == 2
+        orders, name, position, order_positions = mock_order_service.save_batch.call_args[0]
+        assert len(orders) == 1 and name == journal.name
+        assert order_positions == [position]
+        assert queue.status().get("pending") == 0
+
+    def test_failed_flush_keeps_orders_in_journal(self, tmpdir, mock_dao_manager, mock_order_service, valid_order):
+        mock_order_service.save_batch.side_effect = RuntimeError("connection lost")
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, OrderJournal(str(tmpdir), sync=False))
+        queue.submit(valid_order)
+
+        with pytest.raises(RuntimeError):
+            queue.flush()
+        assert queue.status().get("pending") == 1
+
+    def test_invalid_order_is_not_journaled(self, tmpdir, mock_dao_manager, mock_order_service, invalid_order):
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, OrderJournal(str(tmpdir), sync=False))
+
+        with pytest.raises(ServiceError):
+            queue.submit(invalid_order)
+
+    def test_saved_orders_are_handed_to_bill_writer(self, tmpdir, mock_dao_manager, mock_order_service,
+                                                   valid_order):
+        bill_writer = Mock(spec=BillWriter(mock_order_service))
+        bill_writer.submit.side_effect = [None, ServiceError("The bill queue is full.")]
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, OrderJournal(str(tmpdir), sync=False),
+                                 bill_writer=bill_writer)
+        queue.submit(valid_order)
+        queue.submit(valid_order)
+
+        assert queue.flush() == 2
+        assert bill_writer.submit.call_count == 2
+        mock_order_service.make_bills.assert_not_called()
+        assert len(queue.status().get("bill_failed")) == 1
+        assert isinstance(queue.status().get("last_bill_error"), ServiceError)
+
+    def test_failed_bills_are_retried_and_reported(self, tmpdir, mock_dao_manager, mock_order_service, valid_order):
+        mock_order_service.make_bills.side_effect = IOError("disk is gone")
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, OrderJournal(str(tmpdir), sync=False),
+                                 bill_attempts=2)
+        queue.submit(valid_order)
+
+        assert queue.flush() == 1
+        assert mock_order_service.make_bills.call_count == 2
+        assert len(queue.status().get("bill_failed")) == 1
+
+    def test_status_does_not_wait_for_running_flush(self, tmpdir, mock_dao_manager, mock_order_service, valid_order):
+        queue = WriteBehindQueue(mock_order_service, mock_dao_manager, OrderJournal(str(tmpdir), sync=False))
+        statuses = []
+
+        def save_batch(orders, *args):
+            reader = threading.Thread(target=lambda: statuses.append(queue.status()))
+            reader.start()
+            reader.join(5)
+            return orders
+
+        mock_order_service.save_batch.side_effect = save_batch
+        queue.submit(valid_order)
+
+        assert queue.flush() == 1
+        assert [status.get("pending") for status in statuses] == [1]